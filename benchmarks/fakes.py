@@ -0,0 +1,79 @@
+# In-memory stand-ins for the python-ms-core storage client and topics so
+# the pipeline can be benchmarked without cloud resources.
+import os
+from gtfs_canonical_validator.models.response import Response
+
+
+class InMemoryFile:
+    def __init__(self, file_path: str, content: bytes):
+        self.name = file_path
+        self.file_path = file_path
+        self.content = content
+
+    def get_stream(self):
+        return self.content
+
+
+class InMemoryContainer:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class InMemoryStorageClient:
+    def __init__(self):
+        self.files = {}
+
+    def add_file(self, url: str, content: bytes) -> None:
+        self.files[url] = content
+
+    def get_container(self, container_name: str):
+        return InMemoryContainer(container_name)
+
+    def get_file_from_url(self, container_name: str, full_url: str):
+        return InMemoryFile(os.path.basename(full_url), self.files[full_url])
+
+
+class InMemoryTopic:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, data) -> None:
+        self.published.append(data)
+
+    def subscribe(self, subscription: str, callback) -> None:
+        return
+
+
+# Stand-in for python_ms_core.Core, all instances share the same storage and topic
+class InMemoryCore:
+    __version__ = 'in-memory'
+    storage_client = InMemoryStorageClient()
+    topic = InMemoryTopic()
+
+    def get_topic(self, topic_name: str = None, max_concurrent_messages: int = 1):
+        return self.topic
+
+    def get_logger(self):
+        return None
+
+    def get_storage_client(self):
+        return self.storage_client
+
+
+# Replaces the remote canonical validator with a canned report so the
+# overhead of the service itself can be measured
+class StubCanonicalValidator:
+    __version__ = 'stub'
+    report = []
+
+    def __init__(self, zip_file):
+        self.file = zip_file
+
+    def validate(self) -> Response:
+        response = Response()
+        errors = list(StubCanonicalValidator.report)
+        if errors:
+            response.error = errors
+        else:
+            response.status = True
+        return response
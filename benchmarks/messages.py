@@ -0,0 +1,129 @@
+# Micro-benchmark of the message models: decoding of the upload message into
+# FileUploadMsg and the serializer classes, attribute reads, encoding to JSON
+# bytes and memory per decoded message. Compares the slotted classes with the
+# dict backed classes they replaced, rebuilt from the same source without
+# __slots__, encoded with the destructive to_json they had.
+#
+#   python -m benchmarks.messages [--messages 100000]
+import ast
+import copy
+import json
+import time
+import inspect
+import argparse
+import tracemalloc
+from pathlib import Path
+from types import ModuleType
+from src.models import file_upload_msg
+from src.serializer import gtfs_pathways_serializer
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PAYLOAD = ROOT_DIR / 'src/assets/test_pathways_payload.json'
+REQUEST = ROOT_DIR / 'src/assets/request-msg.json'
+
+
+class _RemoveSlots(ast.NodeTransformer):
+    def visit_ClassDef(self, node):
+        node.body = [statement for statement in node.body
+                     if not (isinstance(statement, ast.Assign) and
+                             any(isinstance(target, ast.Name) and target.id == '__slots__'
+                                 for target in statement.targets))]
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorator.keywords = [keyword for keyword in decorator.keywords if keyword.arg != 'slots']
+        return node
+
+
+# The module as it was before the classes were slotted
+def dict_backed(module: ModuleType) -> ModuleType:
+    tree = _RemoveSlots().visit(ast.parse(inspect.getsource(module)))
+    legacy = ModuleType(f'{module.__name__}_dict_backed')
+    exec(compile(ast.fix_missing_locations(tree), module.__file__, 'exec'), legacy.__dict__)
+    return legacy
+
+
+# to_json as it was implemented, it replaced the nested objects of the
+# message with dicts so a message could only be encoded once
+def legacy_to_json(upload) -> dict:
+    data = upload.data
+    request = data.request
+    data.request = gtfs_pathways_serializer.to_json(request.__dict__)
+    data.request['polygon'] = request.polygon
+    data.meta = gtfs_pathways_serializer.to_json(data.meta.__dict__)
+    data.response = gtfs_pathways_serializer.to_json(data.response.__dict__)
+    upload.data = gtfs_pathways_serializer.to_json(data.__dict__)
+    return gtfs_pathways_serializer.to_json(upload.__dict__)
+
+
+def legacy_encode(serializer, payload: dict, count: int):
+    uploads = iter([serializer.GTFSPathwaysUpload(payload) for _ in range(count)])
+    return lambda: json.dumps(legacy_to_json(next(uploads))).encode('utf-8')
+
+
+def encode(serializer, payload: dict, count: int):
+    upload = serializer.GTFSPathwaysUpload(payload)
+    return upload.to_bytes
+
+
+def decode(models, serializer, request: dict, payload: dict):
+    message = models.FileUploadMsg.from_dict(request)
+    upload = serializer.GTFSPathwaysUpload(payload)
+    return message, upload
+
+
+def read(message, upload) -> int:
+    return len(message.data.file_upload_path) + len(message.data.tdei_project_group_id or '') + \
+        len(upload.data.request.tdei_station_id) + len(upload.data.meta.file_upload_path) + \
+        len(upload.message_type) + int(upload.data.response.success)
+
+
+def timed(fn, count: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return time.perf_counter() - started_at
+
+
+def bytes_per_message(models, serializer, request: dict, payload: dict, count: int = 10000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    messages = [decode(models, serializer, request, payload) for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del messages
+    return allocated / count
+
+
+def run(name: str, models, serializer, encoder, request: dict, payload: dict, count: int) -> dict:
+    decoded = decode(models, serializer, request, payload)
+    return {
+        'name': name,
+        'decode': timed(lambda: decode(models, serializer, request, payload), count),
+        'read': timed(lambda: read(*decoded), count),
+        'encode': timed(encoder(serializer, payload, count), count),
+        'bytes': bytes_per_message(models, serializer, request, payload)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the message models')
+    parser.add_argument('--messages', type=int, default=100000)
+    args = parser.parse_args()
+
+    payload = json.loads(PAYLOAD.read_text())
+    request = json.loads(REQUEST.read_text())
+    results = [
+        run('dict backed', dict_backed(file_upload_msg), dict_backed(gtfs_pathways_serializer), legacy_encode,
+            copy.deepcopy(request), copy.deepcopy(payload), args.messages),
+        run('slotted', file_upload_msg, gtfs_pathways_serializer, encode, request, payload, args.messages)
+    ]
+    print(f'{"models":<12} {"decode (us)":>12} {"read (us)":>10} {"encode (us)":>12} {"bytes/msg":>10}')
+    for result in results:
+        print(f'{result["name"]:<12} {result["decode"] / args.messages * 1e6:>12.2f} '
+              f'{result["read"] / args.messages * 1e6:>10.3f} {result["encode"] / args.messages * 1e6:>12.2f} '
+              f'{result["bytes"]:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Micro-benchmark of the notice classification on synthetic validator reports.
+# Compares the NoticeClassifier with the list based loop it replaced.
+#
+#   python -m benchmarks.notice_classifier [--sizes 1000 10000 50000]
+import copy
+import time
+import random
+import argparse
+from src.notice_classifier import NoticeClassifier
+from src.pathways_config import CHANGE_ERROR_TO_WARNING, PATHWAYS_FATAL_ERROR_CODES, PATHWAYS_FIELDS, PATHWAYS_FILES
+
+OTHER_CODES = [f'other_error_{i}' for i in range(50)]
+FILENAMES = ['stops.txt', 'trips.txt', 'routes.txt', 'stop_times.txt', 'shapes.txt', 'pathways.txt', 'levels.txt']
+FIELDS = ['stop_id', 'wheelchair_boarding', 'tts_stop_name', 'wheelchair_accessible', 'shape_id', 'level_id']
+
+
+# Builds a report of `size` errors, `pathways_ratio` of the non downgraded errors relate to pathways
+def synthetic_report(size: int, pathways_ratio: float = 0.0, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    errors = []
+    for _ in range(size):
+        if rng.random() < 0.5:
+            code = rng.choice(CHANGE_ERROR_TO_WARNING)
+            notices = [{'filename': 'stop_times.txt', 'fieldName': 'arrival_time'}]
+        elif rng.random() < pathways_ratio:
+            code = rng.choice(PATHWAYS_FATAL_ERROR_CODES)
+            notices = [{'filename': 'pathways.txt'}]
+        else:
+            code = rng.choice(OTHER_CODES)
+            notices = [{'filename': rng.choice(FILENAMES[:5]), 'fieldName': 'stop_id'} for _ in range(5)]
+        errors.append({'code': code, 'severity': 'ERROR', 'sampleNotices': notices})
+    return errors
+
+
+# The classification loop as it was implemented in GTFSPathwaysValidation
+def legacy_classify(errors: list, is_valid: bool = False):
+    info = []
+    for error in errors[:]:
+        if error['code'] in CHANGE_ERROR_TO_WARNING:
+            info.append(error)
+            errors.remove(error)
+            continue
+        if error['code'] in PATHWAYS_FATAL_ERROR_CODES:
+            is_valid = False
+            continue
+        for notice in error['sampleNotices']:
+            if 'fieldName' in notice and 'filename' in notice:
+                if notice['filename'] in PATHWAYS_FIELDS and notice['fieldName'] in PATHWAYS_FIELDS[notice['filename']]:
+                    is_valid = False
+                    continue
+            if 'filename' in notice:
+                if notice['filename'] in PATHWAYS_FILES:
+                    is_valid = False
+                    continue
+            if 'childFilename' in notice:
+                if notice['childFilename'] in PATHWAYS_FILES:
+                    is_valid = False
+                    continue
+    if len(errors) == 0:
+        is_valid = True
+    return is_valid, errors, info
+
+
+def classify(classifier: NoticeClassifier, errors: list, is_valid: bool = False):
+    classification = classifier.classify(errors)
+    if classification.has_pathways_error:
+        is_valid = False
+    if len(classification.errors) == 0:
+        is_valid = True
+    return is_valid, classification.errors, classification.warnings
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    started_at = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started_at, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the notice classification')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 20000, 50000])
+    parser.add_argument('--pathways-ratio', type=float, default=0.0)
+    args = parser.parse_args()
+
+    classifier = NoticeClassifier.from_config()
+    print(f'{"errors":>10} {"legacy (s)":>12} {"classifier (s)":>15} {"speedup":>9}')
+    for size in args.sizes:
+        report = synthetic_report(size, pathways_ratio=args.pathways_ratio)
+        legacy_time, legacy_result = timed(legacy_classify, copy.copy(report))
+        classifier_time, result = timed(classify, classifier, copy.copy(report))
+        assert legacy_result == result, 'classifier and legacy loop disagree'
+        print(f'{size:>10} {legacy_time:>12.4f} {classifier_time:>15.4f} {legacy_time / classifier_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
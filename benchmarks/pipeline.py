@@ -0,0 +1,180 @@
+# End-to-end benchmark of the validation pipeline: download, canonical
+# validation, notice classification and publishing of the result. Uses the
+# bundled test feeds, the SF Bay ferry feed and synthetically scaled copies
+# of them, with in-memory storage and topics.
+#
+#   python -m benchmarks.pipeline [--validator stub|remote] [--scales 1 10 50] [--json results.json]
+import io
+import os
+import json
+import glob
+import time
+import zipfile
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from unittest.mock import patch
+import psutil
+from src import gtfs_pathways_validation, gtfx_pathways_validator, rules_table
+from src.models.file_upload_msg import FileUploadMsg
+from .fakes import InMemoryCore, StubCanonicalValidator
+from .notice_classifier import synthetic_report
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES = sorted(glob.glob(str(ROOT_DIR / 'tests/unit_tests/test_files/*.zip'))) + \
+           sorted(glob.glob(str(ROOT_DIR / '*.zip')))
+SCALED_FILES = ('stop_times.txt', 'shapes.txt', 'trips.txt', 'stops.txt', 'pathways.txt')
+STAGES = ('download', 'validate', 'classify', 'publish', 'total')
+MB = 1024 * 1024
+
+
+# Multiplies the data rows of the biggest files of a feed, suffixing the
+# first column so the rows stay unique
+def scale_feed(content: bytes, factor: int) -> bytes:
+    if factor <= 1:
+        return content
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, \
+            zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as target:
+        for member in source.infolist():
+            data = source.read(member)
+            if os.path.basename(member.filename) in SCALED_FILES and not member.filename.startswith('__MACOSX'):
+                lines = data.decode('utf-8-sig').splitlines()
+                rows = [line for line in lines[1:] if line]
+                scaled = [lines[0]]
+                for copy in range(factor):
+                    for row in rows:
+                        first, _, rest = row.partition(',')
+                        scaled.append(f'{first}_{copy},{rest}' if copy else row)
+                data = '\n'.join(scaled).encode('utf-8')
+            target.writestr(member.filename, data)
+    return output.getvalue()
+
+
+class RssSampler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self._process.memory_info().rss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started_at)
+        return timed
+
+
+def run_feed(validator, storage_client, name: str, content: bytes, iterations: int, validator_class) -> dict:
+    url = f'https://bench.blob.core.windows.net/gtfspathways/bench/{name}'
+    storage_client.add_file(url, content)
+    message = FileUploadMsg.from_dict({
+        'messageId': name, 'messageType': 'benchmark',
+        'data': {'file_upload_path': url, 'user_id': 'benchmark', 'tdei_project_group_id': 'benchmark'}
+    })
+    samples = []
+    with RssSampler() as sampler:
+        for _ in range(iterations):
+            timer = StageTimer()
+            classifier = rules_table.registry.current.classifier
+            with patch.object(gtfs_pathways_validation.GTFSPathwaysValidation, 'download_single_file',
+                              timer.wrap('download', gtfs_pathways_validation.GTFSPathwaysValidation.download_single_file)), \
+                    patch.object(validator_class, 'validate', timer.wrap('validate', validator_class.validate)), \
+                    patch.object(classifier, 'classify', timer.wrap('classify', classifier.classify)), \
+                    patch.object(validator, 'send_status', timer.wrap('publish', validator.send_status)):
+                started_at = time.perf_counter()
+                validator.process_message(message)
+                timer.record('total', time.perf_counter() - started_at)
+            samples.append(timer.timings)
+    total = sum(sample['total'] for sample in samples)
+    return {
+        'feed': name,
+        'size_mb': round(len(content) / MB, 3),
+        'iterations': iterations,
+        'latency_ms': {stage: round(statistics.median(sample.get(stage, 0.0) for sample in samples) * 1000, 3)
+                       for stage in STAGES},
+        'peak_rss_mb': round(sampler.peak / MB, 1),
+        'throughput_feeds_per_s': round(iterations / total, 2),
+        'throughput_mb_per_s': round(iterations * len(content) / MB / total, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the end-to-end validation pipeline')
+    parser.add_argument('--validator', choices=['stub', 'remote'], default='stub',
+                        help='stub replaces the remote canonical validator with a canned report')
+    parser.add_argument('--notices', type=int, default=1000, help='errors in the stub report')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--feeds', nargs='*', default=FIXTURES)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    StubCanonicalValidator.report = synthetic_report(args.notices)
+    core = InMemoryCore()
+    patches = [patch.object(gtfx_pathways_validator, 'Core', InMemoryCore)]
+    validator_class = gtfs_pathways_validation.CanonicalValidator
+    if args.validator == 'stub':
+        validator_class = StubCanonicalValidator
+        patches += [patch.object(gtfs_pathways_validation, 'CanonicalValidator', StubCanonicalValidator),
+                    patch.object(gtfx_pathways_validator, 'CanonicalValidator', StubCanonicalValidator)]
+    for p in patches:
+        p.start()
+    gtfs_pathways_validation.logger.disabled = True
+    gtfx_pathways_validator.logger.disabled = True
+    try:
+        validator = gtfx_pathways_validator.GTFSPathwaysValidator()
+        results = []
+        header = f'{"feed":<48} {"MB":>7} ' + ' '.join(f'{stage + " ms":>12}' for stage in STAGES) + \
+                 f' {"RSS MB":>8} {"feeds/s":>8} {"MB/s":>8}'
+        print(header)
+        for feed in args.feeds:
+            with open(feed, 'rb') as f:
+                original = f.read()
+            for scale in args.scales:
+                name = f'{Path(feed).stem}-x{scale}.zip'
+                result = run_feed(validator, core.storage_client, name, scale_feed(original, scale),
+                                  args.iterations if args.validator == 'stub' else 1, validator_class)
+                results.append(result)
+                print(f'{name[-48:]:<48} {result["size_mb"]:>7} ' +
+                      ' '.join(f'{result["latency_ms"][stage]:>12}' for stage in STAGES) +
+                      f' {result["peak_rss_mb"]:>8} {result["throughput_feeds_per_s"]:>8}'
+                      f' {result["throughput_mb_per_s"]:>8}')
+        validator.stop_listening()
+    finally:
+        for p in patches:
+            p.stop()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'validator': args.validator, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Callable, Optional, Any
+from .validation_executor import validation_workers
+from . import metrics
+
+logging.basicConfig()
+logger = logging.getLogger('ASYNC_PIPELINE')
+logger.setLevel(logging.INFO)
+
+
+@dataclass
+class PipelineJob:
+    message: Any
+    file_upload_path: str
+    done: asyncio.Future
+    downloaded_file_path: Optional[str] = None
+    is_valid: bool = False
+    validation_message: str = ''
+    # values returned by `validate` after the message, passed on to `publish`
+    extra: tuple = ()
+
+
+# Message pipeline running on its own event loop. Jobs flow through bounded
+# asyncio queues between the download, validate and publish stages, so the
+# next message is downloaded while the current one is validated. The stage
+# functions are blocking and run on a thread pool, the validate function
+# hands the CPU bound work to the validation executor:
+#   download(file_upload_path) -> downloaded file path
+#   validate(message, file_upload_path, downloaded_file_path) -> (is_valid, validation_message, *extra)
+#   publish(message, is_valid, validation_message, *extra) -> concurrent Future
+# A failed download or validation is published as an invalid upload.
+class AsyncPipeline:
+
+    def __init__(self, download: Callable, validate: Callable, publish: Callable, download_workers: int = 1,
+                 validation_workers: int = 1, queue_size: int = 1):
+        self.download = download
+        self.validate = validate
+        self.publish = publish
+        self.download_workers = max(download_workers, 1)
+        self.validation_workers = max(validation_workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self._blocking_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.download_workers + self.validation_workers, thread_name_prefix='pipeline')
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._tasks = []
+        self._thread = threading.Thread(target=self._run_loop, name='async-pipeline', daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    @classmethod
+    def from_settings(cls, settings, download: Callable, validate: Callable, publish: Callable) -> 'AsyncPipeline':
+        return cls(download=download, validate=validate, publish=publish,
+                   download_workers=int(settings.pipeline_download_workers),
+                   validation_workers=validation_workers(settings),
+                   queue_size=int(settings.pipeline_queue_size))
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._downloads = asyncio.Queue(maxsize=self.queue_size)
+        self._validations = asyncio.Queue(maxsize=self.queue_size)
+        self._publications = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [self._loop.create_task(self._download_stage()) for _ in range(self.download_workers)]
+        self._tasks += [self._loop.create_task(self._validate_stage()) for _ in range(self.validation_workers)]
+        self._tasks.append(self._loop.create_task(self._publish_stage()))
+        self._loop.call_soon(self._started.set)
+        self._loop.run_forever()
+
+    # Called from the subscriber threads, blocks until the result of the
+    # message is published so the message is only settled afterwards
+    def process(self, message, file_upload_path: str) -> None:
+        if self._loop.is_closed() or not self._loop.is_running():
+            raise concurrent.futures.CancelledError('Pipeline is stopped')
+        asyncio.run_coroutine_threadsafe(self._process(message, file_upload_path), self._loop).result()
+
+    async def _process(self, message, file_upload_path: str) -> None:
+        job = PipelineJob(message=message, file_upload_path=file_upload_path, done=self._loop.create_future())
+        await self._downloads.put(job)
+        await job.done
+
+    async def _in_pool(self, fn: Callable, *args) -> Any:
+        return await self._loop.run_in_executor(self._blocking_pool, fn, *args)
+
+    async def _download_stage(self) -> None:
+        while True:
+            job = await self._downloads.get()
+            try:
+                job.downloaded_file_path = await self._in_pool(self.download, job.file_upload_path)
+            except Exception as e:
+                logger.error(f' Download failed for {job.file_upload_path}: {e}')
+                metrics.record_failures(['exception'])
+                job.is_valid, job.validation_message = False, str(e)
+                await self._publications.put(job)
+                continue
+            await self._validations.put(job)
+
+    async def _validate_stage(self) -> None:
+        while True:
+            job = await self._validations.get()
+            try:
+                job.is_valid, job.validation_message, *extra = await self._in_pool(
+                    self.validate, job.message, job.file_upload_path, job.downloaded_file_path)
+                job.extra = tuple(extra)
+            except Exception as e:
+                logger.error(f' Validation failed for {job.file_upload_path}: {e}')
+                metrics.record_failures(['exception'])
+                job.is_valid, job.validation_message = False, str(e)
+            await self._publications.put(job)
+
+    async def _publish_stage(self) -> None:
+        while True:
+            job = await self._publications.get()
+            try:
+                published = self.publish(job.message, job.is_valid, job.validation_message, *job.extra)
+            except Exception as e:
+                _settle(job.done, e)
+                continue
+            # publishing completes in the background so results can be batched
+            self._loop.create_task(self._wait_published(job, published))
+
+    @staticmethod
+    async def _wait_published(job: PipelineJob, published: concurrent.futures.Future) -> None:
+        try:
+            await asyncio.wrap_future(published)
+        except Exception as e:
+            _settle(job.done, e)
+        else:
+            _settle(job.done)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+
+        async def cancel_tasks():
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(cancel_tasks(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._blocking_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _settle(future: asyncio.Future, error: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
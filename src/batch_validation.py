@@ -0,0 +1,174 @@
+# Validates many GTFS pathways zips from the local file system, e.g. to
+# re-validate the archive after a rules change. Feeds run through the same
+# GTFSPathwaysValidation logic as the queued messages, across a pool of
+# worker processes. One JSON line per feed is appended to the output with the
+# result and its timing, followed by a summary line. Feeds already listed in
+# the checkpoint file are skipped, so an interrupted backfill can be resumed.
+# Feeds without a definitive result (download or validator failures) are
+# reported as failed and left out of the checkpoint to be retried.
+#
+#   python -m src.batch_validation <folder or zip>... [--manifest feeds.txt] [--output results.jsonl]
+#                                  [--checkpoint results.jsonl.checkpoint] [--workers 4]
+import os
+import sys
+import math
+import json
+import time
+import argparse
+import statistics
+import multiprocessing
+import concurrent.futures
+from typing import Optional, Iterable, BinaryIO
+from .config import Settings
+from .result_cache import ResultCache
+from .gtfx_pathways_validator import WorkerContext, start_warm_validator
+
+
+# Stand-in for the python-ms-core storage client serving files from the
+# local file system, the upload path of a feed is its path on disk
+class LocalFile:
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+        self.file_path = path
+
+    # Opened file, `stream_to_file` copies it in chunks and closes it
+    def get_stream(self) -> BinaryIO:
+        return open(self.file_path, 'rb')
+
+
+class LocalContainer:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class LocalStorageClient:
+    def get_container(self, container_name: str) -> LocalContainer:
+        return LocalContainer(container_name)
+
+    def get_file_from_url(self, container_name: str, full_url: str) -> LocalFile:
+        return LocalFile(full_url)
+
+
+# Context of the current worker process, built once by `init_worker`
+_context: Optional[WorkerContext] = None
+
+
+def init_worker() -> None:
+    global _context
+    settings = Settings()
+    _context = WorkerContext(storage_client=LocalStorageClient(), result_cache=ResultCache.from_settings(settings),
+                             warm_validator=start_warm_validator(settings))
+
+
+def validate_feed(feed: str) -> dict:
+    if _context is None:
+        init_worker()
+    started_at = time.perf_counter()
+    record = {'type': 'feed', 'feed': feed, 'size': 0, 'pid': os.getpid()}
+    try:
+        record['size'] = os.path.getsize(feed)
+        validation = _context.validation(feed)
+        record['valid'], record['message'] = validation.validate()
+        if not validation.is_final:
+            record['valid'], record['error'] = False, record['message'] or 'Validation did not complete'
+    except Exception as e:
+        record['valid'], record['error'] = False, f'{type(e).__name__}: {e}'
+    record['seconds'] = round(time.perf_counter() - started_at, 3)
+    return record
+
+
+# Zips of the given folders (recursively) and files, plus the paths listed in
+# the manifest (one per line, `#` comments allowed), without duplicates
+def collect_feeds(paths: Iterable[str], manifest: Optional[str] = None) -> list:
+    paths = list(paths)
+    if manifest:
+        with open(manifest) as f:
+            paths.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith('#'))
+    feeds = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, filenames in sorted(os.walk(path)):
+                feeds.extend(os.path.join(folder, filename) for filename in sorted(filenames)
+                             if filename.lower().endswith('.zip'))
+        else:
+            feeds.append(path)
+    return list(dict.fromkeys(os.path.abspath(feed) for feed in feeds))
+
+
+def read_checkpoint(checkpoint: str) -> set:
+    if not os.path.exists(checkpoint):
+        return set()
+    with open(checkpoint) as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def summarize(records: list, wall_seconds: float) -> dict:
+    seconds = sorted(record['seconds'] for record in records)
+    return {
+        'type': 'summary',
+        'feeds': len(records),
+        'valid': sum(1 for record in records if record['valid']),
+        'invalid': sum(1 for record in records if not record['valid'] and 'error' not in record),
+        'failed': sum(1 for record in records if 'error' in record),
+        'bytes': sum(record['size'] for record in records),
+        'wall_seconds': round(wall_seconds, 3),
+        'feed_seconds': round(sum(seconds), 3),
+        'p50_seconds': round(statistics.median(seconds), 3) if seconds else 0,
+        'p95_seconds': seconds[math.ceil(0.95 * len(seconds)) - 1] if seconds else 0,
+        'feeds_per_second': round(len(records) / wall_seconds, 3) if wall_seconds else 0
+    }
+
+
+# Validates the feeds not in the checkpoint yet, `workers` 0 validates them in
+# this process. Returns the summary written at the end of the output.
+def run(feeds: list, output: str, checkpoint: str, workers: int = 1) -> dict:
+    completed = read_checkpoint(checkpoint)
+    pending = [feed for feed in feeds if feed not in completed]
+    print(f'{len(pending)} feeds to validate, {len(feeds) - len(pending)} already in {checkpoint}', file=sys.stderr)
+    started_at = time.perf_counter()
+    records = []
+    with open(output, 'a') as results, open(checkpoint, 'a') as done:
+        def record(result: dict) -> None:
+            records.append(result)
+            results.write(json.dumps(result) + '\n')
+            results.flush()
+            # a feed is only checkpointed once its final result is written
+            if 'error' not in result:
+                done.write(result['feed'] + '\n')
+                done.flush()
+            print(f'[{len(records)}/{len(pending)}] {result["feed"]}: valid={result["valid"]} '
+                  f'in {result["seconds"]}s', file=sys.stderr)
+
+        if workers <= 0:
+            for feed in pending:
+                record(validate_feed(feed))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                        mp_context=multiprocessing.get_context('spawn'),
+                                                        initializer=init_worker) as pool:
+                for future in concurrent.futures.as_completed(pool.submit(validate_feed, feed) for feed in pending):
+                    record(future.result())
+        summary = summarize(records, time.perf_counter() - started_at)
+        results.write(json.dumps(summary) + '\n')
+    return summary
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Validates GTFS pathways zips from the local file system')
+    parser.add_argument('paths', nargs='*', help='zip files or folders containing zip files')
+    parser.add_argument('--manifest', help='file listing the zip files to validate, one per line')
+    parser.add_argument('--output', default='results.jsonl', help='JSON lines file the results are appended to')
+    parser.add_argument('--checkpoint', help='file listing the validated feeds, defaults to <output>.checkpoint')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes, 0 validates in this process')
+    args = parser.parse_args(argv)
+    feeds = collect_feeds(args.paths, args.manifest)
+    if not feeds:
+        parser.error('no feeds to validate')
+    summary = run(feeds, args.output, args.checkpoint or f'{args.output}.checkpoint', workers=args.workers)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
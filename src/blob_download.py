@@ -0,0 +1,107 @@
+import io
+import os
+import time
+import logging
+import psutil
+from typing import Optional
+from dataclasses import dataclass
+from python_ms_core.core.storage.providers.azure.azure_file_entity import AzureFileEntity
+
+logging.basicConfig()
+logger = logging.getLogger('BLOB_DOWNLOAD')
+logger.setLevel(logging.INFO)
+
+# Default size of a single ranged read from the blob store (4 MiB)
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@dataclass
+class DownloadStats:
+    bytes_written: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    start_rss_bytes: int = 0
+    peak_rss_bytes: int = 0
+
+    # Growth of the resident set over the download, this is what
+    # should stay flat regardless of the feed size
+    @property
+    def rss_high_water_mark_bytes(self) -> int:
+        return max(self.peak_rss_bytes - self.start_rss_bytes, 0)
+
+
+class _RssTracker:
+    def __init__(self, stats: DownloadStats):
+        self._process = psutil.Process(os.getpid())
+        self._stats = stats
+        self._stats.start_rss_bytes = self._stats.peak_rss_bytes = self._rss()
+
+    def _rss(self) -> int:
+        return self._process.memory_info().rss
+
+    def sample(self) -> None:
+        rss = self._rss()
+        if rss > self._stats.peak_rss_bytes:
+            self._stats.peak_rss_bytes = rss
+
+
+# Streams the content of `file` into `destination` without holding the
+# whole blob in memory. Azure blobs are fetched with ranged reads of
+# `chunk_size` bytes written straight into the file handle, other
+# storage providers fall back to their `get_stream` implementation, which
+# may return the content or a binary file object read in chunks (and closed).
+def stream_to_file(file, destination: str, chunk_size: int = DEFAULT_CHUNK_SIZE, fsync: bool = False) -> DownloadStats:
+    stats = DownloadStats()
+    tracker = _RssTracker(stats)
+    started_at = time.perf_counter()
+    with open(destination, 'wb') as blob:
+        if isinstance(file, AzureFileEntity):
+            _stream_azure_blob(file.blob_client, blob, chunk_size, stats, tracker)
+        else:
+            content = file.get_stream()
+            if isinstance(content, io.IOBase):
+                with content:
+                    _stream_file_object(content, blob, chunk_size, stats, tracker)
+            else:
+                if isinstance(content, str):
+                    content = content.encode('utf-8')
+                blob.write(content)
+                stats.bytes_written = len(content)
+                stats.chunks = 1
+                tracker.sample()
+        if fsync:
+            blob.flush()
+            os.fsync(blob.fileno())
+    stats.elapsed_seconds = time.perf_counter() - started_at
+    return stats
+
+
+def _stream_azure_blob(blob_client, handle, chunk_size: int, stats: DownloadStats, tracker: _RssTracker) -> None:
+    size = blob_client.get_blob_properties().size
+    offset = 0
+    while offset < size:
+        length = min(chunk_size, size - offset)
+        written = blob_client.download_blob(offset=offset, length=length).readinto(handle)
+        offset += written
+        stats.bytes_written += written
+        stats.chunks += 1
+        tracker.sample()
+        if written == 0:
+            logger.error(f' Blob ended early at byte {offset} of {size}')
+            break
+
+
+def _stream_file_object(source, handle, chunk_size: int, stats: DownloadStats, tracker: _RssTracker) -> None:
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        handle.write(chunk)
+        stats.bytes_written += len(chunk)
+        stats.chunks += 1
+        tracker.sample()
+
+
+# Size of the blob from its properties (a HEAD request) without downloading
+# it, None when the storage provider does not expose it
+def blob_size(file) -> Optional[int]:
+    if isinstance(file, AzureFileEntity):
+        return file.blob_client.get_blob_properties().size
+    return None
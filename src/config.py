@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from pydantic import BaseSettings
 import uuid
+from pathlib import Path
 
 load_dotenv()
 
@@ -13,6 +14,57 @@ class Settings(BaseSettings):
     request_subscription: str = os.environ.get('REQUEST_SUBSCRIPTION', None)
     storage_container_name: str = os.environ.get('CONTAINER_NAME', 'gtfspathways')
     max_concurrent_messages: int = os.environ.get('MAX_CONCURRENT_MESSAGES', 2)
+    publish_batch_size: int = os.environ.get('PUBLISH_BATCH_SIZE', 100)
+    publish_linger_ms: int = os.environ.get('PUBLISH_LINGER_MS', 0)
+    publish_max_retries: int = os.environ.get('PUBLISH_MAX_RETRIES', 3)
+    publish_retry_backoff_seconds: float = os.environ.get('PUBLISH_RETRY_BACKOFF_SECONDS', 0.5)
+    download_backend: str = os.environ.get('DOWNLOAD_BACKEND', 'disk')
+    download_tmpfs_path: str = os.environ.get('DOWNLOAD_TMPFS_PATH', '/dev/shm/gtfs-pathways')
+    download_janitor_interval_seconds: int = os.environ.get('DOWNLOAD_JANITOR_INTERVAL_SECONDS', 600)
+    download_janitor_max_age_seconds: int = os.environ.get('DOWNLOAD_JANITOR_MAX_AGE_SECONDS', 6 * 3600)
+    download_chunk_size: int = os.environ.get('DOWNLOAD_CHUNK_SIZE', 4 * 1024 * 1024)
+    download_fsync: bool = os.environ.get('DOWNLOAD_FSYNC', False)
+    result_cache_enabled: bool = os.environ.get('RESULT_CACHE_ENABLED', False)
+    result_cache_path: str = os.environ.get('RESULT_CACHE_PATH', f'{Path.cwd()}/cache/results.sqlite3')
+    result_cache_ttl_seconds: int = os.environ.get('RESULT_CACHE_TTL_SECONDS', 86400)
+    result_cache_max_size_bytes: int = os.environ.get('RESULT_CACHE_MAX_SIZE_BYTES', 256 * 1024 * 1024)
+    result_format: str = os.environ.get('RESULT_FORMAT', 'text')
+    result_max_samples: int = os.environ.get('RESULT_MAX_SAMPLES', 5)
+    result_max_bytes: int = os.environ.get('RESULT_MAX_BYTES', 200 * 1024)
+    result_embed_report: bool = os.environ.get('RESULT_EMBED_REPORT', False)
+    report_offload_enabled: bool = os.environ.get('REPORT_OFFLOAD_ENABLED', False)
+    report_offload_min_notices: int = os.environ.get('REPORT_OFFLOAD_MIN_NOTICES', 0)
+    zip_prescreen_enabled: bool = os.environ.get('ZIP_PRESCREEN_ENABLED', True)
+    zip_prescreen_max_members: int = os.environ.get('ZIP_PRESCREEN_MAX_MEMBERS', 1000)
+    zip_prescreen_max_uncompressed_bytes: int = os.environ.get('ZIP_PRESCREEN_MAX_UNCOMPRESSED_BYTES',
+                                                               4 * 1024 * 1024 * 1024)
+    zip_prescreen_max_compression_ratio: float = os.environ.get('ZIP_PRESCREEN_MAX_COMPRESSION_RATIO', 500)
+    zip_prescreen_require_pathways: bool = os.environ.get('ZIP_PRESCREEN_REQUIRE_PATHWAYS', False)
+    incremental_validation_enabled: bool = os.environ.get('INCREMENTAL_VALIDATION_ENABLED', False)
+    incremental_validation_path: str = os.environ.get('INCREMENTAL_VALIDATION_PATH',
+                                                      f'{Path.cwd()}/cache/accepted.sqlite3')
+    rules_path: str = os.environ.get('RULES_PATH', None)
+    rules_reload_interval_seconds: int = os.environ.get('RULES_RELOAD_INTERVAL_SECONDS', 30)
+    pathways_precheck_enabled: bool = os.environ.get('PATHWAYS_PRECHECK_ENABLED', False)
+    stop_area_check_enabled: bool = os.environ.get('STOP_AREA_CHECK_ENABLED', False)
+    pathways_scope_enabled: bool = os.environ.get('PATHWAYS_SCOPE_ENABLED', False)
+    prefetch_max_files: int = os.environ.get('PREFETCH_MAX_FILES', 0)
+    prefetch_max_bytes: int = os.environ.get('PREFETCH_MAX_BYTES', 0)
+    scheduler_enabled: bool = os.environ.get('SCHEDULER_ENABLED', False)
+    scheduler_large_file_bytes: int = os.environ.get('SCHEDULER_LARGE_FILE_BYTES', 50 * 1024 * 1024)
+    scheduler_large_slots: int = os.environ.get('SCHEDULER_LARGE_SLOTS', 1)
+    scheduler_queue_size: int = os.environ.get('SCHEDULER_QUEUE_SIZE', 0)
+    pipeline_mode: str = os.environ.get('PIPELINE_MODE', 'thread')
+    pipeline_download_workers: int = os.environ.get('PIPELINE_DOWNLOAD_WORKERS', 1)
+    pipeline_queue_size: int = os.environ.get('PIPELINE_QUEUE_SIZE', 1)
+    warm_validator_enabled: bool = os.environ.get('WARM_VALIDATOR_ENABLED', False)
+    warm_validator_pool_size: int = os.environ.get('WARM_VALIDATOR_POOL_SIZE', 2)
+    warm_validator_job_max_age_seconds: int = os.environ.get('WARM_VALIDATOR_JOB_MAX_AGE_SECONDS', 600)
+    validation_executor: str = os.environ.get('VALIDATION_EXECUTOR', 'inline')
+    validation_workers: int = os.environ.get('VALIDATION_WORKERS', 0)
+    validation_timeout_seconds: int = os.environ.get('VALIDATION_TIMEOUT_SECONDS', 0)
+    worker_max_jobs: int = os.environ.get('WORKER_MAX_JOBS', 0)
+    worker_max_rss_mb: int = os.environ.get('WORKER_MAX_RSS_MB', 0)
     
     def get_unique_id(self) -> str:
         return str(uuid.uuid4())
\ No newline at end of file
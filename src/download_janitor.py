@@ -0,0 +1,91 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import Optional
+
+logging.basicConfig()
+logger = logging.getLogger('DOWNLOAD_JANITOR')
+logger.setLevel(logging.INFO)
+
+
+# Folder the uploads are downloaded to, the `tmpfs` backend keeps the
+# downloads in memory and falls back to `disk_path` when there is no tmpfs
+def resolve_download_root(backend: str, disk_path: str, tmpfs_path: str) -> str:
+    if backend != 'tmpfs':
+        return disk_path
+    if os.path.isdir(os.path.dirname(os.path.normpath(tmpfs_path))):
+        return tmpfs_path
+    logger.warning(f' No tmpfs found for {tmpfs_path}, downloading to {disk_path}')
+    return disk_path
+
+
+# Whether the filesystem of `root` has room for `size` bytes, an unknown
+# size is assumed to fit (a full tmpfs is then caught on ENOSPC)
+def has_free_space(root: str, size: Optional[int]) -> bool:
+    if size is None:
+        return True
+    path = root if os.path.isdir(root) else os.path.dirname(os.path.normpath(root))
+    try:
+        return shutil.disk_usage(path).free >= size
+    except OSError:
+        return True
+
+
+# Removes the download folders not modified for `max_age_seconds`, these are
+# left behind by a process that was killed while validating
+def sweep_orphaned_downloads(root: str, max_age_seconds: float) -> int:
+    if not os.path.isdir(root):
+        return 0
+    expired_before = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(root):
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime >= expired_before:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            # removed by its validation in the meantime
+            continue
+    if removed:
+        logger.info(f' Removed {removed} orphaned downloads from {root}')
+    return removed
+
+
+# Background thread sweeping the orphaned downloads every `interval_seconds`
+class DownloadJanitor:
+
+    def __init__(self, root: str, interval_seconds: float, max_age_seconds: float):
+        self.root = root
+        self.interval_seconds = interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='download-janitor', daemon=True)
+
+    @classmethod
+    def from_settings(cls, settings, root: str) -> Optional['DownloadJanitor']:
+        if float(settings.download_janitor_interval_seconds) <= 0:
+            return None
+        return cls(root=root,
+                   interval_seconds=float(settings.download_janitor_interval_seconds),
+                   max_age_seconds=float(settings.download_janitor_max_age_seconds))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                sweep_orphaned_downloads(self.root, self.max_age_seconds)
+            except OSError as e:
+                logger.error(f' Failed to sweep {self.root}: {e}')
+            if self._stopped.wait(self.interval_seconds):
+                return
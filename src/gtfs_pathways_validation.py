@@ -1,12 +1,26 @@
 import os
+import errno
 import shutil
 import logging
+import zipfile
 import traceback
 from pathlib import Path
-from typing import Union, Any
+from contextlib import contextmanager
+from typing import Union, Any, Optional
 from .config import Settings
+from .blob_download import stream_to_file, blob_size
 from gtfs_canonical_validator import CanonicalValidator
-from .pathways_config import CHANGE_ERROR_TO_WARNING, PATHWAYS_FATAL_ERROR_CODES, PATHWAYS_FIELDS, PATHWAYS_FILES
+from . import rules_table
+from .pathways_precheck import PathwaysPrecheck
+from .stop_area import StopAreaCheck
+from .pathways_scope import build_pathways_subset, split_scope_artifacts
+from .download_janitor import resolve_download_root, has_free_space
+from .zip_prescreen import ZipPrescreen
+from .result_format import ResultFormatter
+from .report_offload import ReportOffload
+from .incremental_validation import member_fingerprints, changed_members
+from .pathways_config import PATHWAYS_INCREMENTAL_FILES
+from . import metrics
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Path used for download file generation.
@@ -16,9 +30,31 @@ logging.basicConfig()
 logger = logging.getLogger('PATHWAYS_VALIDATION')
 logger.setLevel(logging.INFO)
 
+def download_root(settings) -> str:
+    return resolve_download_root(settings.download_backend, DOWNLOAD_FILE_PATH, settings.download_tmpfs_path)
+
 
 class GTFSPathwaysValidation:
-    def __init__(self, file_path=None, storage_client=None):
+    result_cache = None
+    pathways_precheck_enabled = False
+    pathways_scope_enabled = False
+    download_root = DOWNLOAD_FILE_PATH
+    zip_prescreen = None
+    accepted_versions = None
+    project_group_id = None
+    result_formatter = ResultFormatter()
+    report_offload = None
+    warm_validator = None
+    stop_area = None
+    # False once the last validation could not produce a definitive result
+    # (download failure, validator upload error), such results may be retried
+    is_final = True
+    # version of the rules table the last result was classified with, None
+    # when no rules were applied
+    rules_version = None
+
+    def __init__(self, file_path=None, storage_client=None, result_cache=None, accepted_versions=None,
+                 project_group_id=None, warm_validator=None, polygon_area=None):
         settings = Settings()
         self.container_name = settings.storage_container_name
         self.storage_client = storage_client
@@ -26,6 +62,18 @@ class GTFSPathwaysValidation:
         self.file_relative_path = file_path.split('/')[-1]
         self.client = self.storage_client.get_container(container_name=self.container_name)
         self.settings = settings
+        self.download_stats = None
+        self.result_cache = result_cache
+        self.pathways_precheck_enabled = settings.pathways_precheck_enabled
+        self.pathways_scope_enabled = settings.pathways_scope_enabled
+        self.download_root = download_root(settings)
+        self.zip_prescreen = ZipPrescreen.from_settings(settings)
+        self.accepted_versions = accepted_versions
+        self.project_group_id = project_group_id
+        self.result_formatter = ResultFormatter.from_settings(settings)
+        self.report_offload = ReportOffload.from_settings(settings, self.client)
+        self.warm_validator = warm_validator
+        self.stop_area = StopAreaCheck.from_settings(settings, polygon_area)
 
     # Facade function to validate the file
     # Focuses on the file name with file name validation
@@ -39,92 +87,272 @@ class GTFSPathwaysValidation:
     def is_gtfs_pathways_valid(self) -> tuple[Union[bool, Any], Union[str, Any]]:
         is_valid = False
         validation_message = ''
-        root, ext = os.path.splitext(self.file_relative_path)
-        if ext and ext.lower() == '.zip':
+        if self.has_zip_extension():
             downloaded_file_path = self.download_single_file(self.file_path)
             logger.info(f' Downloaded file path: {downloaded_file_path}')
-            pathways_validator = CanonicalValidator(zip_file=downloaded_file_path)
-            result = pathways_validator.validate()
-
-            is_valid = result.status
-            if result.error is not None:
-                validation_message = str(result.error)
-                logger.error(f' Error While Validating File: {str(result.error)}')
-
-            if isinstance(result.error, list) and result.error is not None:
-                for error in result.error[:]:
-                    # change some smaller errors to warnings instead to relax the strict validation MD gives us
-                    if error['code'] in CHANGE_ERROR_TO_WARNING:
-                        if result.info is None:
-                            result.info = []
-
-                        result.info.append(error)
-                        result.error.remove(error)
-                        continue
-
-                    # these are error codes from MD that relate to pathways that are fatal
-                    if error['code'] in PATHWAYS_FATAL_ERROR_CODES:
-                        is_valid = False
-                        continue
-
-                    # some of the notices relate to pathways, but there's no way to tell except with this logic:
-                    for notice in error['sampleNotices']:
-                        # one of the fields in a given file is a pathway-spec field--if it's flagged, fail
-                        if 'fieldName' in notice and 'filename' in notice:
-                            if notice['filename'] in PATHWAYS_FIELDS and \
-                                    notice['fieldName'] in PATHWAYS_FIELDS[notice['filename']]:
-                                is_valid = False
-                                continue
-
-                        # one of the pathways spec'd files has an error--if so, fail
-                        if 'filename' in notice:
-                            if notice['filename'] in PATHWAYS_FILES:
-                                is_valid = False
-                                continue
-
-                        # similar to the above, but the field for the filename is parent/child
-                        if 'childFilename' in notice:
-                            if notice['childFilename'] in PATHWAYS_FILES:
-                                is_valid = False
-                                continue
-
-                # if all errors have been downgraded to warnings, mark us as a success
-                if len(result.error) == 0:
-                    is_valid = True
-
-                if result.error is not None:
-                    validation_message = str(result.error)
-                    logger.error(f' Error While Validating File: {str(result.error)}')
-            GTFSPathwaysValidation.clean_up(os.path.dirname(downloaded_file_path))
+            is_valid, validation_message = self.validate_downloaded_file(downloaded_file_path)
         else:
             logger.error(f' Failed to validate because unknown file format')
+            metrics.record_failures(['unknown_file_format'])
 
         return is_valid, validation_message
 
+    def has_zip_extension(self) -> bool:
+        root, ext = os.path.splitext(self.file_relative_path)
+        return bool(ext) and ext.lower() == '.zip'
+
+    # Validates a file already downloaded with `download_single_file`, its
+    # download folder is removed even when the validation raises
+    def validate_downloaded_file(self, downloaded_file_path: Optional[str]) -> tuple[bool, str]:
+        if not downloaded_file_path:
+            metrics.record_failures(['download_failed'])
+            self.is_final = False
+            return False, 'Unable to download the file'
+        # rules table of the whole validation, a reload while the validator runs
+        # must not mix the cache key, the classification and the accepted versions
+        rules = rules_table.registry.current
+        self.rules_version = rules.version
+        with self.downloaded_file(downloaded_file_path):
+            prescreen_errors = self.run_zip_prescreen(downloaded_file_path) if self.zip_prescreen else None
+            if prescreen_errors:
+                return False, self.result_formatter.format(prescreen_errors)
+            # depends on the request polygon, so it runs before the cached results are looked up
+            stop_area_errors = self.run_stop_area_check(downloaded_file_path) if self.stop_area else None
+            if stop_area_errors:
+                return False, self.result_formatter.format(stop_area_errors)
+            cache_key = None
+            if self.result_cache:
+                cache_key = self.result_cache.key_for(downloaded_file_path, self.cache_variant(), rules)
+            cached_result = self.result_cache.get(cache_key) if cache_key else None
+            if cached_result is not None:
+                logger.info(f' Re-using cached validation result for: {self.file_relative_path}')
+                return cached_result
+            fingerprints = self.member_fingerprints(downloaded_file_path) if self.accepted_versions else None
+            incremental_result = self.run_incremental_validation(downloaded_file_path, fingerprints, rules)
+            if incremental_result is not None:
+                return incremental_result
+            precheck_errors = None
+            if self.pathways_precheck_enabled:
+                precheck_errors = self.run_pathways_precheck(downloaded_file_path)
+            if precheck_errors:
+                return False, self.result_formatter.format(precheck_errors)
+            is_valid, validation_message, is_final = self.run_canonical_validation(downloaded_file_path, rules)
+            self.is_final = is_final
+            if cache_key and is_final:
+                self.result_cache.put(cache_key, is_valid, validation_message)
+            if fingerprints and self.project_group_id and is_final and is_valid:
+                self.accepted_versions.put(self.project_group_id, fingerprints, validation_message, rules)
+            return is_valid, validation_message
+
+    # Cached results depend on the validated scope and on the message format
+    def cache_variant(self) -> str:
+        scope = 'pathways-scope' if self.pathways_scope_enabled else ''
+        report = 'report' if self.report_offload else ''
+        return ':'.join(part for part in (scope, self.result_formatter.variant, report) if part)
+
+    @staticmethod
+    def member_fingerprints(downloaded_file_path: str) -> Optional[dict]:
+        try:
+            return member_fingerprints(downloaded_file_path)
+        except (zipfile.BadZipFile, OSError) as e:
+            logger.error(f' Unable to read the zip members: {e}')
+            return None
+
+    # Compares the upload with the last upload of the same feed accepted by the
+    # canonical validator: the previous result is re-used when no file changed.
+    # When the changes are limited to PATHWAYS_INCREMENTAL_FILES the in-process
+    # pathways rules run first so a broken re-upload is rejected fast, the
+    # pre-check does not cover the schema of these files so passing it still
+    # needs a full validation. Returns None when a full validation is needed.
+    def run_incremental_validation(self, downloaded_file_path: str,
+                                   fingerprints: Optional[dict],
+                                   rules: Optional[rules_table.RulesTable] = None) -> Optional[tuple[bool, str]]:
+        if not fingerprints or not self.project_group_id:
+            return None
+        accepted = self.accepted_versions.get(self.project_group_id, fingerprints, rules)
+        if accepted is None:
+            return None
+        accepted_fingerprints, accepted_message = accepted
+        changed = changed_members(accepted_fingerprints, fingerprints)
+        if not changed:
+            logger.info(f' No file changed since the last accepted upload of: {self.file_relative_path}')
+            metrics.INCREMENTAL_VALIDATIONS.labels(outcome='unchanged').inc()
+            return True, accepted_message
+        if not changed <= set(PATHWAYS_INCREMENTAL_FILES):
+            metrics.INCREMENTAL_VALIDATIONS.labels(outcome='full').inc()
+            return None
+        logger.info(f' Only {sorted(changed)} changed, running the pathways rules on: {self.file_relative_path}')
+        errors = self.run_pathways_precheck(downloaded_file_path)
+        if not errors:
+            metrics.INCREMENTAL_VALIDATIONS.labels(outcome='full').inc()
+            return None
+        metrics.INCREMENTAL_VALIDATIONS.labels(outcome='pathways').inc()
+        return False, self.result_formatter.format(errors)
+
+    @contextmanager
+    def downloaded_file(self, downloaded_file_path: str):
+        try:
+            yield downloaded_file_path
+        finally:
+            GTFSPathwaysValidation.clean_up(os.path.dirname(downloaded_file_path))
+
+    # Screens the zip central directory before anything reads the members
+    def run_zip_prescreen(self, downloaded_file_path: str) -> list:
+        with metrics.PRESCREEN_SECONDS.time():
+            errors = self.zip_prescreen.screen(downloaded_file_path)
+        if errors:
+            logger.error(f' Zip pre-screen failed with: {[error["code"] for error in errors]}')
+            metrics.record_failures(error['code'] for error in errors)
+        return errors
+
+    # Fast in-process check of the fatal pathways rules, returns the errors found
+    # or None when the file could not be checked
+    def run_pathways_precheck(self, downloaded_file_path: str) -> Optional[list]:
+        try:
+            with metrics.PRECHECK_SECONDS.time():
+                errors = PathwaysPrecheck(zip_file=downloaded_file_path).validate()
+        except Exception as e:
+            logger.error(f' Pathways pre-check failed, falling back to the canonical validator: {e}')
+            return None
+        if errors:
+            logger.error(f' Pathways pre-check failed with: {[error["code"] for error in errors]}')
+            metrics.record_failures(error['code'] for error in errors)
+        return errors
+
+    # Checks that the stops lie inside the request polygon, returns the errors
+    # found or None when stops.txt could not be read
+    def run_stop_area_check(self, downloaded_file_path: str) -> Optional[list]:
+        try:
+            with metrics.STOP_AREA_SECONDS.time():
+                errors = self.stop_area.validate(downloaded_file_path)
+        except Exception as e:
+            logger.error(f' Stop area check failed, skipping it: {e}')
+            return None
+        if errors:
+            logger.error(f' {errors[0]["totalNotices"]} stops outside the request polygon')
+            metrics.record_failures(error['code'] for error in errors)
+        return errors
+
+    # Builds the reduced pathways scope feed next to the downloaded file, the
+    # full feed is validated when the reduced one cannot be built
+    def build_scope_file(self, downloaded_file_path: str,
+                         rules: Optional[rules_table.RulesTable] = None) -> Optional[str]:
+        rules = rules or rules_table.registry.current
+        folder, filename = os.path.split(downloaded_file_path)
+        scope_file_path = os.path.join(folder, f'pathways-scope-{filename}')
+        try:
+            with metrics.SCOPE_SECONDS.time():
+                build_pathways_subset(zip_file=downloaded_file_path, destination=scope_file_path,
+                                      pathways_fields=rules.rules['pathways_fields'])
+        except Exception as e:
+            logger.error(f' Unable to build the pathways scope feed, validating the full feed: {e}')
+            return None
+        return scope_file_path
+
+    # Runs the canonical validator on the downloaded file and applies the pathways rules
+    # on the reported notices. `is_final` is False when the validator could not produce
+    # a report (e.g. upload failure), such results must not be cached. `rules` defaults
+    # to the current rules table.
+    def run_canonical_validation(self, downloaded_file_path: str,
+                                 rules: Optional[rules_table.RulesTable] = None) -> tuple[bool, str, bool]:
+        rules = rules or rules_table.registry.current
+        validation_message = ''
+        scope_file_path = self.build_scope_file(downloaded_file_path, rules) if self.pathways_scope_enabled else None
+        with metrics.VALIDATION_SECONDS.time():
+            if self.warm_validator:
+                result = self.warm_validator.validate(scope_file_path or downloaded_file_path)
+            else:
+                result = CanonicalValidator(zip_file=scope_file_path or downloaded_file_path).validate()
+        is_final = result.error is None or isinstance(result.error, list)
+
+        if scope_file_path and isinstance(result.error, list):
+            result.error, artifacts = split_scope_artifacts(result.error)
+            if artifacts:
+                logger.info(f' Ignoring pathways scope artifacts: {[error["code"] for error in artifacts]}')
+
+        is_valid = result.status
+        if result.error is not None:
+            validation_message = str(result.error)
+            logger.error(f' Error While Validating File: {str(result.error)}')
+
+        if isinstance(result.error, list):
+            with metrics.CLASSIFICATION_SECONDS.time():
+                classification = rules.classifier.classify(result.error)
+            if classification.warnings:
+                if result.info is None:
+                    result.info = []
+                result.info.extend(classification.warnings)
+            result.error = classification.errors
+
+            if classification.has_pathways_error:
+                is_valid = False
+
+            # if all errors have been downgraded to warnings, mark us as a success
+            if len(result.error) == 0:
+                is_valid = True
+
+            report_url = None
+            if self.report_offload and self.report_offload.should_offload(result.error):
+                with metrics.REPORT_OFFLOAD_SECONDS.time():
+                    report_url = self.report_offload.offload(result.error, self.file_path,
+                                                             os.path.dirname(downloaded_file_path),
+                                                             warnings=classification.warnings)
+            validation_message = self.result_formatter.format(result.error, report_url)
+            logger.error(f' Error While Validating File: {str(result.error)}')
+
+        if not is_final:
+            metrics.record_failures(['validator_error'])
+        elif not is_valid:
+            metrics.record_failures(error['code'] for error in result.error or [])
+        return is_valid, validation_message, is_final
+
     # Downloads the file to local folder of the server
     # file_upload_path is the fullUrl of where the
     # file is uploaded.
     def download_single_file(self, file_upload_path=None) -> str:
-        unique_folder = self.settings.get_unique_id()
-        dl_folder_path = os.path.join(DOWNLOAD_FILE_PATH, unique_folder)
-
-        if not os.path.exists(dl_folder_path):
-            os.makedirs(dl_folder_path)
-
         try:
             file = self.storage_client.get_file_from_url(self.container_name, file_upload_path)
             if file.file_path:
-                file_path = os.path.basename(file.file_path)
-                with open(f'{dl_folder_path}/{file_path}', 'wb') as blob:
-                    blob.write(file.get_stream())
-                logger.info(f' File downloaded to location: {dl_folder_path}/{file_path}')
-                return f'{dl_folder_path}/{file_path}'
+                root = self.download_root
+                if root != DOWNLOAD_FILE_PATH and not has_free_space(root, blob_size(file)):
+                    logger.warning(f' Not enough space in {root}, downloading to {DOWNLOAD_FILE_PATH}')
+                    root = DOWNLOAD_FILE_PATH
+                try:
+                    return self.download_to(file, root)
+                except OSError as e:
+                    if e.errno != errno.ENOSPC or root == DOWNLOAD_FILE_PATH:
+                        raise
+                    # the tmpfs filled up while downloading, retry on disk
+                    logger.warning(f' {root} is full, downloading to {DOWNLOAD_FILE_PATH}')
+                    return self.download_to(file, DOWNLOAD_FILE_PATH)
             else:
                 logger.info(' File not found!')
         except Exception as e:
             traceback.print_exc()
             logger.error(e)
 
+    # Streams the file into a unique folder under `root`, the folder is
+    # removed when the download fails so nothing is left behind
+    def download_to(self, file, root: str) -> str:
+        dl_folder_path = os.path.join(root, self.settings.get_unique_id())
+        if not os.path.exists(dl_folder_path):
+            os.makedirs(dl_folder_path)
+        file_path = os.path.join(dl_folder_path, os.path.basename(file.file_path))
+        try:
+            with metrics.DOWNLOAD_SECONDS.time():
+                self.download_stats = stream_to_file(file, file_path,
+                                                     chunk_size=self.settings.download_chunk_size,
+                                                     fsync=self.settings.download_fsync)
+        except BaseException:
+            shutil.rmtree(dl_folder_path, ignore_errors=True)
+            raise
+        metrics.DOWNLOAD_BYTES.observe(self.download_stats.bytes_written)
+        logger.info(f' File downloaded to location: {file_path}')
+        logger.info(f' Downloaded {self.download_stats.bytes_written} bytes in '
+                    f'{self.download_stats.chunks} chunks, RSS high-water mark: '
+                    f'{self.download_stats.rss_high_water_mark_bytes} bytes')
+        return file_path
+
     @staticmethod
     def clean_up(path):
         if os.path.isfile(path):
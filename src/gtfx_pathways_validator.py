@@ -1,18 +1,93 @@
+import os
 import logging
 import urllib.parse
 from python_ms_core import Core
 from python_ms_core.core.queue.models.queue_message import QueueMessage
 from .config import Settings
-from .gtfs_pathways_validation import GTFSPathwaysValidation
+from .gtfs_pathways_validation import GTFSPathwaysValidation, download_root
+from .download_janitor import DownloadJanitor
+from .result_cache import ResultCache
+from .incremental_validation import AcceptedVersions
+from .result_publisher import ResultPublisher
+from .validation_executor import create_executor
+from .async_pipeline import AsyncPipeline
+from .prefetch import PrefetchBudget
+from .upload_scheduler import UploadScheduler
+from .blob_download import blob_size
+from .warm_validator import WarmValidator
+from .polygon import CompactPolygon
+from . import rules_table
 from gtfs_canonical_validator import CanonicalValidator
 from .models.file_upload_msg import FileUploadMsg
+from . import metrics
 import threading
+import contextlib
+from typing import Optional
+from dataclasses import dataclass
 
 logging.basicConfig()
 logger = logging.getLogger('PATHWAYS_VALIDATOR')
 logger.setLevel(logging.INFO)
 
 
+# Resources a validation job needs, shared with the subscriber for the
+# inline/thread executors and rebuilt inside each worker process
+@dataclass
+class WorkerContext:
+    storage_client: object
+    result_cache: ResultCache = None
+    accepted_versions: AcceptedVersions = None
+    warm_validator: WarmValidator = None
+
+    def validation(self, file_upload_path: str, project_group_id: Optional[str] = None,
+                   polygon_area: Optional[CompactPolygon] = None) -> GTFSPathwaysValidation:
+        return GTFSPathwaysValidation(file_path=file_upload_path, storage_client=self.storage_client,
+                                      result_cache=self.result_cache, accepted_versions=self.accepted_versions,
+                                      project_group_id=project_group_id, warm_validator=self.warm_validator,
+                                      polygon_area=polygon_area)
+
+
+# Warm validator started with the process, it stays resident for the jobs of the process
+def start_warm_validator(settings) -> Optional[WarmValidator]:
+    warm_validator = WarmValidator.from_settings(settings)
+    if warm_validator:
+        warm_validator.start()
+    return warm_validator
+
+
+def build_worker_context() -> WorkerContext:
+    settings = Settings()
+    rules_table.registry.start()
+    return WorkerContext(storage_client=Core().get_storage_client(), result_cache=ResultCache.from_settings(settings),
+                         accepted_versions=AcceptedVersions.from_settings(settings),
+                         warm_validator=start_warm_validator(settings))
+
+
+# The validation jobs return (is_valid, validation message, version of the
+# rules the result was classified with), the version is published with the result
+def validate_file(context: WorkerContext, file_upload_path: str, project_group_id: Optional[str] = None,
+                  polygon_area: Optional[CompactPolygon] = None) -> tuple[bool, str, Optional[str]]:
+    validation = context.validation(file_upload_path, project_group_id, polygon_area)
+    return (*validation.validate(), validation.rules_version)
+
+
+# Download and validation steps of `validate_file`, run as separate stages by the asyncio pipeline
+def download_file(context: WorkerContext, file_upload_path: str) -> Optional[str]:
+    validator = context.validation(file_upload_path)
+    if not validator.has_zip_extension():
+        return None
+    return validator.download_single_file(file_upload_path)
+
+
+def validate_downloaded_file(context: WorkerContext, file_upload_path: str, downloaded_file_path: Optional[str],
+                             project_group_id: Optional[str] = None,
+                             polygon_area: Optional[CompactPolygon] = None) -> tuple[bool, str, Optional[str]]:
+    validator = context.validation(file_upload_path, project_group_id, polygon_area)
+    if not validator.has_zip_extension():
+        return (*validator.validate(), validator.rules_version)
+    return (*validator.validate_downloaded_file(downloaded_file_path), validator.rules_version)
+
+
 class GTFSPathwaysValidator:
     _settings = Settings()
 
@@ -20,9 +95,49 @@ class GTFSPathwaysValidator:
         self.core = Core()
         self.settings = Settings()
         self._subscription_name = self.settings.request_subscription
-        self.request_topic = self.core.get_topic(topic_name=self.settings.request_topic_name,max_concurrent_messages=self.settings.max_concurrent_messages)
+        # prefetched messages and the messages waiting for a scheduler lane
+        # are received on top of the ones being validated
+        concurrent_messages = int(self.settings.max_concurrent_messages)
+        prefetch_max_files = int(self.settings.prefetch_max_files)
+        self.scheduler = UploadScheduler.from_settings(self.settings)
+        scheduled_messages = 0
+        if self.scheduler:
+            scheduled_messages = int(self.settings.scheduler_large_slots) + \
+                                 (int(self.settings.scheduler_queue_size) or concurrent_messages)
+        self.request_topic = self.core.get_topic(topic_name=self.settings.request_topic_name,max_concurrent_messages=concurrent_messages + prefetch_max_files + scheduled_messages)
         self.logger = self.core.get_logger()
         self.storage_client = self.core.get_storage_client()
+        self.result_cache = ResultCache.from_settings(self.settings)
+        rules_table.registry.start()
+        self.janitor = DownloadJanitor.from_settings(self.settings, root=download_root(self.settings))
+        if self.janitor:
+            self.janitor.start()
+        self.response_publisher = ResultPublisher.from_settings(
+            self.settings, topic_factory=lambda: self.core.get_topic(topic_name=self.settings.response_topic_name))
+        # worker processes start their own warm validator
+        self.warm_validator = None
+        if self.settings.validation_executor != 'process':
+            self.warm_validator = start_warm_validator(self.settings)
+        self.context = WorkerContext(self.storage_client, self.result_cache,
+                                     AcceptedVersions.from_settings(self.settings), self.warm_validator)
+        self.executor = create_executor(self.settings, context=self.context, context_factory=build_worker_context)
+        self.pipeline = None
+        self.prefetch_budget = None
+        self.validation_slots = None
+        if prefetch_max_files > 0 and self.settings.pipeline_mode != 'asyncio':
+            self.prefetch_budget = PrefetchBudget(max_files=prefetch_max_files,
+                                                  max_bytes=int(self.settings.prefetch_max_bytes))
+            self.validation_slots = threading.BoundedSemaphore(concurrent_messages)
+        if self.settings.pipeline_mode == 'asyncio':
+            self.pipeline = AsyncPipeline.from_settings(
+                self.settings,
+                download=lambda file_upload_path: download_file(self.context, file_upload_path),
+                validate=lambda upload_msg, file_upload_path, downloaded_file_path: self.executor.run(
+                    validate_downloaded_file, file_upload_path, downloaded_file_path,
+                    upload_msg.data.tdei_project_group_id, upload_msg.data.polygon_area),
+                publish=lambda upload_msg, valid, validation_message, rules_version=None: (
+                    self.response_publisher.publish(
+                        data=self.status_message(valid, upload_msg, validation_message, rules_version))))
         self.listening_thread = threading.Thread(target=self.subscribe)
         self.listening_thread.start()
 
@@ -40,25 +155,91 @@ class GTFSPathwaysValidator:
         self.request_topic.subscribe(subscription=self._subscription_name, callback=process)
 
     def process_message(self, upload_msg: FileUploadMsg) -> None:
+        metrics.observe_queue_lag(upload_msg.publishedDate)
+        with metrics.MESSAGES_IN_FLIGHT.track_inprogress(), metrics.MESSAGE_SECONDS.time():
+            try:
+                file_upload_path = urllib.parse.unquote(upload_msg.data.file_upload_path)
+                logger.info(f' Received message for Project Group: {upload_msg.data.tdei_project_group_id}')
+                logger.info(f' Message ID: {upload_msg.messageId}')
+                logger.info(file_upload_path)
+                if file_upload_path:
+                    with self.upload_slot(upload_msg, file_upload_path):
+                        self.validate_and_send(upload_msg, file_upload_path)
+                else:
+                    logger.info(' No file Path found in message!')
+                    metrics.record_failures(['missing_file_path'])
+                    self.send_status(valid=False, upload_message=upload_msg, validation_message='No file Path found in message!')
+            except Exception as e:
+                    logger.error(f' Error: {e}')
+                    metrics.record_failures(['exception'])
+                    self.send_status(valid=False, upload_message=upload_msg, validation_message=str(e))
+
+    def validate_and_send(self, upload_msg: FileUploadMsg, file_upload_path: str) -> None:
+        if self.pipeline is not None:
+            # download, validation and publishing run as stages of the pipeline
+            self.pipeline.process(upload_msg, file_upload_path)
+            return
+        if self.prefetch_budget is not None:
+            validation = self.prefetch_and_validate(file_upload_path, upload_msg.data.tdei_project_group_id,
+                                                    upload_msg.data.polygon_area)
+        else:
+            # Do the validation in the other class
+            validation = self.executor.run(validate_file, file_upload_path, upload_msg.data.tdei_project_group_id,
+                                           upload_msg.data.polygon_area)
+        self.send_status(valid=validation[0], upload_message=upload_msg, validation_message=validation[1],
+                         rules_version=validation[2])
+
+    # Slot of the upload in the scheduler lane matching its size
+    def upload_slot(self, upload_msg: FileUploadMsg, file_upload_path: str):
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        size = self.peek_size(file_upload_path)
+        return self.scheduler.slot(size, upload_msg.data.tdei_project_group_id)
+
+    # Size from the properties of the blob addressed directly by its path in
+    # the container (the path after the container in the upload URL), without
+    # listing the container as `get_file_from_url` does
+    def peek_size(self, file_upload_path: str) -> Optional[int]:
         try:
-            file_upload_path = urllib.parse.unquote(upload_msg.data.file_upload_path)
-            logger.info(f' Received message for Project Group: {upload_msg.data.tdei_project_group_id}')
-            logger.info(f' Message ID: {upload_msg.messageId}')
-            logger.info(file_upload_path)
-            if file_upload_path:
-                # Do the validation in the other class
-                validator = GTFSPathwaysValidation(file_path=file_upload_path, storage_client=self.storage_client)
-                validation = validator.validate()
-                self.send_status(valid=validation[0], upload_message=upload_msg,
-                                    validation_message=validation[1])
-            else:
-                logger.info(' No file Path found in message!')
-                self.send_status(valid=False, upload_message=upload_msg, validation_message='No file Path found in message!')
+            path = '/'.join(file_upload_path.split('/')[4:])
+            file = self.storage_client.get_file(self.settings.storage_container_name, path)
+            return blob_size(file)
         except Exception as e:
-                logger.error(f' Error: {e}')
-                self.send_status(valid=False, upload_message=upload_msg, validation_message=str(e))
+            logger.error(f' Unable to read the size of {file_upload_path}: {e}')
+            return None
 
-    def send_status(self, valid: bool, upload_message: FileUploadMsg, validation_message: str = '') -> None:
+    # Downloads the feed as soon as the prefetch budget allows, then waits for
+    # one of the MAX_CONCURRENT_MESSAGES validation slots, so the next feeds are
+    # downloaded while the current ones are validated
+    def prefetch_and_validate(self, file_upload_path: str, project_group_id: Optional[str] = None,
+                              polygon_area: Optional[CompactPolygon] = None) -> tuple[bool, str, Optional[str]]:
+        self.prefetch_budget.acquire()
+        size = 0
+        try:
+            downloaded_file_path = download_file(self.context, file_upload_path)
+            if downloaded_file_path and os.path.isfile(downloaded_file_path):
+                size = os.path.getsize(downloaded_file_path)
+            self.prefetch_budget.add_bytes(size)
+            self.validation_slots.acquire()
+        finally:
+            self.prefetch_budget.release(size)
+        try:
+            return self.executor.run(validate_downloaded_file, file_upload_path, downloaded_file_path,
+                                     project_group_id, polygon_area)
+        finally:
+            self.validation_slots.release()
+
+    def send_status(self, valid: bool, upload_message: FileUploadMsg, validation_message: str = '',
+                    rules_version: Optional[str] = None) -> None:
+        data = self.status_message(valid, upload_message, validation_message, rules_version)
+        # wait for the result to be sent so the request is only settled once published
+        self.response_publisher.publish(data=data).result()
+        return
+
+    # `rules_version` is the version of the rules the result was classified
+    # with, the active rules for results no rules were applied to
+    def status_message(self, valid: bool, upload_message: FileUploadMsg, validation_message: str = '',
+                       rules_version: Optional[str] = None) -> QueueMessage:
         response_message = {
                 'file_upload_path': upload_message.data.file_upload_path,
                 'user_id': upload_message.data.user_id ,
@@ -67,21 +248,28 @@ class GTFSPathwaysValidator:
                 'message': validation_message,
                 'package': {
                     'python-ms-core': Core.__version__,
-                    'gtfs-canonical-validator': CanonicalValidator.__version__
+                    'gtfs-canonical-validator': CanonicalValidator.__version__,
+                    'pathways-rules': rules_version or rules_table.registry.current.version
                 }
             }
         logger.info(
             f' Publishing new message with ID: {upload_message.messageId} with status: {valid} and Message: {validation_message}')
-        data = QueueMessage.data_from({
+        return QueueMessage.data_from({
             'messageId': upload_message.messageId,
             'message':  'Validation complete',
             'messageType': upload_message.messageType,
             'data': response_message
         })
-        response_topic = self.core.get_topic(topic_name=self.settings.response_topic_name)
-        response_topic.publish(data=data)
-        return
 
     def stop_listening(self):
         self.listening_thread.join(timeout=0)
+        if self.pipeline is not None:
+            self.pipeline.close()
+        self.executor.shutdown()
+        self.response_publisher.close()
+        if self.janitor:
+            self.janitor.stop()
+        if self.warm_validator:
+            self.warm_validator.stop()
+        rules_table.registry.stop()
         return
\ No newline at end of file
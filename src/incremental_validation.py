@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import zipfile
+import threading
+from typing import Optional
+from gtfs_canonical_validator import CanonicalValidator
+from .result_cache import rules_fingerprint
+from .rules_table import RulesTable
+
+logging.basicConfig()
+logger = logging.getLogger('INCREMENTAL_VALIDATION')
+logger.setLevel(logging.INFO)
+
+# The feed of a station is identified by its stops.txt, the other files
+# of a re-upload are compared with the last accepted upload of that feed
+ANCHOR_FILE = 'stops.txt'
+
+
+# CRC-32 of each file of the zip, read from the central directory
+def member_fingerprints(zip_file: str) -> dict:
+    with zipfile.ZipFile(zip_file) as archive:
+        return {member.filename.rsplit('/', 1)[-1]: member.CRC for member in archive.infolist()
+                if not member.is_dir() and not member.filename.startswith('__MACOSX')}
+
+
+def changed_members(previous: dict, current: dict) -> set:
+    return {filename for filename in previous.keys() | current.keys()
+            if previous.get(filename) != current.get(filename)}
+
+
+# Local SQLite store of the last upload accepted by the canonical validator
+# for each project group and feed (see ANCHOR_FILE), with the fingerprints of
+# its files. Entries recorded with another validator version or other
+# pathways rules are ignored.
+class AcceptedVersions:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional['AcceptedVersions']:
+        if not settings.incremental_validation_enabled:
+            return None
+        return cls(path=settings.incremental_validation_path)
+
+    # Connection is opened lazily and re-opened after a fork, as in ResultCache
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS accepted ('
+                'project_group TEXT NOT NULL, anchor TEXT NOT NULL, rules TEXT NOT NULL, members TEXT NOT NULL, '
+                'message TEXT NOT NULL, accepted_at REAL NOT NULL, PRIMARY KEY (project_group, anchor))')
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def rules_version(rules: Optional[RulesTable] = None) -> str:
+        return f'{CanonicalValidator.__version__}:{rules_fingerprint(rules)}'
+
+    def get(self, project_group: str, fingerprints: dict,
+            rules: Optional[RulesTable] = None) -> Optional[tuple[dict, str]]:
+        anchor = fingerprints.get(ANCHOR_FILE)
+        if anchor is None:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT members, message FROM accepted WHERE project_group = ? AND anchor = ? AND rules = ?',
+                (project_group, str(anchor), self.rules_version(rules))).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, project_group: str, fingerprints: dict, message: str,
+            rules: Optional[RulesTable] = None) -> None:
+        anchor = fingerprints.get(ANCHOR_FILE)
+        if anchor is None:
+            return
+        with self._lock:
+            self._connect().execute('INSERT OR REPLACE INTO accepted VALUES (?, ?, ?, ?, ?, ?)',
+                                    (project_group, str(anchor), self.rules_version(rules), json.dumps(fingerprints),
+                                     message, time.time()))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
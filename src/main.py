@@ -1,10 +1,11 @@
 import os
 import psutil
 import datetime
-from fastapi import FastAPI, APIRouter, Depends, status
+from fastapi import FastAPI, APIRouter, Depends, status, Response
 from functools import lru_cache
 from .config import Settings
 from .gtfx_pathways_validator import GTFSPathwaysValidator
+from .metrics import latest_metrics
 
 app = FastAPI()
 app.pathways_validator = None
@@ -56,4 +57,10 @@ def ping():
 
 
 
+@app.get('/metrics', status_code=status.HTTP_200_OK)
+def metrics():
+    content, content_type = latest_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 app.include_router(prefix_router)
@@ -0,0 +1,77 @@
+import os
+from datetime import datetime, timezone
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+
+# Buckets in seconds, from small station level uploads up to large regional feeds
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = tuple(2 ** exponent * 1024 for exponent in range(4, 21, 2))
+
+DOWNLOAD_SECONDS = Histogram('pathways_download_seconds', 'Time spent downloading the uploaded file',
+                             buckets=LATENCY_BUCKETS)
+DOWNLOAD_BYTES = Histogram('pathways_download_bytes', 'Size of the downloaded files', buckets=SIZE_BUCKETS)
+PRESCREEN_SECONDS = Histogram('pathways_prescreen_seconds', 'Time spent screening the zip central directory',
+                              buckets=LATENCY_BUCKETS)
+PRECHECK_SECONDS = Histogram('pathways_precheck_seconds', 'Time spent in the in-process pathways pre-check',
+                             buckets=LATENCY_BUCKETS)
+STOP_AREA_SECONDS = Histogram('pathways_stop_area_seconds',
+                              'Time spent checking that the stops lie inside the request polygon',
+                              buckets=LATENCY_BUCKETS)
+SCOPE_SECONDS = Histogram('pathways_scope_seconds', 'Time spent building the reduced pathways scope feed',
+                          buckets=LATENCY_BUCKETS)
+VALIDATION_SECONDS = Histogram('pathways_validation_seconds', 'Time spent in the canonical validator',
+                               buckets=LATENCY_BUCKETS)
+CLASSIFICATION_SECONDS = Histogram('pathways_classification_seconds',
+                                   'Time spent applying the pathways rules on the validator notices',
+                                   buckets=LATENCY_BUCKETS)
+REPORT_OFFLOAD_SECONDS = Histogram('pathways_report_offload_seconds',
+                                   'Time spent writing and uploading the full validation report',
+                                   buckets=LATENCY_BUCKETS)
+PUBLISH_SECONDS = Histogram('pathways_publish_seconds', 'Time spent publishing the validation result',
+                            buckets=LATENCY_BUCKETS)
+MESSAGE_SECONDS = Histogram('pathways_message_seconds', 'Total time spent processing a message',
+                            buckets=LATENCY_BUCKETS)
+QUEUE_LAG_SECONDS = Histogram('pathways_queue_lag_seconds',
+                              'Time between the publishing of a message and the start of its processing',
+                              buckets=LATENCY_BUCKETS)
+MESSAGES_IN_FLIGHT = Gauge('pathways_messages_in_flight', 'Messages currently being processed',
+                           multiprocess_mode='livesum')
+PREFETCHED_BYTES = Gauge('pathways_prefetched_bytes', 'Bytes on disk of the feeds downloaded ahead of validation',
+                         multiprocess_mode='livesum')
+PREFETCH_WAIT_SECONDS = Histogram('pathways_prefetch_wait_seconds',
+                                  'Time a message waited for the prefetch budget before downloading',
+                                  buckets=LATENCY_BUCKETS)
+SCHEDULER_WAIT_SECONDS = Histogram('pathways_scheduler_wait_seconds', 'Time an upload waited for a slot in its lane',
+                                   ['lane'], buckets=LATENCY_BUCKETS)
+INCREMENTAL_VALIDATIONS = Counter('pathways_incremental_validations_total',
+                                  'Re-uploads of an accepted feed by how they were validated', ['outcome'])
+FAILURES = Counter('pathways_validation_failures_total', 'Failed validations by error code', ['code'])
+
+
+def record_failures(codes) -> None:
+    for code in set(codes):
+        FAILURES.labels(code=code).inc()
+
+
+def observe_queue_lag(published_date: Optional[str]) -> None:
+    if not published_date:
+        return
+    try:
+        published_at = datetime.fromisoformat(published_date.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    lag = (datetime.now(timezone.utc) - published_at).total_seconds()
+    QUEUE_LAG_SECONDS.observe(max(lag, 0))
+
+
+# Metrics of all the processes when the process executor runs with
+# PROMETHEUS_MULTIPROC_DIR set, otherwise the metrics of this process
+def latest_metrics() -> tuple[bytes, str]:
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
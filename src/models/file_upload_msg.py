@@ -1,28 +1,38 @@
 # class to hold the file upload message
 from dataclasses import dataclass
 from typing import Optional, Dict
+from ..serializer.gtfs_pathways_serializer import Request
 
-@dataclass
+@dataclass(slots=True)
 class IncomingData:
     file_upload_path:str
     user_id:str 
     tdei_project_group_id: Optional[str] = ""
+    # upload request forwarded with the message, holds the polygon of the upload
+    request: Optional[Request] = None
 
-@dataclass
+    @property
+    def polygon_area(self):
+        return self.request.polygon_area if self.request else None
+
+@dataclass(slots=True)
 class FileUploadMsg: 
     messageId:str 
     messageType: str
     data: IncomingData
-    
+    publishedDate: Optional[str] = None
+
     @classmethod
     def from_dict(cls, data:Dict):
         incoming_data = data.get('data')
         if incoming_data:
-            theData = IncomingData(**incoming_data)
+            request = incoming_data.get('request')
+            theData = IncomingData(**{**incoming_data, 'request': Request(data=request) if request else None})
         else:
             theData = None
         return cls(
             messageId = data.get('messageId'),
             messageType = data.get('messageType'),
-            data = theData
+            data = theData,
+            publishedDate = data.get('publishedDate')
         )
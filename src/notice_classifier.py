@@ -0,0 +1,69 @@
+from dataclasses import dataclass, field
+from . import pathways_config
+
+
+@dataclass
+class Classification:
+    # errors that are still reported as errors
+    errors: list = field(default_factory=list)
+    # errors downgraded to warnings
+    warnings: list = field(default_factory=list)
+    # at least one remaining error relates to pathways
+    has_pathways_error: bool = False
+
+
+# Applies the pathways rules to the notices reported by the canonical validator.
+# The rule lists are compiled once into hashed lookups and the notices are
+# partitioned in a single pass, so the cost is linear in the size of the report.
+class NoticeClassifier:
+    def __init__(self, change_error_to_warning, fatal_error_codes, pathways_fields, pathways_files):
+        self.warning_codes = frozenset(change_error_to_warning)
+        self.fatal_codes = frozenset(fatal_error_codes)
+        self.pathways_fields = {filename: frozenset(fields) for filename, fields in pathways_fields.items()}
+        self.pathways_files = frozenset(pathways_files)
+
+    @classmethod
+    def from_config(cls) -> 'NoticeClassifier':
+        return cls(change_error_to_warning=pathways_config.CHANGE_ERROR_TO_WARNING,
+                   fatal_error_codes=pathways_config.PATHWAYS_FATAL_ERROR_CODES,
+                   pathways_fields=pathways_config.PATHWAYS_FIELDS,
+                   pathways_files=pathways_config.PATHWAYS_FILES)
+
+    # some of the notices relate to pathways, but there's no way to tell except with this logic
+    def is_pathways_notice(self, notice: dict) -> bool:
+        filename = notice.get('filename')
+        if filename is not None:
+            # one of the pathways spec'd files has an error
+            if filename in self.pathways_files:
+                return True
+            # one of the fields in a given file is a pathway-spec field
+            fields = self.pathways_fields.get(filename)
+            if fields is not None and notice.get('fieldName') in fields:
+                return True
+        # similar to the above, but the field for the filename is parent/child
+        return notice.get('childFilename') in self.pathways_files
+
+    def classify(self, errors: list) -> Classification:
+        classification = Classification()
+        keep = classification.errors.append
+        downgrade = classification.warnings.append
+        has_pathways_error = False
+        for error in errors:
+            code = error['code']
+            # change some smaller errors to warnings instead to relax the strict validation MD gives us
+            if code in self.warning_codes:
+                downgrade(error)
+                continue
+            keep(error)
+            if has_pathways_error:
+                continue
+            # these are error codes from MD that relate to pathways that are fatal
+            if code in self.fatal_codes:
+                has_pathways_error = True
+                continue
+            for notice in error.get('sampleNotices', ()):
+                if self.is_pathways_notice(notice):
+                    has_pathways_error = True
+                    break
+        classification.has_pathways_error = has_pathways_error
+        return classification
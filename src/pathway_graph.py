@@ -0,0 +1,232 @@
+from array import array
+from collections import deque
+
+# GTFS location types
+STOP_OR_PLATFORM = 0
+STATION = 1
+ENTRANCE_EXIT = 2
+GENERIC_NODE = 3
+BOARDING_AREA = 4
+
+NO_INDEX = -1
+
+
+# Compressed adjacency: the targets of node i are targets[offsets[i]:offsets[i + 1]]
+def _adjacency(count: int, sources: array, targets: array) -> tuple[array, array]:
+    offsets = array('l', [0]) * (count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for index in range(count):
+        offsets[index + 1] += offsets[index]
+    positions = offsets[:-1]
+    ordered = array('l', [0]) * len(sources)
+    for source, target in zip(sources, targets):
+        ordered[positions[source]] = target
+        positions[source] += 1
+    return offsets, ordered
+
+
+# Nodes reachable from `sources` (breadth first), as a byte per node
+def _reachable(count: int, sources, offsets: array, targets: array) -> bytearray:
+    visited = bytearray(count)
+    pending = deque(sources)
+    for source in pending:
+        visited[source] = 1
+    while pending:
+        node = pending.popleft()
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            if not visited[target]:
+                visited[target] = 1
+                pending.append(target)
+    return visited
+
+
+# Strongly connected component of each node, Tarjan's algorithm without
+# recursion so deep stations cannot exceed the interpreter stack
+def _strong_components(count: int, offsets: array, targets: array) -> array:
+    component = array('l', [NO_INDEX]) * count
+    order = array('l', [NO_INDEX]) * count
+    low = array('l', [0]) * count
+    on_stack = bytearray(count)
+    stack = []
+    counter = components = 0
+    for root in range(count):
+        if order[root] != NO_INDEX:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            node, edge = work[-1]
+            if edge < offsets[node + 1]:
+                work[-1] = (node, edge + 1)
+                target = targets[edge]
+                if order[target] == NO_INDEX:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, offsets[target]))
+                elif on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+                continue
+            work.pop()
+            if work and low[node] < low[work[-1][0]]:
+                low[work[-1][0]] = low[node]
+            if low[node] == order[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return component
+
+
+# Pathways of a feed as an integer indexed graph: the locations of stops.txt
+# are numbered in file order and the pathways between known locations become
+# directed edges (both ways for bidirectional pathways) held in compressed
+# adjacency arrays. All the checks run in O(V + E). Unreachable locations are
+# errors of the canonical validator, loops and dangling generic nodes are only
+# warnings there and are summarized in the station diagnostics.
+class PathwayGraph:
+
+    def __init__(self, stop_ids: list, location_types: array, parents: array, sources: array, targets: array,
+                 loops: list, loop_nodes: array):
+        self.stop_ids = stop_ids
+        self.location_types = location_types
+        # index of the parent station of each location, NO_INDEX without parent
+        self.parents = parents
+        # positions in pathways.txt of the pathways from a location to itself,
+        # and the location of each of them (NO_INDEX for an unknown stop)
+        self.loops = loops
+        self.loop_nodes = loop_nodes
+        count = len(stop_ids)
+        self.successor_offsets, self.successors = _adjacency(count, sources, targets)
+        self.predecessor_offsets, self.predecessors = _adjacency(count, targets, sources)
+        # undirected view, for the degree of the nodes
+        self.neighbour_offsets, self.neighbours = _adjacency(count, sources + targets, targets + sources)
+        self.stations = array('l', (self._station_of(index) for index in range(count)))
+        self._components = None
+
+    # `locations` maps the stop ids to objects with location_type and
+    # parent_station, `pathways` are objects with from_stop_id, to_stop_id and
+    # is_bidirectional, such as the Location and Pathway of pathways_precheck
+    @classmethod
+    def build(cls, locations: dict, pathways: list) -> 'PathwayGraph':
+        index = {stop_id: position for position, stop_id in enumerate(locations)}
+        location_types = array('l', (location.location_type for location in locations.values()))
+        parents = array('l', (index.get(location.parent_station, NO_INDEX) for location in locations.values()))
+        sources, targets, loops, loop_nodes = array('l'), array('l'), [], array('l')
+        for position, pathway in enumerate(pathways):
+            if pathway.from_stop_id == pathway.to_stop_id:
+                loops.append(position)
+                loop_nodes.append(index.get(pathway.from_stop_id, NO_INDEX))
+                continue
+            source, target = index.get(pathway.from_stop_id), index.get(pathway.to_stop_id)
+            if source is None or target is None:
+                continue
+            sources.append(source)
+            targets.append(target)
+            if pathway.is_bidirectional:
+                sources.append(target)
+                targets.append(source)
+        return cls(list(locations), location_types, parents, sources, targets, loops, loop_nodes)
+
+    def __len__(self) -> int:
+        return len(self.stop_ids)
+
+    # boarding areas are children of platforms, so at most two hops are needed
+    def _station_of(self, node: int) -> int:
+        for _ in range(3):
+            if self.location_types[node] == STATION:
+                return node
+            node = self.parents[node]
+            if node == NO_INDEX:
+                return NO_INDEX
+        return NO_INDEX
+
+    def degree(self, node: int) -> int:
+        return len(set(self.neighbours[self.neighbour_offsets[node]:self.neighbour_offsets[node + 1]]))
+
+    def has_pathways(self, node: int) -> bool:
+        return self.neighbour_offsets[node + 1] > self.neighbour_offsets[node]
+
+    # Generic nodes connected to a single other location
+    def dangling_generic_nodes(self) -> list:
+        return [node for node in range(len(self)) if self.location_types[node] == GENERIC_NODE
+                and self.has_pathways(node) and self.degree(node) == 1]
+
+    # (node, has entrance, has exit) of the locations of stations with pathways
+    # that cannot be reached from an entrance or cannot reach one. Stations and
+    # platforms with boarding areas are not checked, as in the canonical validator.
+    def unreachable_locations(self) -> list:
+        count = len(self)
+        entrances = [node for node in range(count) if self.location_types[node] == ENTRANCE_EXIT]
+        from_entrances = _reachable(count, entrances, self.successor_offsets, self.successors)
+        to_exits = _reachable(count, entrances, self.predecessor_offsets, self.predecessors)
+        stations_with_pathways = bytearray(count)
+        platforms_with_boarding_areas = bytearray(count)
+        for node in range(count):
+            if self.has_pathways(node) and self.stations[node] != NO_INDEX:
+                stations_with_pathways[self.stations[node]] = 1
+            if self.location_types[node] == BOARDING_AREA and self.parents[node] != NO_INDEX:
+                platforms_with_boarding_areas[self.parents[node]] = 1
+        unreachable = []
+        for node in range(count):
+            location_type = self.location_types[node]
+            if location_type == STATION:
+                continue
+            if location_type == STOP_OR_PLATFORM and platforms_with_boarding_areas[node]:
+                continue
+            if self.stations[node] == NO_INDEX or not stations_with_pathways[self.stations[node]]:
+                continue
+            if not from_entrances[node] or not to_exits[node]:
+                unreachable.append((node, bool(from_entrances[node]), bool(to_exits[node])))
+        return unreachable
+
+    # Strongly connected component of each location
+    def components(self) -> array:
+        if self._components is None:
+            self._components = _strong_components(len(self), self.successor_offsets, self.successors)
+        return self._components
+
+    # Per station summary of its pathways network: a station whose locations
+    # form a single strongly connected component can be walked between any two
+    # of its locations. Loops and dangling generic nodes are reported here
+    # rather than as errors.
+    def station_diagnostics(self) -> list:
+        unreachable = {}
+        for node, has_entrance, has_exit in self.unreachable_locations():
+            unreachable.setdefault(self.stations[node], []).append(self.stop_ids[node])
+        dangling = {}
+        for node in self.dangling_generic_nodes():
+            dangling.setdefault(self.stations[node], []).append(self.stop_ids[node])
+        loops = {}
+        for node in self.loop_nodes:
+            if node != NO_INDEX and self.stations[node] != NO_INDEX:
+                loops[self.stations[node]] = loops.get(self.stations[node], 0) + 1
+        components = self.components()
+        stations = {}
+        for node in range(len(self)):
+            station = self.stations[node]
+            if station == NO_INDEX or node == station or not self.has_pathways(node):
+                continue
+            summary = stations.setdefault(station, {'locations': 0, 'entrances': 0, 'edges': 0, 'components': set()})
+            summary['locations'] += 1
+            summary['entrances'] += self.location_types[node] == ENTRANCE_EXIT
+            summary['edges'] += self.successor_offsets[node + 1] - self.successor_offsets[node]
+            summary['components'].add(components[node])
+        return [{
+            'stationId': self.stop_ids[station],
+            'locations': summary['locations'],
+            'entrances': summary['entrances'],
+            'directedEdges': summary['edges'],
+            'stronglyConnectedComponents': len(summary['components']),
+            'unreachableLocations': unreachable.get(station, []),
+            'danglingGenericNodes': dangling.get(station, []),
+            'pathwayLoops': loops.get(station, 0)
+        } for station, summary in stations.items()]
@@ -55,3 +55,20 @@ PATHWAYS_FIELDS = {
 
 # files related to pathways    
 PATHWAYS_FILES = ['pathways.txt', 'levels.txt']
+
+# pathways scope mode: files and columns the reduced feed is built from
+# columns kept in addition to PATHWAYS_FIELDS, the keys other files refer to
+PATHWAYS_SCOPE_KEY_COLUMNS = {
+    'trips.txt': ['route_id', 'service_id', 'trip_id']
+}
+
+# large files that no pathways rule depends on, required files are replaced by a header only stub
+PATHWAYS_SCOPE_EXCLUDED_FILES = ['shapes.txt']
+PATHWAYS_SCOPE_STUB_FILES = {
+    'stop_times.txt': ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence']
+}
+
+# incremental validation: when only these files changed since the last accepted
+# upload of a feed, the in-process pathways rules run first to reject a broken
+# re-upload fast, a re-upload passing them still goes through the canonical validator
+PATHWAYS_INCREMENTAL_FILES = ['pathways.txt', 'levels.txt']
@@ -0,0 +1,212 @@
+import io
+import csv
+import logging
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+from .pathway_graph import PathwayGraph, STOP_OR_PLATFORM, STATION, ENTRANCE_EXIT, GENERIC_NODE, BOARDING_AREA
+
+logging.basicConfig()
+logger = logging.getLogger('PATHWAYS_PRECHECK')
+logger.setLevel(logging.INFO)
+
+# GTFS pathway modes
+ELEVATOR = 5
+EXIT_GATE = 7
+
+# Same cap as the sample notices reported by the canonical validator
+MAX_SAMPLE_NOTICES = 100
+
+# Notices the canonical validator reports as warnings, they do not fail an
+# upload there (CanonicalValidator.parse_errors drops them) so they must not here
+WARNING_CODES = ('pathway_loop', 'pathway_dangling_generic_node')
+
+
+@dataclass
+class Location:
+    stop_id: str
+    stop_name: str
+    location_type: int
+    parent_station: str
+    level_id: str
+    csv_row_number: int
+
+
+@dataclass
+class Pathway:
+    pathway_id: str
+    from_stop_id: str
+    to_stop_id: str
+    pathway_mode: int
+    is_bidirectional: bool
+    csv_row_number: int
+
+
+def _find_member(archive: zipfile.ZipFile, filename: str) -> Optional[zipfile.ZipInfo]:
+    for member in archive.infolist():
+        if member.filename.startswith('__MACOSX'):
+            continue
+        if member.filename.rsplit('/', 1)[-1] == filename:
+            return member
+    return None
+
+
+# Streams the rows of a csv member of the zip, the row number follows the
+# canonical validator convention where the header is row 1
+def _read_rows(archive: zipfile.ZipFile, member: zipfile.ZipInfo):
+    with archive.open(member) as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        for row_number, row in enumerate(reader, start=2):
+            yield row_number, row
+
+
+def _to_int(value: Optional[str], default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+# Lightweight in-process check of the pathways rules of the canonical validator
+# that make an upload fail (see PATHWAYS_FATAL_ERROR_CODES), plus the stop
+# level_id references to levels.txt. Only stops.txt, pathways.txt and
+# levels.txt are read from the zip. `validate` returns the ERROR-level notices
+# in the canonical validator report format, the WARNING-level ones are kept
+# apart in `warnings`.
+class PathwaysPrecheck:
+    def __init__(self, zip_file: str):
+        self.zip_file = zip_file
+        self.locations = {}
+        self.pathways = []
+        # level ids of levels.txt, None when the feed has no levels.txt
+        self.level_ids = None
+        self.graph = None
+        self._notices = {}
+
+    def validate(self) -> list:
+        with zipfile.ZipFile(self.zip_file) as archive:
+            stops = _find_member(archive, 'stops.txt')
+            pathways = _find_member(archive, 'pathways.txt')
+            if stops is None or pathways is None:
+                return []
+            levels = _find_member(archive, 'levels.txt')
+            if levels is not None:
+                self.level_ids = {row.get('level_id') or '' for _, row in _read_rows(archive, levels)}
+            self._load_stops(archive, stops)
+            self._load_pathways(archive, pathways)
+        self._check_locations()
+        self._check_pathways()
+        self._check_graph()
+        return self.errors()
+
+    def _notice(self, code: str, notice: dict) -> None:
+        self._notices.setdefault(code, []).append(notice)
+
+    def _report(self, severity: str) -> list:
+        return [{
+            'code': code,
+            'severity': severity,
+            'totalNotices': len(notices),
+            'sampleNotices': notices[:MAX_SAMPLE_NOTICES]
+        } for code, notices in self._notices.items() if (code in WARNING_CODES) == (severity == 'WARNING')]
+
+    def errors(self) -> list:
+        return self._report('ERROR')
+
+    def warnings(self) -> list:
+        return self._report('WARNING')
+
+    def _load_stops(self, archive: zipfile.ZipFile, member: zipfile.ZipInfo) -> None:
+        for row_number, row in _read_rows(archive, member):
+            stop_id = row.get('stop_id') or ''
+            self.locations[stop_id] = Location(stop_id=stop_id,
+                                               stop_name=row.get('stop_name') or '',
+                                               location_type=_to_int(row.get('location_type')),
+                                               parent_station=row.get('parent_station') or '',
+                                               level_id=row.get('level_id') or '',
+                                               csv_row_number=row_number)
+
+    def _load_pathways(self, archive: zipfile.ZipFile, member: zipfile.ZipInfo) -> None:
+        for row_number, row in _read_rows(archive, member):
+            self.pathways.append(Pathway(pathway_id=row.get('pathway_id') or '',
+                                         from_stop_id=row.get('from_stop_id') or '',
+                                         to_stop_id=row.get('to_stop_id') or '',
+                                         pathway_mode=_to_int(row.get('pathway_mode')),
+                                         is_bidirectional=_to_int(row.get('is_bidirectional')) == 1,
+                                         csv_row_number=row_number))
+
+    def _location_notice(self, location: Location) -> dict:
+        return {'csvRowNumber': location.csv_row_number, 'stopId': location.stop_id,
+                'stopName': location.stop_name}
+
+    def _check_locations(self) -> None:
+        for location in self.locations.values():
+            if location.location_type in (ENTRANCE_EXIT, GENERIC_NODE, BOARDING_AREA) \
+                    and not location.parent_station:
+                notice = self._location_notice(location)
+                notice['locationType'] = location.location_type
+                self._notice('location_without_parent_station', notice)
+            if self.level_ids is not None and location.level_id and location.level_id not in self.level_ids:
+                self._notice('foreign_key_violation', {'childFilename': 'stops.txt',
+                                                       'childFieldName': 'level_id',
+                                                       'parentFilename': 'levels.txt',
+                                                       'parentFieldName': 'level_id',
+                                                       'fieldValue': location.level_id,
+                                                       'csvRowNumber': location.csv_row_number})
+
+    def _check_pathways(self) -> None:
+        platforms_with_boarding_areas = {location.parent_station for location in self.locations.values()
+                                         if location.location_type == BOARDING_AREA}
+        missing_level_reported = set()
+        for pathway in self.pathways:
+            if pathway.pathway_mode == EXIT_GATE and pathway.is_bidirectional:
+                self._notice('bidirectional_exit_gate', {'csvRowNumber': pathway.csv_row_number,
+                                                         'pathwayId': pathway.pathway_id})
+            for field_name, stop_id in (('from_stop_id', pathway.from_stop_id), ('to_stop_id', pathway.to_stop_id)):
+                location = self.locations.get(stop_id)
+                if location is None:
+                    self._notice('foreign_key_violation', {'childFilename': 'pathways.txt',
+                                                           'childFieldName': field_name,
+                                                           'parentFilename': 'stops.txt',
+                                                           'parentFieldName': 'stop_id',
+                                                           'fieldValue': stop_id,
+                                                           'csvRowNumber': pathway.csv_row_number})
+                    continue
+                endpoint_notice = {'csvRowNumber': pathway.csv_row_number, 'pathwayId': pathway.pathway_id,
+                                   'fieldName': field_name, 'stopId': stop_id}
+                if location.location_type == STATION:
+                    endpoint_notice['locationType'] = location.location_type
+                    self._notice('pathway_to_wrong_location_type', endpoint_notice)
+                elif location.location_type == STOP_OR_PLATFORM and stop_id in platforms_with_boarding_areas:
+                    self._notice('pathway_to_platform_with_boarding_areas', endpoint_notice)
+                if pathway.pathway_mode == ELEVATOR and not location.level_id \
+                        and stop_id not in missing_level_reported:
+                    missing_level_reported.add(stop_id)
+                    self._notice('missing_level_id', self._location_notice(location))
+
+    # Unreachable locations are fatal, loops and dangling generic nodes are
+    # WARNING_CODES (also summarized in station_diagnostics)
+    def _check_graph(self) -> None:
+        self.graph = PathwayGraph.build(self.locations, self.pathways)
+        for node, has_entrance, has_exit in self.graph.unreachable_locations():
+            location = self.locations[self.graph.stop_ids[node]]
+            notice = self._location_notice(location)
+            notice.update({'locationType': location.location_type, 'parentStation': location.parent_station,
+                           'hasEntrance': has_entrance, 'hasExit': has_exit})
+            self._notice('pathway_unreachable_location', notice)
+
+        for position in self.graph.loops:
+            pathway = self.pathways[position]
+            self._notice('pathway_loop', {'csvRowNumber': pathway.csv_row_number,
+                                          'pathwayId': pathway.pathway_id,
+                                          'stopId': pathway.from_stop_id})
+
+        for node in self.graph.dangling_generic_nodes():
+            location = self.locations[self.graph.stop_ids[node]]
+            notice = self._location_notice(location)
+            notice['parentStation'] = location.parent_station
+            self._notice('pathway_dangling_generic_node', notice)
+
+    # Per station summary of the pathways network, see PathwayGraph.station_diagnostics
+    def station_diagnostics(self) -> list:
+        return self.graph.station_diagnostics() if self.graph else []
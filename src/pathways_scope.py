@@ -0,0 +1,111 @@
+import io
+import csv
+import time
+import shutil
+import logging
+import zipfile
+from dataclasses import dataclass
+from .pathways_config import PATHWAYS_FIELDS, PATHWAYS_SCOPE_KEY_COLUMNS, PATHWAYS_SCOPE_EXCLUDED_FILES, \
+    PATHWAYS_SCOPE_STUB_FILES
+
+logging.basicConfig()
+logger = logging.getLogger('PATHWAYS_SCOPE')
+logger.setLevel(logging.INFO)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+@dataclass
+class SubsetStats:
+    original_bytes: int = 0
+    subset_bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def reduction(self) -> float:
+        if not self.original_bytes:
+            return 0.0
+        return 1 - self.subset_bytes / self.original_bytes
+
+
+# Key columns plus the pathways fields of the rules in use (the
+# `pathways_fields` of the validation's rules table)
+def _scope_columns(pathways_fields: dict) -> dict:
+    columns = {filename: list(fields) for filename, fields in PATHWAYS_SCOPE_KEY_COLUMNS.items()}
+    for filename, fields in pathways_fields.items():
+        if filename in columns:
+            columns[filename] += [field for field in fields if field not in columns[filename]]
+    return columns
+
+
+# Files that are dropped, stubbed or reduced in the pathways scope, notices
+# about these files are artifacts of the reduced feed
+def scope_modified_files() -> frozenset:
+    return frozenset(PATHWAYS_SCOPE_EXCLUDED_FILES) | frozenset(PATHWAYS_SCOPE_STUB_FILES)
+
+
+def _references_scope_files(notice: dict, modified_files: frozenset) -> bool:
+    return any(notice.get(key) in modified_files for key in ('filename', 'childFilename', 'parentFilename'))
+
+
+# Splits the validator errors into the real errors and the artifacts of the
+# reduced feed, i.e. errors whose sample notices all refer to a modified file
+def split_scope_artifacts(errors: list) -> tuple[list, list]:
+    modified_files = scope_modified_files()
+    kept, artifacts = [], []
+    for error in errors:
+        notices = error.get('sampleNotices') or []
+        if notices and all(_references_scope_files(notice, modified_files) for notice in notices):
+            artifacts.append(error)
+        else:
+            kept.append(error)
+    return kept, artifacts
+
+
+def _project_columns(source, target, columns: list) -> None:
+    reader = csv.reader(io.TextIOWrapper(source, encoding='utf-8-sig', newline=''))
+    writer_stream = io.TextIOWrapper(target, encoding='utf-8', newline='')
+    writer = csv.writer(writer_stream, lineterminator='\n')
+    header = next(reader, None)
+    if header is None:
+        writer_stream.flush()
+        writer_stream.detach()
+        return
+    header = [name.strip() for name in header]
+    indexes = [header.index(column) for column in columns if column in header]
+    writer.writerow([header[index] for index in indexes])
+    for row in reader:
+        writer.writerow([row[index] if index < len(row) else '' for index in indexes])
+    writer_stream.flush()
+    writer_stream.detach()
+
+
+# Builds a reduced copy of the feed containing only what the pathways rules
+# depend on: large unrelated files are dropped or replaced by an empty stub
+# and reduced files only keep their key columns and the pathways fields,
+# PATHWAYS_FIELDS unless the fields of the active rules table are given.
+def build_pathways_subset(zip_file: str, destination: str, pathways_fields: dict = PATHWAYS_FIELDS) -> SubsetStats:
+    started_at = time.perf_counter()
+    stats = SubsetStats()
+    columns = _scope_columns(pathways_fields)
+    with zipfile.ZipFile(zip_file) as source, \
+            zipfile.ZipFile(destination, 'w', compression=zipfile.ZIP_DEFLATED) as target:
+        for member in source.infolist():
+            stats.original_bytes += member.file_size
+            filename = member.filename.rsplit('/', 1)[-1]
+            if member.is_dir() or member.filename.startswith('__MACOSX') or filename in PATHWAYS_SCOPE_EXCLUDED_FILES:
+                continue
+            if filename in PATHWAYS_SCOPE_STUB_FILES:
+                target.writestr(member.filename, ','.join(PATHWAYS_SCOPE_STUB_FILES[filename]) + '\n')
+                continue
+            with source.open(member) as reader, target.open(member.filename, 'w', force_zip64=True) as writer:
+                if filename in columns:
+                    _project_columns(reader, writer, columns[filename])
+                else:
+                    shutil.copyfileobj(reader, writer, COPY_BUFFER_SIZE)
+    with zipfile.ZipFile(destination) as subset:
+        stats.subset_bytes = sum(member.file_size for member in subset.infolist())
+    stats.elapsed_seconds = time.perf_counter() - started_at
+    logger.info(f' Pathways scope reduced the feed from {stats.original_bytes} to {stats.subset_bytes} bytes '
+                f'({stats.reduction:.0%}) in {stats.elapsed_seconds:.3f}s')
+    return stats
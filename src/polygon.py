@@ -0,0 +1,198 @@
+import copy
+from array import array
+from typing import Optional
+
+POLYGON_TYPES = ('Polygon', 'MultiPolygon')
+# Upper bound of the horizontal bands of the edge index
+MAX_BANDS = 4096
+
+
+# A ring stored as interleaved x (longitude), y (latitude) values: doubles, or
+# 64-bit integers when all the values are integers so they are rebuilt as
+# such. Rings that neither array gives back as sent (mixed integers and
+# floats, altitudes...) are returned with their original coordinates.
+def _ring(coordinates: list) -> tuple[array, Optional[list]]:
+    if all(type(position) is list and len(position) == 2 for position in coordinates):
+        values = [value for position in coordinates for value in position]
+        kinds = {type(value) for value in values}
+        if kinds <= {float}:
+            return array('d', values), None
+        if kinds == {int}:
+            try:
+                return array('q', values), None
+            except OverflowError:
+                pass
+    ring = array('d')
+    for position in coordinates:
+        ring.append(float(position[0]))
+        ring.append(float(position[1]))
+    return ring, copy.deepcopy(coordinates)
+
+
+def _ring_coordinates(ring: array) -> list:
+    return [[ring[index], ring[index + 1]] for index in range(0, len(ring), 2)]
+
+
+# Polygon type of a GeoJSON geometry, None for the other objects. The upload
+# API may send the bare coordinates without type, their nesting tells them apart.
+def _polygon_type(node: dict) -> Optional[str]:
+    coordinates = node.get('coordinates')
+    if not isinstance(coordinates, list) or not coordinates:
+        return None
+    if 'type' in node:
+        return node['type'] if node['type'] in POLYGON_TYPES else None
+    depth = 0
+    while isinstance(coordinates, list) and coordinates:
+        depth += 1
+        coordinates = coordinates[0]
+    return {3: 'Polygon', 4: 'MultiPolygon'}.get(depth)
+
+
+# Polygon area of a GeoJSON object (geometry, Feature or FeatureCollection)
+# stored compactly: the coordinates of the Polygon and MultiPolygon geometries
+# are kept in arrays of doubles or integers (16 bytes per position instead of
+# two nested lists of numbers) and the rest of the document in a small
+# skeleton. The GeoJSON is only rebuilt when it is asked for, with the same
+# values and structure as the original, empty polygons included.
+class CompactPolygon:
+    __slots__ = ('_skeleton', '_geometries', 'polygons', 'bbox', '_index')
+
+    def __init__(self, skeleton, geometries: list):
+        self._skeleton = skeleton
+        # (geometry type, polygons, original coordinates of the rings by
+        # (polygon, ring) position, see _ring) of each geometry, in document order
+        self._geometries = geometries
+        # every polygon of the area as a tuple of rings, the first one being the exterior ring
+        self.polygons = [polygon for _, polygons, _ in geometries for polygon in polygons]
+        exteriors = [polygon[0] for polygon in self.polygons if polygon and polygon[0]]
+        self.bbox = (min(min(ring[0::2]) for ring in exteriors), min(min(ring[1::2]) for ring in exteriors),
+                     max(max(ring[0::2]) for ring in exteriors),
+                     max(max(ring[1::2]) for ring in exteriors)) if exteriors else None
+        self._index = None
+
+    # Compact form of `value`, or None when it holds no polygon
+    @classmethod
+    def from_geojson(cls, value) -> Optional['CompactPolygon']:
+        geometries = []
+
+        def strip(node):
+            if isinstance(node, dict):
+                geometry_type = _polygon_type(node)
+                if geometry_type:
+                    polygons, originals = [], {}
+                    members = node['coordinates'] if geometry_type == 'MultiPolygon' else [node['coordinates']]
+                    for polygon_position, polygon in enumerate(members):
+                        rings = []
+                        for ring_position, coordinates in enumerate(polygon):
+                            ring, original = _ring(coordinates)
+                            rings.append(ring)
+                            if original is not None:
+                                originals[polygon_position, ring_position] = original
+                        polygons.append(tuple(rings))
+                    geometries.append((geometry_type, polygons, originals))
+                    return {**{key: value for key, value in node.items() if key != 'coordinates'},
+                            'coordinates': len(geometries) - 1}
+                return {key: strip(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [strip(item) for item in node]
+            return node
+
+        skeleton = strip(value)
+        if not geometries:
+            return None
+        return cls(skeleton, geometries)
+
+    @property
+    def position_count(self) -> int:
+        return sum(len(ring) // 2 for polygon in self.polygons for ring in polygon)
+
+    def to_geojson(self):
+        def build(node):
+            if isinstance(node, dict):
+                if type(node.get('coordinates')) is int:
+                    geometry_type, polygons, originals = self._geometries[node['coordinates']]
+                    coordinates = [[copy.deepcopy(originals[polygon_position, ring_position])
+                                    if (polygon_position, ring_position) in originals else _ring_coordinates(ring)
+                                    for ring_position, ring in enumerate(polygon)]
+                                   for polygon_position, polygon in enumerate(polygons)]
+                    return {**node, 'coordinates': coordinates if geometry_type == 'MultiPolygon' else coordinates[0]}
+                return {key: build(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [build(item) for item in node]
+            return copy.copy(node)
+
+        return build(self._skeleton)
+
+    def to_json(self):
+        return self.to_geojson()
+
+    def in_bbox(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bbox
+        return min_x <= x <= max_x and min_y <= y <= max_y
+
+    # Even-odd rule over all the rings: inside the exterior ring of a polygon
+    # and outside its holes. Points on an edge may fall on either side.
+    def contains(self, x: float, y: float) -> bool:
+        if self.bbox is None or not self.in_bbox(x, y):
+            return False
+        return self._edge_index().crossings(x, y) % 2 == 1
+
+    # Positions of the points outside the area, for many points at once: the
+    # bounding box rejects most far away points before the edges are looked at
+    def outside(self, xs, ys) -> list:
+        if self.bbox is None:
+            return list(range(len(xs)))
+        min_x, min_y, max_x, max_y = self.bbox
+        index = self._edge_index()
+        bands, band_height, last_band = index.bands, index.band_height, len(index.bands) - 1
+        result = []
+        for position, (x, y) in enumerate(zip(xs, ys)):
+            if x < min_x or x > max_x or y < min_y or y > max_y:
+                result.append(position)
+                continue
+            inside = False
+            for y1, y2, x1, slope in bands[min(int((y - min_y) / band_height), last_band)]:
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * slope:
+                    inside = not inside
+            if not inside:
+                result.append(position)
+        return result
+
+    def _edge_index(self) -> '_EdgeIndex':
+        if self._index is None:
+            self._index = _EdgeIndex(self.polygons, self.bbox)
+        return self._index
+
+
+# Edges of the rings bucketed by horizontal bands of the bounding box, a
+# point is tested against the edges of its band only. Edges are kept as
+# (y1, y2, x1, dx/dy) so the crossing test needs no division.
+class _EdgeIndex:
+    __slots__ = ('min_y', 'band_height', 'bands')
+
+    def __init__(self, polygons: list, bbox: tuple):
+        edges = []
+        for polygon in polygons:
+            for ring in polygon:
+                for index in range(0, len(ring) - 2, 2):
+                    x1, y1, x2, y2 = ring[index], ring[index + 1], ring[index + 2], ring[index + 3]
+                    if y1 != y2:
+                        edges.append((y1, y2, x1, (x2 - x1) / (y2 - y1)))
+        band_count = max(1, min(len(edges), MAX_BANDS))
+        self.min_y = bbox[1]
+        self.band_height = (bbox[3] - bbox[1]) / band_count or 1.0
+        self.bands = [[] for _ in range(band_count)]
+        for edge in edges:
+            low, high = (edge[0], edge[1]) if edge[0] < edge[1] else (edge[1], edge[0])
+            for band in range(self.band(low), self.band(high) + 1):
+                self.bands[band].append(edge)
+
+    def band(self, y: float) -> int:
+        return min(max(int((y - self.min_y) / self.band_height), 0), len(self.bands) - 1)
+
+    def crossings(self, x: float, y: float) -> int:
+        count = 0
+        for y1, y2, x1, slope in self.bands[self.band(y)]:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * slope:
+                count += 1
+        return count
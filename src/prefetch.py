@@ -0,0 +1,47 @@
+import time
+import logging
+import threading
+from . import metrics
+
+logging.basicConfig()
+logger = logging.getLogger('PREFETCH')
+logger.setLevel(logging.INFO)
+
+
+# Bounds the feeds downloaded ahead of validation, by number of files and by
+# bytes on disk. `acquire` blocks while `max_files` feeds are prefetched or
+# while the prefetched feeds use `max_bytes` or more, a blocked subscriber
+# callback holds its message so no new message is received from the queue.
+# The byte limit is checked before a download starts, so the last download
+# may overshoot it by the size of one feed.
+class PrefetchBudget:
+
+    def __init__(self, max_files: int, max_bytes: int = 0):
+        self.max_files = max(max_files, 1)
+        self.max_bytes = max(max_bytes, 0)
+        self.files = 0
+        self.bytes = 0
+        self._condition = threading.Condition()
+
+    def _is_full(self) -> bool:
+        return self.files >= self.max_files or (self.max_bytes and self.bytes >= self.max_bytes)
+
+    def acquire(self) -> None:
+        started_at = time.perf_counter()
+        with self._condition:
+            while self._is_full():
+                self._condition.wait()
+            self.files += 1
+        metrics.PREFETCH_WAIT_SECONDS.observe(time.perf_counter() - started_at)
+
+    def add_bytes(self, size: int) -> None:
+        with self._condition:
+            self.bytes += size
+        metrics.PREFETCHED_BYTES.inc(size)
+
+    def release(self, size: int = 0) -> None:
+        with self._condition:
+            self.files -= 1
+            self.bytes -= size
+            self._condition.notify_all()
+        metrics.PREFETCHED_BYTES.dec(size)
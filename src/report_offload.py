@@ -0,0 +1,94 @@
+import os
+import gzip
+import json
+import logging
+import posixpath
+from typing import Optional
+from urllib.parse import urlparse, unquote
+
+logging.basicConfig()
+logger = logging.getLogger('REPORT_OFFLOAD')
+logger.setLevel(logging.INFO)
+
+REPORT_SUFFIX = '.report.ndjson.gz'
+
+
+# Name of the report blob next to the upload in the container,
+# e.g. `2024/group/feed.zip` is reported in `2024/group/feed.report.ndjson.gz`
+def report_blob_name(container_name: str, file_upload_path: str) -> str:
+    path = unquote(urlparse(file_upload_path).path).lstrip('/')
+    if path.startswith(f'{container_name}/'):
+        path = path[len(container_name) + 1:]
+    return f'{posixpath.splitext(path)[0]}{REPORT_SUFFIX}'
+
+
+# Streams the notices of a report as gzipped NDJSON, one line per sample
+# notice with the code and severity it was reported under (the errors
+# downgraded by the pathways rules are written as warnings). Lines are
+# compressed as they are written so the serialized report is never held
+# in memory.
+class ReportWriter:
+
+    def __init__(self, destination: str):
+        self.destination = destination
+        self.lines = 0
+        self._handle = None
+
+    def __enter__(self) -> 'ReportWriter':
+        self._handle = gzip.open(self.destination, 'wt', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._handle.close()
+
+    def write(self, errors: list, severity: Optional[str] = None) -> None:
+        for error in errors:
+            for notice in error.get('sampleNotices') or []:
+                line = {'code': error.get('code'), 'severity': severity or error.get('severity'), 'notice': notice}
+                self._handle.write(json.dumps(line, separators=(',', ':'), default=str))
+                self._handle.write('\n')
+                self.lines += 1
+
+
+# Uploads the full report of a validation into the container of the upload
+# so only its URL and a summary are published. Reports with fewer than
+# `min_notices` notices stay in the message.
+class ReportOffload:
+
+    def __init__(self, container, container_name: str, min_notices: int = 0):
+        self.container = container
+        self.container_name = container_name
+        self.min_notices = min_notices
+
+    @classmethod
+    def from_settings(cls, settings, container) -> Optional['ReportOffload']:
+        if not settings.report_offload_enabled:
+            return None
+        return cls(container=container, container_name=settings.storage_container_name,
+                   min_notices=int(settings.report_offload_min_notices))
+
+    def should_offload(self, errors: list) -> bool:
+        total = sum(error.get('totalNotices') or len(error.get('sampleNotices') or []) for error in errors)
+        return bool(errors) and total >= self.min_notices
+
+    # Writes the report in `folder` and uploads it, returns the URL of the
+    # report or None when it could not be uploaded
+    def offload(self, errors: list, file_upload_path: str, folder: str, warnings: list = ()) -> Optional[str]:
+        blob_name = report_blob_name(self.container_name, file_upload_path)
+        report_path = os.path.join(folder, posixpath.basename(blob_name))
+        try:
+            with ReportWriter(report_path) as writer:
+                writer.write(errors)
+                writer.write(warnings, severity='WARNING')
+            report = self.container.create_file(blob_name)
+            with open(report_path, 'rb') as handle:
+                report.upload(handle)
+            url = report.get_remote_url()
+        except Exception as e:
+            logger.error(f' Unable to upload the validation report {blob_name}: {e}')
+            return None
+        finally:
+            if os.path.exists(report_path):
+                os.remove(report_path)
+        logger.info(f' Uploaded {writer.lines} notices to {blob_name}')
+        return url
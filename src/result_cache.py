@@ -0,0 +1,123 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional
+from gtfs_canonical_validator import CanonicalValidator
+from . import rules_table
+
+logging.basicConfig()
+logger = logging.getLogger('RESULT_CACHE')
+logger.setLevel(logging.INFO)
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+# Hash of the rule lists used to classify the validator notices,
+# any change in the rules invalidates the cached results. `rules` is the
+# table a validation started with, the current table when omitted.
+def rules_fingerprint(rules: Optional[rules_table.RulesTable] = None) -> str:
+    return (rules or rules_table.registry.current).fingerprint
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Local SQLite cache of final validation results keyed on the content of
+# the uploaded zip, the canonical validator version and the pathways rules.
+# Entries expire after `ttl_seconds`, and the least recently used entries are
+# evicted once the stored messages exceed `max_size_bytes`.
+class ResultCache:
+
+    def __init__(self, path: str, ttl_seconds: int = 86400, max_size_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional['ResultCache']:
+        if not settings.result_cache_enabled:
+            return None
+        return cls(path=settings.result_cache_path,
+                   ttl_seconds=settings.result_cache_ttl_seconds,
+                   max_size_bytes=settings.result_cache_max_size_bytes)
+
+    # Connection is opened lazily and re-opened after a fork so the
+    # cache can be shared with worker processes
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, is_valid INTEGER NOT NULL, message TEXT NOT NULL, '
+                'size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)')
+            self._pid = os.getpid()
+        return self._connection
+
+    # `variant` separates results of the same file validated differently
+    # (e.g. the reduced pathways scope feed)
+    def key_for(self, file_path: str, variant: str = '',
+                rules: Optional[rules_table.RulesTable] = None) -> Optional[str]:
+        try:
+            content_hash = file_sha256(file_path)
+        except (OSError, TypeError) as e:
+            logger.error(f' Unable to hash {file_path}: {e}')
+            return None
+        key = f'{content_hash}:{CanonicalValidator.__version__}:{rules_fingerprint(rules)}'
+        return f'{key}:{variant}' if variant else key
+
+    def get(self, key: str) -> Optional[tuple[bool, str]]:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute('SELECT is_valid, message, created_at FROM results WHERE key = ?',
+                                     (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE results SET accessed_at = ? WHERE key = ?', (now, key))
+        return bool(row[0]), row[1]
+
+    def put(self, key: str, is_valid: bool, message: str) -> None:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                               (key, int(bool(is_valid)), message, len(message), now, now))
+            self._evict(connection, now)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute('DELETE FROM results WHERE created_at < ?', (now - self.ttl_seconds,))
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        rows = connection.execute('SELECT key, size FROM results ORDER BY accessed_at').fetchall()
+        expired = []
+        for key, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        connection.executemany('DELETE FROM results WHERE key = ?', expired)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
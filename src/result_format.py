@@ -0,0 +1,113 @@
+import gzip
+import json
+import base64
+import logging
+from typing import Optional
+
+logging.basicConfig()
+logger = logging.getLogger('RESULT_FORMAT')
+logger.setLevel(logging.INFO)
+
+TEXT_FORMAT = 'text'
+SUMMARY_FORMAT = 'summary'
+
+# Stays under the 256 KB message size limit of the standard Service Bus tier
+# with room for the rest of the response message
+DEFAULT_MAX_BYTES = 200 * 1024
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+# Compresses the full error list for the `report` field of the summary
+def encode_report(errors: list) -> str:
+    return base64.b64encode(gzip.compress(_dumps(errors).encode('utf-8'))).decode('ascii')
+
+
+def decode_report(data: str) -> list:
+    return json.loads(gzip.decompress(base64.b64decode(data)))
+
+
+# Turns the errors of a validation into the response message. The `text`
+# format is the python representation of the error list the service always
+# published, the `summary` format is a JSON document with the number of
+# notices per code, the first `max_samples` sample notices of each code and,
+# when `embed_report` is set, the full error list compressed with gzip and
+# encoded in base64. Summaries are kept under `max_bytes` by dropping the
+# embedded report, then the samples, then the least frequent codes.
+class ResultFormatter:
+
+    def __init__(self, result_format: str = TEXT_FORMAT, max_samples: int = 5, max_bytes: int = DEFAULT_MAX_BYTES,
+                 embed_report: bool = False):
+        self.result_format = result_format
+        self.max_samples = max(max_samples, 0)
+        self.max_bytes = max_bytes
+        self.embed_report = embed_report
+
+    @classmethod
+    def from_settings(cls, settings) -> 'ResultFormatter':
+        result_format = SUMMARY_FORMAT if settings.result_format == SUMMARY_FORMAT else TEXT_FORMAT
+        return cls(result_format=result_format,
+                   max_samples=int(settings.result_max_samples),
+                   max_bytes=int(settings.result_max_bytes),
+                   embed_report=bool(settings.result_embed_report))
+
+    # Identifies the messages produced by this formatter, cached messages of
+    # other formats must not be re-used
+    @property
+    def variant(self) -> str:
+        if self.result_format == TEXT_FORMAT:
+            return ''
+        return f'{self.result_format}-{self.max_samples}-{self.max_bytes}-{int(self.embed_report)}'
+
+    # Messages pointing to an offloaded report are always summaries
+    def format(self, errors: list, report_url: Optional[str] = None) -> str:
+        if self.result_format == TEXT_FORMAT and not report_url:
+            return str(errors)
+        return self.summary(errors, report_url)
+
+    def summary(self, errors: list, report_url: Optional[str] = None) -> str:
+        codes = sorted(errors, key=lambda error: -_total_notices(error))
+        document = {
+            'totalNotices': sum(_total_notices(error) for error in codes),
+            'notices': [_summarize(error, self.max_samples) for error in codes],
+            'truncated': False
+        }
+        if report_url:
+            document['reportUrl'] = report_url
+        if self.embed_report and errors and not report_url:
+            document['report'] = {'encoding': 'gzip+base64', 'data': encode_report(errors)}
+        message = _dumps(document)
+        if len(message) <= self.max_bytes:
+            return message
+
+        document['truncated'] = True
+        document.pop('report', None)
+        for max_samples in sorted({min(self.max_samples, 1), 0}, reverse=True):
+            document['notices'] = [_summarize(error, max_samples) for error in codes]
+            message = _dumps(document)
+            if len(message) <= self.max_bytes:
+                return message
+
+        # drop the least frequent codes, halving until the message fits
+        notices = document['notices']
+        while notices and len(message) > self.max_bytes:
+            notices = notices[:len(notices) // 2]
+            document['notices'] = notices
+            message = _dumps(document)
+        logger.info(f' Summary truncated to {len(notices)} of {len(codes)} codes')
+        return message
+
+
+def _total_notices(error: dict) -> int:
+    return error.get('totalNotices') or len(error.get('sampleNotices') or [])
+
+
+def _summarize(error: dict, max_samples: int) -> dict:
+    return {
+        'code': error.get('code'),
+        'severity': error.get('severity'),
+        'totalNotices': _total_notices(error),
+        'sampleNotices': (error.get('sampleNotices') or [])[:max_samples]
+    }
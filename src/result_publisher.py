@@ -0,0 +1,167 @@
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+from azure.servicebus import ServiceBusMessage
+from python_ms_core.core.queue.models.queue_message import QueueMessage
+from python_ms_core.core.topic.azure_topic import AzureTopic
+from . import metrics
+
+logging.basicConfig()
+logger = logging.getLogger('RESULT_PUBLISHER')
+logger.setLevel(logging.INFO)
+
+MAX_BACKOFF_SECONDS = 30
+
+
+# Long-lived publisher of the validation results. A single topic client is
+# created lazily and re-used for all the messages, messages published from
+# any thread are queued and sent by one sender thread in batches of up to
+# `max_batch_size` messages or once `linger_seconds` passed since the first
+# queued message. Failed sends are retried with an exponential backoff on a
+# new topic client. `publish` returns a future resolved once the message is
+# sent, or failed after `max_retries` retries.
+class ResultPublisher:
+
+    def __init__(self, topic_factory: Callable, max_batch_size: int = 100, linger_seconds: float = 0,
+                 max_retries: int = 3, retry_backoff_seconds: float = 0.5):
+        self.topic_factory = topic_factory
+        self.max_batch_size = max(max_batch_size, 1)
+        self.linger_seconds = max(linger_seconds, 0)
+        self.max_retries = max(max_retries, 0)
+        self.retry_backoff_seconds = max(retry_backoff_seconds, 0)
+        self._topic = None
+        self._topic_lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._closed = False
+        self._sender = threading.Thread(target=self._run, name='result-publisher', daemon=True)
+        self._sender.start()
+
+    @classmethod
+    def from_settings(cls, settings, topic_factory: Callable) -> 'ResultPublisher':
+        return cls(topic_factory=topic_factory,
+                   max_batch_size=int(settings.publish_batch_size),
+                   linger_seconds=int(settings.publish_linger_ms) / 1000,
+                   max_retries=int(settings.publish_max_retries),
+                   retry_backoff_seconds=float(settings.publish_retry_backoff_seconds))
+
+    def publish(self, data: QueueMessage) -> Future:
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError('Result publisher is closed'))
+            return future
+        self._pending.put((data, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._sender.join(timeout=timeout)
+        if not self._sender.is_alive():
+            self._reset_topic()
+        # messages queued while closing are never sent
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(RuntimeError('Result publisher is closed'))
+
+    def topic(self):
+        with self._topic_lock:
+            if self._topic is None:
+                self._topic = self.topic_factory()
+            return self._topic
+
+    # The failed client is closed so its connections are not left open
+    def _reset_topic(self) -> None:
+        with self._topic_lock:
+            topic, self._topic = self._topic, None
+        if topic is not None:
+            self._close_topic(topic)
+
+    # Azure topics hold a sender, a service bus client and worker pools,
+    # other topics are closed when they can be
+    @staticmethod
+    def _close_topic(topic) -> None:
+        try:
+            if isinstance(topic, AzureTopic):
+                topic.publisher.close()
+                topic.lock_renewal.close()
+                topic.client.close()
+                topic.executor.shutdown(wait=False)
+            elif hasattr(topic, 'close'):
+                topic.close()
+        except Exception as e:
+            logger.error(f' Unable to close the topic client: {e}')
+
+    def _next_batch(self) -> Optional[list]:
+        item = self._pending.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # keep the stop marker so the loop ends after this batch
+                self._pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._send_with_retry(batch)
+
+    def _send_with_retry(self, batch: list) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.PUBLISH_SECONDS.time():
+                    self._send(self.topic(), [data for data, _ in batch])
+            except Exception as e:
+                logger.error(f' Failed to publish {len(batch)} messages (attempt {attempt + 1}): {e}')
+                self._reset_topic()
+                if attempt == self.max_retries:
+                    metrics.record_failures(['publish_failed'])
+                    for _, future in batch:
+                        future.set_exception(e)
+                    return
+                time.sleep(min(self.retry_backoff_seconds * 2 ** attempt, MAX_BACKOFF_SECONDS))
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+                return
+
+    # Azure topics send the whole batch in as few AMQP transfers as the
+    # message size limit allows, other topics publish message by message
+    @staticmethod
+    def _send(topic, messages: list) -> None:
+        if not isinstance(topic, AzureTopic):
+            for data in messages:
+                topic.publish(data=data)
+            return
+        sender = topic.publisher
+        message_batch = sender.create_message_batch()
+        for data in messages:
+            message = ServiceBusMessage(json.dumps(QueueMessage.to_dict(data)))
+            try:
+                message_batch.add_message(message)
+            except ValueError:
+                sender.send_messages(message_batch)
+                message_batch = sender.create_message_batch()
+                message_batch.add_message(message)
+        sender.send_messages(message_batch)
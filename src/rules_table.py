@@ -0,0 +1,146 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from .config import Settings
+from .notice_classifier import NoticeClassifier
+from . import pathways_config
+
+logging.basicConfig()
+logger = logging.getLogger('RULES_TABLE')
+logger.setLevel(logging.INFO)
+
+BUILTIN_VERSION = 'builtin'
+
+
+def builtin_rules() -> dict:
+    return {
+        'change_error_to_warning': pathways_config.CHANGE_ERROR_TO_WARNING,
+        'pathways_fatal_error_codes': pathways_config.PATHWAYS_FATAL_ERROR_CODES,
+        'pathways_fields': pathways_config.PATHWAYS_FIELDS,
+        'pathways_files': pathways_config.PATHWAYS_FILES
+    }
+
+
+def _code_list(rules: dict, key: str) -> list:
+    value = rules[key]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f'{key} must be a list of strings')
+    return sorted(set(value))
+
+
+# Pathways rules applied to the validator notices, compiled into the hashed
+# lookups of a NoticeClassifier. Tables are immutable, a reload builds a new
+# table and swaps it in.
+@dataclass(frozen=True)
+class RulesTable:
+    version: str
+    fingerprint: str
+    rules: dict
+    classifier: NoticeClassifier
+
+    # Missing rule lists are taken from pathways_config
+    @classmethod
+    def from_dict(cls, data: dict, version: Optional[str] = None) -> 'RulesTable':
+        rules = {**builtin_rules(), **{key: value for key, value in data.items() if key != 'version'}}
+        unknown = set(rules) - set(builtin_rules())
+        if unknown:
+            raise ValueError(f'Unknown rules: {sorted(unknown)}')
+        fields = rules['pathways_fields']
+        if not isinstance(fields, dict):
+            raise ValueError('pathways_fields must map file names to lists of fields')
+        rules = {
+            'change_error_to_warning': _code_list(rules, 'change_error_to_warning'),
+            'pathways_fatal_error_codes': _code_list(rules, 'pathways_fatal_error_codes'),
+            'pathways_fields': {filename: _code_list(fields, filename) for filename in sorted(fields)},
+            'pathways_files': _code_list(rules, 'pathways_files')
+        }
+        fingerprint = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+        classifier = NoticeClassifier(change_error_to_warning=rules['change_error_to_warning'],
+                                      fatal_error_codes=rules['pathways_fatal_error_codes'],
+                                      pathways_fields=rules['pathways_fields'],
+                                      pathways_files=rules['pathways_files'])
+        return cls(version=str(data.get('version') or version or fingerprint[:12]), fingerprint=fingerprint,
+                   rules=rules, classifier=classifier)
+
+    @classmethod
+    def builtin(cls) -> 'RulesTable':
+        return cls.from_dict(builtin_rules(), version=BUILTIN_VERSION)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RulesTable':
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f'{path} must contain a JSON object')
+        return cls.from_dict(data)
+
+
+# Holds the active rules table. With a rules file, the file is re-read every
+# `reload_interval_seconds` once it changed and the new table replaces the
+# active one in a single assignment, validations in progress keep the table
+# they started with. An invalid file is logged and the active table kept.
+class RulesRegistry:
+
+    def __init__(self, path: Optional[str] = None, reload_interval_seconds: float = 0):
+        self.path = path
+        self.reload_interval_seconds = reload_interval_seconds
+        self.current = RulesTable.builtin()
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        if path:
+            self.reload()
+
+    @classmethod
+    def from_settings(cls, settings) -> 'RulesRegistry':
+        return cls(path=settings.rules_path or None,
+                   reload_interval_seconds=float(settings.rules_reload_interval_seconds))
+
+    def _file_stamp(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    # Returns True when a new rules table was activated
+    def reload(self) -> bool:
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is None:
+                logger.error(f' Rules file {self.path} not found, keeping rules {self.current.version}')
+                return False
+            if stamp == self._stamp:
+                return False
+            try:
+                table = RulesTable.from_file(self.path)
+            except (OSError, ValueError) as e:
+                logger.error(f' Invalid rules file {self.path}, keeping rules {self.current.version}: {e}')
+                return False
+            self._stamp = stamp
+            if table.fingerprint == self.current.fingerprint and table.version == self.current.version:
+                return False
+            logger.info(f' Activating rules {table.version} from {self.path}')
+            self.current = table
+            return True
+
+    def start(self) -> None:
+        if self.path and self.reload_interval_seconds > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='rules-reload', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.reload_interval_seconds):
+            self.reload()
+
+
+# Rules of this process
+registry = RulesRegistry.from_settings(Settings())
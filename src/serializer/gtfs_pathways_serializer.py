@@ -1,7 +1,49 @@
 import json
+from ..polygon import CompactPolygon
 
 
-class GTFSPathwaysUpload:
+# JSON keys of the slots of each message class, computed once per class
+_json_keys = {}
+
+
+def json_keys(cls) -> tuple:
+    keys = _json_keys.get(cls)
+    if keys is None:
+        keys = _json_keys[cls] = tuple((name, remove_underscore(name)) for name in cls.__slots__)
+    return keys
+
+
+# Base of the message classes. They declare __slots__: thousands of messages
+# are decoded per minute and slotted instances are smaller and faster to build
+# than dict backed ones. Serializing never modifies the message, so the same
+# message can be encoded, logged and re-published any number of times.
+class SerializerModel:
+    __slots__ = ()
+
+    # New dict of the message, nested messages included
+    def to_json(self) -> dict:
+        return {key: _json_value(getattr(self, name)) for name, key in json_keys(type(self))}
+
+    # UTF-8 JSON of the message, nested messages are encoded as the encoder
+    # reaches them instead of building the complete dict first
+    def to_bytes(self) -> bytes:
+        return json.dumps(self, default=_shallow_json, separators=(',', ':')).encode('utf-8')
+
+
+def _json_value(value):
+    return value.to_json() if isinstance(value, (SerializerModel, CompactPolygon)) else value
+
+
+def _shallow_json(value) -> dict:
+    if isinstance(value, SerializerModel):
+        return {key: getattr(value, name) for name, key in json_keys(type(value))}
+    if isinstance(value, CompactPolygon):
+        return value.to_geojson()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class GTFSPathwaysUpload(SerializerModel):
+    __slots__ = ('_message', '_message_type', '_message_id', '_published_date', 'data')
 
     def __init__(self, data: dict):
         upload_data = data.get('data', None)
@@ -43,10 +85,6 @@ class GTFSPathwaysUpload:
     def published_date(self, value):
         self._published_date = value
 
-    def to_json(self):
-        self.data = self.data.to_json()
-        return to_json(self.__dict__)
-
     def data_from(self):
         message = self
         if isinstance(message, str):
@@ -59,9 +97,10 @@ class GTFSPathwaysUpload:
                 raise TypeError(error)
 
 
-class GTFSPathwaysUploadData:
+class GTFSPathwaysUploadData(SerializerModel):
+    __slots__ = ('_stage', 'request', 'meta', 'response', '_tdei_record_id', '_tdei_project_group_id', '_user_id')
+
     def __init__(self, data: dict):
-        polygon = data.get('polygon', None)
         request = data.get('request', None)
         meta = data.get('meta', None)
 
@@ -98,14 +137,12 @@ class GTFSPathwaysUploadData:
     @user_id.setter
     def user_id(self, value): self._user_id = value
 
-    def to_json(self):
-        self.request = to_json(self.request.__dict__)
-        self.meta = to_json(self.meta.__dict__)
-        self.response = to_json(self.response.__dict__)
-        return to_json(self.__dict__)
 
+class Request(SerializerModel):
+    __slots__ = ('_tdei_project_group_id', '_tdei_station_id', '_collected_by', '_collection_date',
+                 '_collection_method', '_valid_from', '_valid_to', '_data_source', '_polygon',
+                 '_pathways_schema_version')
 
-class Request:
     def __init__(self, data: dict):
         self._tdei_project_group_id = data.get('tdei_project_group_id', '')
         self._tdei_station_id = data.get('tdei_station_id', '')
@@ -115,7 +152,7 @@ class Request:
         self._valid_from = data.get('valid_from', '')
         self._valid_to = data.get('valid_to', '')
         self._data_source = data.get('data_source', '')
-        self._polygon = data.get('polygon', {})
+        self.polygon = data.get('polygon', {})
         self._pathways_schema_version = data.get('pathways_schema_version', '')
 
     @property
@@ -166,11 +203,19 @@ class Request:
     @data_source.setter
     def data_source(self, value): self._data_source = value
 
+    # The polygon is kept as a CompactPolygon when it holds any polygon
+    # geometry, the GeoJSON is rebuilt on each read
     @property
-    def polygon(self): return self._polygon
+    def polygon(self):
+        return self._polygon.to_geojson() if isinstance(self._polygon, CompactPolygon) else self._polygon
 
     @polygon.setter
-    def polygon(self, value): self._polygon = value
+    def polygon(self, value): self._polygon = CompactPolygon.from_geojson(value) or value
+
+    # Compact form of the polygon for the point-in-polygon checks, None without polygon
+    @property
+    def polygon_area(self):
+        return self._polygon if isinstance(self._polygon, CompactPolygon) else None
 
     @property
     def pathways_schema_version(self): return self._pathways_schema_version
@@ -179,7 +224,9 @@ class Request:
     def pathways_schema_version(self, value): self._pathways_schema_version = value
 
 
-class Meta:
+class Meta(SerializerModel):
+    __slots__ = ('_file_upload_path', '_isValid', '_validationMessage', 'validationTime')
+
     def __init__(self, data: dict):
         self._file_upload_path = data.get('file_upload_path', '')
         self._isValid = False
@@ -205,7 +252,8 @@ class Meta:
     def validationMessage(self, value): self._validationMessage = value
 
 
-class Response:
+class Response(SerializerModel):
+    __slots__ = ('_success', '_message')
 
     def __init__(self, data: dict):
         self._success = data.get('success', False)
@@ -0,0 +1,98 @@
+import io
+import csv
+import zipfile
+from array import array
+from typing import Optional
+from .polygon import CompactPolygon
+from .pathways_precheck import _find_member, _to_int, MAX_SAMPLE_NOTICES
+
+STOP_OUTSIDE_POLYGON = 'stop_outside_polygon'
+
+
+# Columns of stops.txt needed by the check, read with a plain csv reader:
+# the coordinates go to arrays of doubles, the other columns are only kept
+# for the rows reported
+class StopCoordinates:
+    __slots__ = ('lons', 'lats', 'rows', 'stop_ids', 'stop_names', 'location_types')
+
+    def __init__(self):
+        self.lons = array('d')
+        self.lats = array('d')
+        # csv row numbers, the header is row 1 as in the canonical validator report
+        self.rows = array('l')
+        self.stop_ids = []
+        self.stop_names = []
+        self.location_types = []
+
+    # Stops without or with invalid coordinates are skipped, the canonical
+    # validator reports them
+    @classmethod
+    def read(cls, archive: zipfile.ZipFile, member: zipfile.ZipInfo) -> 'StopCoordinates':
+        stops = cls()
+        with archive.open(member) as raw:
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+            header = next(reader, [])
+            columns = {name.strip(): position for position, name in enumerate(header)}
+            if 'stop_lat' not in columns or 'stop_lon' not in columns:
+                return stops
+            lat_column, lon_column = columns['stop_lat'], columns['stop_lon']
+            optional = [columns.get(name) for name in ('stop_id', 'stop_name', 'location_type')]
+            width = max(lat_column, lon_column)
+            for row_number, row in enumerate(reader, start=2):
+                if len(row) <= width:
+                    continue
+                try:
+                    lat, lon = float(row[lat_column]), float(row[lon_column])
+                except ValueError:
+                    continue
+                stop_id, stop_name, location_type = (row[column] if column is not None and column < len(row)
+                                                     else '' for column in optional)
+                stops.lats.append(lat)
+                stops.lons.append(lon)
+                stops.rows.append(row_number)
+                stops.stop_ids.append(stop_id)
+                stops.stop_names.append(stop_name)
+                stops.location_types.append(location_type)
+        return stops
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# Checks that the stops of the feed (stations, platforms, entrances, pathway
+# nodes...) lie inside the polygon of the upload request. Stops outside are
+# reported as `stop_outside_polygon` errors in the canonical validator format.
+class StopAreaCheck:
+    def __init__(self, polygon: CompactPolygon):
+        self.polygon = polygon
+
+    # None when the check is disabled or the request has no polygon, the
+    # polygon is the Request.polygon_area of the upload message
+    @classmethod
+    def from_settings(cls, settings, polygon_area: Optional[CompactPolygon]) -> Optional['StopAreaCheck']:
+        if not settings.stop_area_check_enabled or polygon_area is None or polygon_area.bbox is None:
+            return None
+        return cls(polygon_area)
+
+    def validate(self, zip_file: str) -> list:
+        with zipfile.ZipFile(zip_file) as archive:
+            member = _find_member(archive, 'stops.txt')
+            if member is None:
+                return []
+            stops = StopCoordinates.read(archive, member)
+        outside = self.polygon.outside(stops.lons, stops.lats)
+        if not outside:
+            return []
+        return [{
+            'code': STOP_OUTSIDE_POLYGON,
+            'severity': 'ERROR',
+            'totalNotices': len(outside),
+            'sampleNotices': [{
+                'csvRowNumber': stops.rows[position],
+                'stopId': stops.stop_ids[position],
+                'stopName': stops.stop_names[position],
+                'locationType': _to_int(stops.location_types[position]),
+                'stopLat': stops.lats[position],
+                'stopLon': stops.lons[position]
+            } for position in outside[:MAX_SAMPLE_NOTICES]]
+        }]
@@ -0,0 +1,100 @@
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from . import metrics
+
+logging.basicConfig()
+logger = logging.getLogger('UPLOAD_SCHEDULER')
+logger.setLevel(logging.INFO)
+
+FAST_LANE = 'fast'
+LARGE_LANE = 'large'
+
+
+class _Lane:
+    def __init__(self, name: str, slots: int):
+        self.name = name
+        self.slots = max(slots, 1)
+        self.running = {}
+        self.waiting = {}
+        self.last_served = {}
+        self.served = 0
+
+    def running_total(self) -> int:
+        return sum(self.running.values())
+
+    # Next ticket to run: the oldest ticket of the project group with the
+    # fewest uploads running in the lane, then of the group served least recently
+    def next_ticket(self) -> Optional[int]:
+        candidates = [(self.running.get(group, 0), self.last_served.get(group, -1), tickets[0])
+                      for group, tickets in self.waiting.items()]
+        return min(candidates)[2] if candidates else None
+
+    def start(self, project_group: str) -> None:
+        tickets = self.waiting[project_group]
+        tickets.popleft()
+        if not tickets:
+            del self.waiting[project_group]
+        self.running[project_group] = self.running.get(project_group, 0) + 1
+        self.last_served[project_group] = self.served
+        self.served += 1
+
+    def finish(self, project_group: str) -> None:
+        self.running[project_group] -= 1
+        if not self.running[project_group]:
+            del self.running[project_group]
+            if project_group not in self.waiting:
+                del self.last_served[project_group]
+
+
+# Runs the uploads in two lanes so a few large feeds cannot hold back the
+# small station level uploads: feeds of `large_file_bytes` or more run in
+# the large lane with `large_slots` concurrent validations, the others in the
+# fast lane. Inside a lane, a free slot goes to the project group with the
+# fewest running uploads and then to the group served least recently, the
+# uploads of a project group run in order.
+class UploadScheduler:
+
+    def __init__(self, large_file_bytes: int, fast_slots: int = 1, large_slots: int = 1):
+        self.large_file_bytes = large_file_bytes
+        self._lanes = {FAST_LANE: _Lane(FAST_LANE, fast_slots), LARGE_LANE: _Lane(LARGE_LANE, large_slots)}
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional['UploadScheduler']:
+        if not settings.scheduler_enabled:
+            return None
+        return cls(large_file_bytes=int(settings.scheduler_large_file_bytes),
+                   fast_slots=int(settings.max_concurrent_messages),
+                   large_slots=int(settings.scheduler_large_slots))
+
+    # Unknown sizes (storage without blob properties) run in the fast lane
+    def lane_for(self, size: Optional[int]) -> str:
+        if size is not None and size >= self.large_file_bytes:
+            return LARGE_LANE
+        return FAST_LANE
+
+    @contextmanager
+    def slot(self, size: Optional[int], project_group: str):
+        lane = self._lanes[self.lane_for(size)]
+        started_at = time.perf_counter()
+        with self._condition:
+            ticket = next(self._tickets)
+            lane.waiting.setdefault(project_group, deque()).append(ticket)
+            while lane.running_total() >= lane.slots or lane.next_ticket() != ticket:
+                self._condition.wait()
+            lane.start(project_group)
+            # the next waiter may take another free slot
+            self._condition.notify_all()
+        metrics.SCHEDULER_WAIT_SECONDS.labels(lane=lane.name).observe(time.perf_counter() - started_at)
+        try:
+            yield lane.name
+        finally:
+            with self._condition:
+                lane.finish(project_group)
+                self._condition.notify_all()
@@ -0,0 +1,210 @@
+import queue
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from typing import Callable, Any, Optional
+import psutil
+
+logging.basicConfig()
+logger = logging.getLogger('VALIDATION_EXECUTOR')
+logger.setLevel(logging.INFO)
+
+MB = 1024 * 1024
+
+
+# Runs validation jobs on the calling thread, this is the behaviour the
+# service had before the executors were introduced
+class InlineExecutor:
+    def __init__(self, context=None):
+        self.context = context
+
+    def run(self, fn: Callable, *args) -> Any:
+        return fn(self.context, *args)
+
+    def shutdown(self) -> None:
+        return
+
+
+# Runs validation jobs on a dedicated thread pool with a per job timeout.
+# A job that times out is reported as failed, the thread itself cannot be
+# interrupted and finishes in the background.
+class ThreadExecutor:
+    def __init__(self, context=None, workers: int = 1, timeout: Optional[float] = None):
+        self.context = context
+        self.timeout = timeout
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                           thread_name_prefix='validation')
+
+    def run(self, fn: Callable, *args) -> Any:
+        future = self._pool.submit(fn, self.context, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f'Validation did not complete within {self.timeout} seconds')
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker_main(connection, context_factory: Callable) -> None:
+    context = context_factory() if context_factory else None
+    process = psutil.Process()
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        fn, args = job
+        try:
+            outcome = (True, fn(context, *args))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            connection.send((outcome, process.memory_info().rss))
+        except Exception as e:
+            # result or exception could not be pickled
+            connection.send(((False, RuntimeError(str(e))), process.memory_info().rss))
+
+
+class _Worker:
+    def __init__(self, mp_context, context_factory: Callable):
+        self.connection, child_connection = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_connection, context_factory),
+                                          daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.jobs = 0
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+# Runs validation jobs in a pool of worker processes so validations do not
+# share the GIL with the subscriber. Each worker builds its own context with
+# `context_factory` (storage client, cache ...), workers are killed when a job
+# exceeds `timeout` and recycled after `max_jobs_per_worker` jobs or once their
+# RSS exceeds `max_rss_mb`. Jobs and their arguments must be picklable.
+class ProcessExecutor:
+    def __init__(self, context_factory: Callable = None, workers: int = 1, timeout: Optional[float] = None,
+                 max_jobs_per_worker: int = 0, max_rss_mb: int = 0):
+        self.context_factory = context_factory
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self._mp_context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = set()
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._mp_context, self.context_factory)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(kill=kill)
+
+    def _needs_recycle(self, worker: _Worker, rss: int) -> bool:
+        if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+            logger.info(f' Recycling worker {worker.process.pid} after {worker.jobs} jobs')
+            return True
+        if self.max_rss_mb and rss > self.max_rss_mb * MB:
+            logger.info(f' Recycling worker {worker.process.pid} using {rss // MB} MB')
+            return True
+        return False
+
+    def run(self, fn: Callable, *args) -> Any:
+        if self._closed:
+            raise concurrent.futures.CancelledError('Validation executor is shut down')
+        worker = self._idle.get()
+        if worker is None:
+            # wake up the next caller waiting for a worker
+            self._idle.put(None)
+            raise concurrent.futures.CancelledError('Validation executor is shut down')
+        healthy = False
+        recycle = False
+        try:
+            worker.connection.send((fn, args))
+            if not worker.connection.poll(self.timeout):
+                raise TimeoutError(f'Validation did not complete within {self.timeout} seconds')
+            (success, value), rss = worker.connection.recv()
+            worker.jobs += 1
+            recycle = self._needs_recycle(worker, rss)
+            healthy = not recycle
+        except TimeoutError:
+            raise
+        except (EOFError, OSError):
+            if self._closed:
+                raise concurrent.futures.CancelledError('Validation executor is shut down')
+            raise RuntimeError('Validation worker exited unexpectedly')
+        finally:
+            if self._closed:
+                self._retire(worker, kill=True)
+                self._idle.put(None)
+            elif healthy:
+                self._idle.put(worker)
+            else:
+                self._retire(worker, kill=not recycle)
+                self._idle.put(self._spawn())
+        if not success:
+            raise value
+        return value
+
+    # Stops all workers, jobs still running are cancelled
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            self._retire(worker, kill=True)
+        self._idle.put(None)
+
+
+# VALIDATION_WORKERS, one per concurrent message by default. With the upload
+# scheduler the fast and the large lanes run at the same time, so there are at
+# least as many workers as slots in both lanes: large feeds cannot take the
+# workers of the fast lane.
+def validation_workers(settings) -> int:
+    slots = int(settings.max_concurrent_messages)
+    if settings.scheduler_enabled:
+        slots += int(settings.scheduler_large_slots)
+    workers = int(settings.validation_workers) or slots
+    if settings.scheduler_enabled and workers < slots:
+        logger.warning(f' {workers} validation workers for {slots} scheduler slots, using {slots} workers')
+        workers = slots
+    return workers
+
+
+def create_executor(settings, context=None, context_factory: Callable = None):
+    mode = settings.validation_executor
+    if mode not in ('thread', 'process'):
+        return InlineExecutor(context=context)
+    workers = validation_workers(settings)
+    timeout = float(settings.validation_timeout_seconds) or None
+    logger.info(f' Starting {mode} executor with {workers} workers')
+    if mode == 'thread':
+        return ThreadExecutor(context=context, workers=workers, timeout=timeout)
+    return ProcessExecutor(context_factory=context_factory, workers=workers, timeout=timeout,
+                           max_jobs_per_worker=int(settings.worker_max_jobs),
+                           max_rss_mb=int(settings.worker_max_rss_mb))
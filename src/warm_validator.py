@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Callable
+import requests
+from gtfs_canonical_validator import CanonicalValidator
+from gtfs_canonical_validator.constants import Constants
+from gtfs_canonical_validator.models.response import Response
+
+logging.basicConfig()
+logger = logging.getLogger('WARM_VALIDATOR')
+logger.setLevel(logging.INFO)
+
+
+@dataclass
+class ValidatorJob:
+    job_id: str
+    url: str
+    created_at: float
+
+
+# Drop-in for `CanonicalValidator(zip_file).validate()` without its per feed
+# startup: the canonical validator creates a validation job on the
+# MobilityData service (a blocking round trip) when it is constructed and opens
+# new connections for every request. This keeps `pool_size` jobs created
+# ahead of time by a background thread and sends the requests over one
+# keep-alive session. Jobs older than `job_max_age_seconds` are discarded
+# before their upload URL expires. Sessions are not thread-safe, so each
+# thread uses its own session, and the sessions are recycled after
+# `max_failures` consecutive failed requests. Every request is sent with the
+# canonical validator timeout so a stalled connection cannot hold a worker.
+class WarmValidator:
+
+    def __init__(self, pool_size: int = 2, job_max_age_seconds: float = 600, refill_interval_seconds: float = 30,
+                 max_failures: int = 3, session_factory: Callable = requests.Session):
+        self.pool_size = max(pool_size, 0)
+        self.job_max_age_seconds = job_max_age_seconds
+        self.refill_interval_seconds = refill_interval_seconds
+        self.max_failures = max_failures
+        self.session_factory = session_factory
+        self.failures = 0
+        # session of each thread, all the sessions opened are tracked so they can
+        # be closed, a thread replaces its session once `_generation` changed
+        self._local = threading.local()
+        self._sessions = set()
+        self._generation = 0
+        self._jobs = deque()
+        self._lock = threading.Lock()
+        self._wanted = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional['WarmValidator']:
+        if not settings.warm_validator_enabled:
+            return None
+        return cls(pool_size=int(settings.warm_validator_pool_size),
+                   job_max_age_seconds=float(settings.warm_validator_job_max_age_seconds))
+
+    def start(self) -> None:
+        if self._thread is None and self.pool_size:
+            self._thread = threading.Thread(target=self._refill, name='warm-validator', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wanted.set()
+        with self._lock:
+            sessions, self._sessions = self._sessions, set()
+        for session in sessions:
+            session.close()
+
+    # Healthy as long as the last requests to the validator succeeded
+    @property
+    def healthy(self) -> bool:
+        return self.failures < self.max_failures
+
+    def session(self) -> requests.Session:
+        local = self._local
+        session = getattr(local, 'session', None)
+        if session is not None and local.generation == self._generation:
+            return session
+        if session is not None:
+            self._discard(session)
+        session = self.session_factory()
+        with self._lock:
+            self._sessions.add(session)
+            local.session, local.generation = session, self._generation
+        return session
+
+    def _discard(self, session: requests.Session) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+        session.close()
+
+    def _record(self, succeeded: bool) -> None:
+        with self._lock:
+            if succeeded:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures < self.max_failures:
+                return
+            logger.warning(f' Recycling the validator sessions after {self.failures} failures')
+            # the other threads replace their session on their next request
+            self._generation += 1
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            self._local.session = None
+            self._discard(session)
+
+    def create_job(self) -> ValidatorJob:
+        try:
+            with self.session().post(Constants.JOB_URL, json={'countryCode': 'US'},
+                                     timeout=Constants.timeout) as response:
+                response.raise_for_status()
+                job = response.json()
+        except requests.exceptions.RequestException:
+            self._record(False)
+            raise
+        self._record(True)
+        return ValidatorJob(job_id=job['jobId'], url=job['url'], created_at=time.monotonic())
+
+    # A job created ahead of time, or a new one when the pool is empty
+    def take_job(self) -> ValidatorJob:
+        expired_before = time.monotonic() - self.job_max_age_seconds
+        with self._lock:
+            while self._jobs:
+                job = self._jobs.popleft()
+                if job.created_at >= expired_before:
+                    break
+            else:
+                job = None
+        self._wanted.set()
+        return job or self.create_job()
+
+    def _refill(self) -> None:
+        while not self._stopped.is_set():
+            expired_before = time.monotonic() - self.job_max_age_seconds
+            with self._lock:
+                while self._jobs and self._jobs[0].created_at < expired_before:
+                    self._jobs.popleft()
+                missing = self.pool_size - len(self._jobs)
+            for _ in range(missing):
+                try:
+                    job = self.create_job()
+                except requests.exceptions.RequestException as e:
+                    logger.error(f' Unable to create a validation job: {e}')
+                    break
+                with self._lock:
+                    self._jobs.append(job)
+            self._wanted.wait(self.refill_interval_seconds)
+            self._wanted.clear()
+
+    def validate(self, zip_file: str) -> Response:
+        response = Response()
+        try:
+            job = self.take_job()
+        except requests.exceptions.RequestException as e:
+            response.error = f'Error: {e}'
+            return response
+        try:
+            # the file is streamed from disk instead of read into memory
+            with open(zip_file, 'rb') as file, \
+                    self.session().put(job.url, headers={'Content-Type': 'application/octet-stream'},
+                                       data=file, timeout=Constants.timeout) as upload:
+                upload.raise_for_status()
+        except (IOError, requests.exceptions.RequestException) as e:
+            self._record(False)
+            logger.error(f' Failed to upload the file: {e}')
+            response.error = f'Error uploading file: {e}'
+            return response
+        self._record(True)
+        logger.info(f' File uploaded with JOB ID: {job.job_id}')
+
+        report = self.report(job.job_id)
+        if report is None:
+            response.error = f'Error: no validation report for job {job.job_id}'
+            return response
+        errors = CanonicalValidator.parse_errors(report['notices'])
+        response.info = report['notices']
+        if errors:
+            response.error = errors
+        else:
+            response.status = True
+        return response
+
+    # The report is published once the job completes, polled as the
+    # canonical validator does
+    def report(self, job_id: str) -> Optional[dict]:
+        url = Constants().get_result_url(job_id=job_id)
+        for attempt in range(Constants.max_retries + 1):
+            try:
+                with self.session().get(url, timeout=Constants.timeout) as response:
+                    response.raise_for_status()
+                    return response.json()
+            except requests.exceptions.RequestException as e:
+                logger.info(f' Validation result not available yet ({attempt + 1}): {e}')
+                if self._stopped.is_set() or attempt == Constants.max_retries:
+                    break
+                time.sleep(Constants.timeout)
+        return None
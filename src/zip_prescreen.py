@@ -0,0 +1,92 @@
+import os
+import logging
+import zipfile
+from typing import Optional
+
+logging.basicConfig()
+logger = logging.getLogger('ZIP_PRESCREEN')
+logger.setLevel(logging.INFO)
+
+GB = 1024 * 1024 * 1024
+
+# bit 0 of the general purpose flags of a zip member
+ENCRYPTED_FLAG = 0x1
+
+
+# Cheap screening of an upload that only reads the central directory of the
+# zip: the file must be a readable zip archive with the required files, and
+# neither the declared uncompressed sizes nor the compression ratios may
+# exceed the limits (zip bomb guard). The returned errors use the same
+# format as the canonical validator report.
+class ZipPrescreen:
+
+    def __init__(self, max_members: int = 1000, max_uncompressed_bytes: int = 4 * GB,
+                 max_compression_ratio: float = 500, required_files: tuple = ('stops.txt',)):
+        self.max_members = max_members
+        self.max_uncompressed_bytes = max_uncompressed_bytes
+        self.max_compression_ratio = max_compression_ratio
+        self.required_files = tuple(required_files)
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional['ZipPrescreen']:
+        if not settings.zip_prescreen_enabled:
+            return None
+        required_files = ['stops.txt']
+        if settings.zip_prescreen_require_pathways:
+            required_files.append('pathways.txt')
+        return cls(max_members=int(settings.zip_prescreen_max_members),
+                   max_uncompressed_bytes=int(settings.zip_prescreen_max_uncompressed_bytes),
+                   max_compression_ratio=float(settings.zip_prescreen_max_compression_ratio),
+                   required_files=required_files)
+
+    def screen(self, zip_file: str) -> list:
+        archive_size = os.path.getsize(zip_file)
+        try:
+            with zipfile.ZipFile(zip_file) as archive:
+                members = archive.infolist()
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError, EOFError) as e:
+            return [_error('invalid_zip', {'filename': os.path.basename(zip_file), 'message': str(e)})]
+
+        members = [member for member in members if not member.filename.startswith('__MACOSX')]
+        if len(members) > self.max_members:
+            return [_error('zip_too_many_members', {'memberCount': len(members), 'maxMembers': self.max_members})]
+
+        errors = []
+        total_uncompressed = sum(member.file_size for member in members)
+        if total_uncompressed > self.max_uncompressed_bytes:
+            errors.append(_error('zip_uncompressed_size_exceeded', {
+                'uncompressedBytes': total_uncompressed, 'maxUncompressedBytes': self.max_uncompressed_bytes}))
+
+        for member in members:
+            if member.flag_bits & ENCRYPTED_FLAG:
+                errors.append(_error('zip_encrypted_member', {'filename': member.filename}))
+            if member.header_offset + member.compress_size > archive_size:
+                errors.append(_error('invalid_zip', {'filename': member.filename,
+                                                     'message': 'Member data is outside of the archive'}))
+            ratio = member.file_size / max(member.compress_size, 1)
+            if ratio > self.max_compression_ratio:
+                errors.append(_error('zip_compression_ratio_exceeded', {
+                    'filename': member.filename, 'compressionRatio': round(ratio, 1),
+                    'maxCompressionRatio': self.max_compression_ratio}))
+
+        filenames = {member.filename.rsplit('/', 1)[-1] for member in members if not member.is_dir()}
+        for required_file in self.required_files:
+            if required_file not in filenames:
+                errors.append(_error('missing_required_file', {'filename': required_file}))
+        return _merge(errors)
+
+
+def _error(code: str, notice: dict) -> dict:
+    return {'code': code, 'severity': 'ERROR', 'totalNotices': 1, 'sampleNotices': [notice]}
+
+
+# One error per code with all its notices, as reported by the canonical validator
+def _merge(errors: list) -> list:
+    merged = {}
+    for error in errors:
+        if error['code'] in merged:
+            merged[error['code']]['totalNotices'] += 1
+            merged[error['code']]['sampleNotices'].extend(error['sampleNotices'])
+        else:
+            merged[error['code']] = error
+    return list(merged.values())
@@ -1,5 +1,10 @@
+import os
+import json
 import unittest
 from src.models.file_upload_msg import FileUploadMsg, IncomingData
+from src.serializer.gtfs_pathways_serializer import Request
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../src/assets')
 
 
 class TestFileUploadMsg(unittest.TestCase):
@@ -76,6 +81,20 @@ class TestFileUploadMsg(unittest.TestCase):
         self.assertIsNone(result.messageType)
         self.assertIsNone(result.data)
 
+    def test_from_dict_with_published_date(self):
+        # Arrange
+        input_data = {
+            'messageId': '12345',
+            'messageType': 'file_upload',
+            'publishedDate': '2023-02-08T08:33:36.267213Z'
+        }
+
+        # Act
+        result = FileUploadMsg.from_dict(input_data)
+
+        # Assert
+        self.assertEqual(result.publishedDate, '2023-02-08T08:33:36.267213Z')
+
     def test_incoming_data_default_tdei_project_group_id(self):
         # Arrange
         incoming_data = IncomingData(
@@ -87,6 +106,23 @@ class TestFileUploadMsg(unittest.TestCase):
         self.assertEqual(incoming_data.file_upload_path, '/path/to/file')
         self.assertEqual(incoming_data.user_id, 'user_001')
         self.assertEqual(incoming_data.tdei_project_group_id, '')
+        self.assertIsNone(incoming_data.request)
+        self.assertIsNone(incoming_data.polygon_area)
+
+    def test_from_dict_with_upload_request(self):
+        # request block of the upload message, see src/assets/msg-gtfs-pathways-validation.json
+        with open(os.path.join(ASSETS, 'msg-gtfs-pathways-validation.json')) as f:
+            upload_request = json.load(f)['data']['request']
+        with open(os.path.join(ASSETS, 'request-msg.json')) as f:
+            input_data = json.load(f)
+        input_data['data']['request'] = upload_request
+
+        result = FileUploadMsg.from_dict(input_data)
+
+        self.assertIsInstance(result.data.request, Request)
+        self.assertEqual(result.data.request.polygon, upload_request['polygon'])
+        self.assertTrue(result.data.polygon_area.contains(77.588, 12.972))
+        self.assertFalse(result.data.polygon_area.contains(77.6, 12.972))
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,124 @@
+import threading
+import unittest
+import concurrent.futures
+from unittest.mock import MagicMock
+from src.async_pipeline import AsyncPipeline
+
+
+def published(value=None, error=None):
+    future = concurrent.futures.Future()
+    if error:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    return future
+
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.published = []
+        self.download = MagicMock(side_effect=lambda path: f'/downloads/{path}')
+        self.validate = MagicMock(return_value=(True, ''))
+
+    def publish(self, message, is_valid, validation_message, *extra):
+        self.published.append((message, is_valid, validation_message, *extra))
+        return published()
+
+    def create_pipeline(self, **kwargs):
+        pipeline = AsyncPipeline(download=self.download, validate=self.validate, publish=self.publish, **kwargs)
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def test_stages_run_in_order(self):
+        pipeline = self.create_pipeline()
+
+        pipeline.process('message', 'feed.zip')
+
+        self.download.assert_called_once_with('feed.zip')
+        self.validate.assert_called_once_with('message', 'feed.zip', '/downloads/feed.zip')
+        self.assertEqual(self.published, [('message', True, '')])
+
+    def test_extra_results_are_published(self):
+        self.validate.return_value = (True, '', 'rules-1')
+        pipeline = self.create_pipeline()
+
+        pipeline.process('message', 'feed.zip')
+
+        self.assertEqual(self.published, [('message', True, '', 'rules-1')])
+
+    def test_download_overlaps_validation(self):
+        validating = threading.Event()
+        second_downloaded = threading.Event()
+
+        def download(path):
+            if path == 'second.zip':
+                second_downloaded.set()
+            return path
+
+        def validate(message, path, downloaded_file_path):
+            if path == 'first.zip':
+                validating.set()
+                # the next message is downloaded while this one is validated
+                self.assertTrue(second_downloaded.wait(timeout=5))
+            return True, ''
+
+        self.download.side_effect = download
+        self.validate.side_effect = validate
+        pipeline = self.create_pipeline(validation_workers=1)
+        first = threading.Thread(target=pipeline.process, args=('first', 'first.zip'))
+        first.start()
+        self.assertTrue(validating.wait(timeout=5))
+
+        pipeline.process('second', 'second.zip')
+        first.join(timeout=5)
+
+        self.assertEqual(sorted(message for message, _, _ in self.published), ['first', 'second'])
+
+    def test_failed_validation_is_published_as_invalid(self):
+        self.validate.side_effect = RuntimeError('worker died')
+        pipeline = self.create_pipeline()
+
+        pipeline.process('message', 'feed.zip')
+
+        self.assertEqual(self.published, [('message', False, 'worker died')])
+
+    def test_failed_download_skips_validation(self):
+        self.download.side_effect = OSError('no space left')
+        pipeline = self.create_pipeline()
+
+        pipeline.process('message', 'feed.zip')
+
+        self.validate.assert_not_called()
+        self.assertEqual(self.published, [('message', False, 'no space left')])
+
+    def test_publish_failure_is_raised(self):
+        pipeline = AsyncPipeline(download=self.download, validate=self.validate,
+                                 publish=lambda *args: published(error=ConnectionError('topic unavailable')))
+        self.addCleanup(pipeline.close)
+
+        with self.assertRaises(ConnectionError):
+            pipeline.process('message', 'feed.zip')
+
+    def test_process_after_close(self):
+        pipeline = self.create_pipeline()
+        pipeline.close()
+
+        with self.assertRaises(concurrent.futures.CancelledError):
+            pipeline.process('message', 'feed.zip')
+
+    def test_from_settings(self):
+        settings = MagicMock(validation_workers=0, max_concurrent_messages=3, pipeline_download_workers=2,
+                             pipeline_queue_size=4, scheduler_enabled=False)
+
+        pipeline = AsyncPipeline.from_settings(settings, download=self.download, validate=self.validate,
+                                               publish=self.publish)
+        self.addCleanup(pipeline.close)
+
+        self.assertEqual(pipeline.validation_workers, 3)
+        self.assertEqual(pipeline.download_workers, 2)
+        self.assertEqual(pipeline.queue_size, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src import batch_validation
+from src.batch_validation import LocalStorageClient, collect_feeds, read_checkpoint, run, main
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+SAVED_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBatchValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.feeds = os.path.join(self.folder, 'feeds')
+        os.makedirs(os.path.join(self.feeds, 'nested'))
+        shutil.copyfile(os.path.join(SAVED_FILE_PATH, 'pathways-good.zip'), os.path.join(self.feeds, 'a.zip'))
+        shutil.copyfile(os.path.join(SAVED_FILE_PATH, 'pathways-good.zip'),
+                        os.path.join(self.feeds, 'nested', 'b.zip'))
+        with open(os.path.join(self.feeds, 'notes.txt'), 'w') as f:
+            f.write('not a feed')
+        self.output = os.path.join(self.folder, 'results.jsonl')
+        self.checkpoint = f'{self.output}.checkpoint'
+        batch_validation._context = None
+
+    def tearDown(self):
+        batch_validation._context = None
+        shutil.rmtree(self.folder)
+
+    def test_local_storage_client(self):
+        feed = os.path.join(self.feeds, 'a.zip')
+        file = LocalStorageClient().get_file_from_url('gtfspathways', feed)
+        self.assertEqual(file.file_path, feed)
+        with open(feed, 'rb') as f, file.get_stream() as stream:
+            self.assertEqual(stream.read(), f.read())
+
+    def test_collect_feeds(self):
+        manifest = os.path.join(self.folder, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write(f'# archive\n{self.feeds}/a.zip\n\n/archive/c.zip\n')
+        feeds = collect_feeds([self.feeds], manifest)
+        self.assertEqual(feeds, [os.path.join(self.feeds, 'a.zip'), os.path.join(self.feeds, 'nested', 'b.zip'),
+                                 '/archive/c.zip'])
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_run_and_resume(self, mock_canonical_validator):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(status=True, error=None)
+        feeds = collect_feeds([self.feeds])
+
+        summary = run(feeds, self.output, self.checkpoint, workers=0)
+
+        self.assertEqual((summary['feeds'], summary['valid'], summary['failed']), (2, 2, 0))
+        lines = read_lines(self.output)
+        self.assertEqual([line['type'] for line in lines], ['feed', 'feed', 'summary'])
+        self.assertTrue(all(line['valid'] for line in lines[:2]))
+        self.assertEqual(read_checkpoint(self.checkpoint), set(feeds))
+
+        # an interrupted run resumes with the feeds not checkpointed yet
+        summary = run(feeds, self.output, self.checkpoint, workers=0)
+        self.assertEqual(summary['feeds'], 0)
+        self.assertEqual(mock_canonical_validator.call_count, 2)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_validator_failure_is_retried(self, mock_canonical_validator):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(
+            status=False, error='Error uploading file: timeout')
+        feed = os.path.join(self.feeds, 'a.zip')
+
+        status = main([feed, '--output', self.output, '--workers', '0'])
+
+        self.assertEqual(status, 1)
+        record, summary = read_lines(self.output)
+        self.assertFalse(record['valid'])
+        self.assertEqual(record['error'], 'Error uploading file: timeout')
+        self.assertEqual((summary['invalid'], summary['failed']), (0, 1))
+        self.assertEqual(read_checkpoint(self.checkpoint), set())
+
+        # the next run validates the feed again
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(status=True, error=None)
+        self.assertEqual(main([feed, '--output', self.output, '--workers', '0']), 0)
+        self.assertEqual(read_checkpoint(self.checkpoint), {feed})
+
+    def test_no_feeds(self):
+        empty = os.path.join(self.folder, 'empty')
+        os.makedirs(empty)
+        with self.assertRaises(SystemExit):
+            main([empty])
+
+    def test_missing_feed_is_reported_as_failed(self):
+        summary = run([os.path.join(self.folder, 'missing.zip')], self.output, self.checkpoint, workers=0)
+        self.assertEqual(summary['failed'], 1)
+        self.assertIn('FileNotFoundError', read_lines(self.output)[0]['error'])
+
+    def test_failed_validation_is_reported(self):
+        with patch.object(GTFSPathwaysValidation, 'validate', side_effect=RuntimeError('boom')):
+            status = main([os.path.join(self.feeds, 'a.zip'), '--output', self.output, '--workers', '0'])
+        self.assertEqual(status, 1)
+        record, summary = read_lines(self.output)
+        self.assertEqual(record['error'], 'RuntimeError: boom')
+        self.assertEqual(summary['failed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.blob_download import stream_to_file, DownloadStats
+from python_ms_core.core.storage.providers.azure.azure_file_entity import AzureFileEntity
+
+
+class FakeDownloader:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def readinto(self, stream):
+        stream.write(self.content)
+        return len(self.content)
+
+
+class FakeBlobClient:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.ranges = []
+
+    def get_blob_properties(self):
+        return MagicMock(size=len(self.content))
+
+    def download_blob(self, offset=None, length=None):
+        self.ranges.append((offset, length))
+        return FakeDownloader(self.content[offset:offset + length])
+
+
+class TestStreamToFile(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.destination = os.path.join(self.folder, 'feed.zip')
+
+    def tearDown(self):
+        if os.path.exists(self.destination):
+            os.remove(self.destination)
+        os.rmdir(self.folder)
+
+    def test_azure_blob_is_streamed_in_chunks(self):
+        # Arrange
+        content = os.urandom(10_000)
+        blob_client = FakeBlobClient(content)
+        file = AzureFileEntity('feed.zip', blob_client=blob_client)
+
+        # Act
+        stats = stream_to_file(file, self.destination, chunk_size=4096)
+
+        # Assert
+        self.assertEqual(blob_client.ranges, [(0, 4096), (4096, 4096), (8192, 1808)])
+        self.assertEqual(stats.bytes_written, len(content))
+        self.assertEqual(stats.chunks, 3)
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_other_providers_fall_back_to_get_stream(self):
+        # Arrange
+        file = MagicMock()
+        file.get_stream.return_value = b'file_content'
+
+        # Act
+        stats = stream_to_file(file, self.destination)
+
+        # Assert
+        file.get_stream.assert_called_once()
+        self.assertEqual(stats.bytes_written, len(b'file_content'))
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), b'file_content')
+
+    def test_file_object_is_copied_in_chunks(self):
+        # Arrange
+        content = os.urandom(10 * 1024 + 3)
+        stream = io.BytesIO(content)
+        file = MagicMock()
+        file.get_stream.return_value = stream
+
+        # Act
+        stats = stream_to_file(file, self.destination, chunk_size=1024)
+
+        # Assert
+        self.assertEqual(stats.bytes_written, len(content))
+        self.assertEqual(stats.chunks, 11)
+        self.assertTrue(stream.closed)
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_text_stream_is_encoded(self):
+        # Arrange
+        file = MagicMock()
+        file.get_stream.return_value = 'text content'
+
+        # Act
+        stream_to_file(file, self.destination)
+
+        # Assert
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), b'text content')
+
+    @patch('src.blob_download.os.fsync')
+    def test_fsync_is_optional(self, mock_fsync):
+        # Arrange
+        file = MagicMock()
+        file.get_stream.return_value = b'file_content'
+
+        # Act
+        stream_to_file(file, self.destination)
+        mock_fsync.assert_not_called()
+        stream_to_file(file, self.destination, fsync=True)
+
+        # Assert
+        mock_fsync.assert_called_once()
+
+    def test_rss_high_water_mark(self):
+        stats = DownloadStats(start_rss_bytes=100, peak_rss_bytes=150)
+        self.assertEqual(stats.rss_high_water_mark_bytes, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
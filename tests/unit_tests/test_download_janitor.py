@@ -0,0 +1,174 @@
+import os
+import errno
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.download_janitor import resolve_download_root, has_free_space, sweep_orphaned_downloads, DownloadJanitor
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+
+class TestSweepOrphanedDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def make_folder(self, name, age_seconds):
+        folder = os.path.join(self.root, name)
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'feed.zip'), 'wb') as f:
+            f.write(b'zip')
+        modified_at = time.time() - age_seconds
+        os.utime(folder, (modified_at, modified_at))
+        return folder
+
+    def test_only_old_folders_are_removed(self):
+        orphan = self.make_folder('orphan', age_seconds=7200)
+        in_progress = self.make_folder('in-progress', age_seconds=10)
+
+        removed = sweep_orphaned_downloads(self.root, max_age_seconds=3600)
+
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(in_progress))
+
+    def test_missing_root(self):
+        self.assertEqual(sweep_orphaned_downloads(os.path.join(self.root, 'missing'), 3600), 0)
+
+    def test_janitor_sweeps_on_start(self):
+        orphan = self.make_folder('orphan', age_seconds=7200)
+        janitor = DownloadJanitor(root=self.root, interval_seconds=60, max_age_seconds=3600)
+
+        janitor.start()
+        janitor.stop()
+        janitor._thread.join(timeout=5)
+
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_janitor_disabled(self):
+        settings = MagicMock(download_janitor_interval_seconds=0)
+        self.assertIsNone(DownloadJanitor.from_settings(settings, root=self.root))
+
+
+class TestResolveDownloadRoot(unittest.TestCase):
+
+    def test_disk_backend(self):
+        self.assertEqual(resolve_download_root('disk', '/app/downloads', '/dev/shm/pathways'), '/app/downloads')
+
+    def test_tmpfs_backend(self):
+        with tempfile.TemporaryDirectory() as tmpfs:
+            tmpfs_path = os.path.join(tmpfs, 'pathways')
+            self.assertEqual(resolve_download_root('tmpfs', '/app/downloads', tmpfs_path), tmpfs_path)
+
+    def test_tmpfs_fallback(self):
+        self.assertEqual(resolve_download_root('tmpfs', '/app/downloads', '/missing/tmpfs/pathways'),
+                         '/app/downloads')
+
+
+class TestHasFreeSpace(unittest.TestCase):
+
+    def test_unknown_size_fits(self):
+        self.assertTrue(has_free_space('/missing/tmpfs/pathways', None))
+
+    def test_size_within_free_space(self):
+        with tempfile.TemporaryDirectory() as tmpfs:
+            self.assertTrue(has_free_space(os.path.join(tmpfs, 'pathways'), 1))
+
+    def test_size_over_free_space(self):
+        with tempfile.TemporaryDirectory() as tmpfs:
+            free = shutil.disk_usage(tmpfs).free
+            self.assertFalse(has_free_space(tmpfs, free + 1024 ** 3))
+
+
+class TestDownloadCleanUp(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.file_path = 'feed.zip'
+        self.validator.file_relative_path = 'feed.zip'
+        self.validator.container_name = 'container'
+        self.validator.download_root = self.root
+        self.validator.settings = MagicMock()
+        self.validator.settings.get_unique_id.return_value = 'unique'
+        self.validator.storage_client = MagicMock()
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up', side_effect=shutil.rmtree)
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+        shutil.rmtree(self.root)
+
+    def test_failed_download_removes_folder(self):
+        self.validator.storage_client.get_file_from_url.side_effect = ConnectionError('storage unavailable')
+
+        self.assertIsNone(self.validator.download_single_file('feed.zip'))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_full_tmpfs_downloads_to_disk(self):
+        disk = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk)
+        file = self.validator.storage_client.get_file_from_url.return_value
+        file.file_path = 'feed.zip'
+        file.get_stream.return_value = b'feed'
+
+        with patch('src.gtfs_pathways_validation.DOWNLOAD_FILE_PATH', disk), \
+                patch('src.gtfs_pathways_validation.blob_size', return_value=1024), \
+                patch('src.gtfs_pathways_validation.has_free_space', return_value=False):
+            downloaded_file_path = self.validator.download_single_file('feed.zip')
+
+        self.assertEqual(downloaded_file_path, os.path.join(disk, 'unique', 'feed.zip'))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_enospc_on_tmpfs_retries_on_disk(self):
+        disk = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk)
+        file = self.validator.storage_client.get_file_from_url.return_value
+        file.file_path = 'feed.zip'
+        file.get_stream.side_effect = [OSError(errno.ENOSPC, 'No space left on device'), b'feed']
+
+        with patch('src.gtfs_pathways_validation.DOWNLOAD_FILE_PATH', disk):
+            downloaded_file_path = self.validator.download_single_file('feed.zip')
+
+        self.assertEqual(downloaded_file_path, os.path.join(disk, 'unique', 'feed.zip'))
+        with open(downloaded_file_path, 'rb') as downloaded:
+            self.assertEqual(downloaded.read(), b'feed')
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_enospc_on_disk_is_not_retried(self):
+        file = self.validator.storage_client.get_file_from_url.return_value
+        file.file_path = 'feed.zip'
+        file.get_stream.side_effect = OSError(errno.ENOSPC, 'No space left on device')
+
+        with patch('src.gtfs_pathways_validation.DOWNLOAD_FILE_PATH', self.root):
+            self.assertIsNone(self.validator.download_single_file('feed.zip'))
+
+        self.assertEqual(file.get_stream.call_count, 1)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_failed_download_is_reported(self):
+        is_valid, message = self.validator.validate_downloaded_file(None)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(message, 'Unable to download the file')
+
+    def test_folder_removed_when_validation_raises(self):
+        folder = os.path.join(self.root, 'unique')
+        os.makedirs(folder)
+        downloaded_file_path = os.path.join(folder, 'feed.zip')
+        open(downloaded_file_path, 'wb').close()
+        self.validator.run_canonical_validation = MagicMock(side_effect=RuntimeError('validator crashed'))
+
+        with self.assertRaises(RuntimeError):
+            self.validator.validate_downloaded_file(downloaded_file_path)
+
+        self.assertFalse(os.path.exists(folder))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import os
 import json
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import patch
 from src.serializer.gtfs_pathways_serializer import GTFSPathwaysUpload, GTFSPathwaysUploadData, Request, Meta, Response
 
 current_dir = os.path.dirname(os.path.abspath(os.path.join(__file__, '../')))
@@ -46,12 +46,34 @@ class TestGTFSPathwaysUpload(unittest.TestCase):
         # Add more assertions for other properties of GTFSPathwaysUploadData
 
     def test_to_json(self):
-        self.upload.data.to_json = MagicMock(return_value={})
-        json_data = self.upload.to_json()
+        with patch.object(GTFSPathwaysUploadData, 'to_json', return_value={}):
+            json_data = self.upload.to_json()
         self.assertIsInstance(json_data, dict)
         self.assertEqual(json_data['message_type'], 'gtfs-pathways-upload')
         self.assertEqual(json_data['published_date'], '2023-02-08T08:33:36.267213Z')
 
+    def test_to_json_does_not_modify_the_message(self):
+        first = self.upload.to_json()
+        second = self.upload.to_json()
+        self.assertEqual(first, second)
+        self.assertIsInstance(self.upload.data, GTFSPathwaysUploadData)
+        self.assertIsInstance(self.upload.data.request, Request)
+        self.assertEqual(first['data']['request']['tdei_station_id'], 'f3839bf9-b32d-46ba-aa85-e5ff0451537e')
+        self.assertEqual(first['data']['meta']['validationTime'], 90)
+        self.assertEqual(first['data']['response']['success'], True)
+        self.assertEqual(first['data']['user_id'], 'c59d29b6-a063-4249-943f-d320d15ac9ab')
+
+    def test_to_bytes(self):
+        encoded = self.upload.to_bytes()
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json.loads(encoded), self.upload.to_json())
+        self.assertEqual(self.upload.to_bytes(), encoded)
+
+    def test_to_json_without_data(self):
+        upload = GTFSPathwaysUpload({'messageId': '1'})
+        self.assertEqual(upload.to_json()['data'], {})
+        self.assertEqual(json.loads(upload.to_bytes())['message_id'], '1')
+
     def test_data_from(self):
         message = TEST_DATA
         upload = GTFSPathwaysUpload.data_from(json.dumps(message))
@@ -100,6 +122,19 @@ class TestRequest(unittest.TestCase):
         self.request.tdei_project_group_id = 'Test Project Group ID'
         self.assertEqual(self.request.tdei_project_group_id, 'Test Project Group ID')
 
+    def test_polygon(self):
+        request = Request(TEST_DATA['data']['request'])
+        self.assertEqual(request.polygon, TEST_DATA['data']['request']['polygon'])
+        self.assertEqual(request.to_json()['polygon'], TEST_DATA['data']['request']['polygon'])
+        self.assertEqual(json.loads(request.to_bytes())['polygon'], TEST_DATA['data']['request']['polygon'])
+        self.assertTrue(request.polygon_area.contains(72.0, 12.8))
+        self.assertFalse(request.polygon_area.contains(80.0, 12.8))
+
+    def test_without_polygon(self):
+        request = Request({'polygon': {}})
+        self.assertEqual(request.polygon, {})
+        self.assertIsNone(request.polygon_area)
+
     # Add more test cases for other properties of Request
 
 
@@ -1,6 +1,9 @@
+import threading
 import unittest
 from unittest.mock import MagicMock, patch, call
-from src.gtfx_pathways_validator import GTFSPathwaysValidator
+from src import rules_table
+from src.gtfx_pathways_validator import GTFSPathwaysValidator, WorkerContext, download_file, validate_downloaded_file
+from src.prefetch import PrefetchBudget
 
 
 class TestGTFSPathwaysValidator(unittest.TestCase):
@@ -12,6 +15,10 @@ class TestGTFSPathwaysValidator(unittest.TestCase):
         mock_settings.return_value.request_topic_name = 'test_request_topic'
         mock_settings.return_value.response_topic_name = 'test_response_topic'
         mock_settings.return_value.max_concurrent_messages = 10
+        mock_settings.return_value.prefetch_max_files = 0
+        mock_settings.return_value.scheduler_enabled = False
+        mock_settings.return_value.download_janitor_interval_seconds = 0
+        mock_settings.return_value.warm_validator_enabled = False
         mock_settings.return_value.get_unique_id.return_value = '123'
         mock_settings.return_value.container_name = 'test_container'
 
@@ -66,8 +73,88 @@ class TestGTFSPathwaysValidator(unittest.TestCase):
 
         # Assert
 
+        rules_version = mock_pathways_validation_instance.rules_version
         self.validator.send_status.assert_called_once_with(valid=True, upload_message=mock_request_message,
-                                                           validation_message='Validation successful')
+                                                           validation_message='Validation successful',
+                                                           rules_version=rules_version)
+
+    def test_process_message_with_pipeline(self):
+        mock_request_message = MagicMock()
+        mock_request_message.data.file_upload_path = 'test_dataset_url'
+        self.validator.pipeline = MagicMock()
+        self.validator.send_status = MagicMock()
+
+        self.validator.process_message(mock_request_message)
+
+        self.validator.pipeline.process.assert_called_once_with(mock_request_message, 'test_dataset_url')
+        self.validator.send_status.assert_not_called()
+
+    @patch('src.gtfx_pathways_validator.GTFSPathwaysValidation')
+    def test_pipeline_stages(self, mock_validation_instance):
+        mock_validation = mock_validation_instance.return_value
+        mock_validation.has_zip_extension.return_value = True
+        mock_validation.download_single_file.return_value = '/downloads/123/feed.zip'
+        mock_validation.validate_downloaded_file.return_value = True, ''
+        mock_validation.rules_version = 'rules-1'
+        context = WorkerContext(storage_client=MagicMock())
+
+        downloaded_file_path = download_file(context, 'feed.zip')
+        result = validate_downloaded_file(context, 'feed.zip', downloaded_file_path)
+
+        mock_validation.download_single_file.assert_called_once_with('feed.zip')
+        mock_validation.validate_downloaded_file.assert_called_once_with('/downloads/123/feed.zip')
+        self.assertEqual(result, (True, '', 'rules-1'))
+
+    @patch('src.gtfx_pathways_validator.validate_downloaded_file')
+    @patch('src.gtfx_pathways_validator.download_file')
+    def test_process_message_with_prefetch(self, mock_download_file, mock_validate_downloaded_file):
+        mock_request_message = MagicMock()
+        mock_request_message.data.file_upload_path = 'feed.zip'
+        mock_request_message.data.tdei_project_group_id = 'project_group'
+        mock_request_message.data.polygon_area = None
+        mock_download_file.return_value = None
+        mock_validate_downloaded_file.return_value = True, '', 'rules-1'
+        self.validator.prefetch_budget = PrefetchBudget(max_files=1)
+        self.validator.validation_slots = threading.BoundedSemaphore(1)
+        self.validator.executor = MagicMock()
+        self.validator.executor.run.side_effect = lambda fn, *args: fn(None, *args)
+        self.validator.send_status = MagicMock()
+
+        self.validator.process_message(mock_request_message)
+
+        mock_validate_downloaded_file.assert_called_once_with(None, 'feed.zip', None, 'project_group', None)
+        self.validator.send_status.assert_called_once_with(valid=True, upload_message=mock_request_message,
+                                                           validation_message='', rules_version='rules-1')
+        self.assertEqual(self.validator.prefetch_budget.files, 0)
+        self.assertTrue(self.validator.validation_slots.acquire(blocking=False))
+
+    @patch('src.gtfx_pathways_validator.blob_size', return_value=400 * 1024 * 1024)
+    def test_process_message_with_scheduler(self, mock_blob_size):
+        mock_request_message = MagicMock()
+        mock_request_message.data.file_upload_path = 'feed.zip'
+        mock_request_message.data.tdei_project_group_id = 'project_group'
+        self.validator.scheduler = MagicMock()
+        self.validator.validate_and_send = MagicMock()
+
+        self.validator.process_message(mock_request_message)
+
+        self.validator.scheduler.slot.assert_called_once_with(400 * 1024 * 1024, 'project_group')
+        self.validator.validate_and_send.assert_called_once_with(mock_request_message, 'feed.zip')
+
+    @patch('src.gtfx_pathways_validator.blob_size', return_value=1024)
+    def test_peek_size_reads_the_blob_properties(self, mock_blob_size):
+        size = self.validator.peek_size('https://account.blob.core.windows.net/gtfspathways/2024/feed.zip')
+
+        self.assertEqual(size, 1024)
+        self.validator.storage_client.get_file.assert_called_once_with(self.validator.settings.storage_container_name,
+                                                                       '2024/feed.zip')
+        self.validator.storage_client.get_file_from_url.assert_not_called()
+        mock_blob_size.assert_called_once_with(self.validator.storage_client.get_file.return_value)
+
+    def test_peek_size_failure(self):
+        self.validator.storage_client.get_file.side_effect = ConnectionError('storage unavailable')
+
+        self.assertIsNone(self.validator.peek_size('feed.zip'))
 
     def test_process_message_with_no_file_path(self):
         # Arrange
@@ -123,6 +210,17 @@ class TestGTFSPathwaysValidator(unittest.TestCase):
         mock_queue_message.data_from.assert_called_once()
         mock_response_topic.publish.assert_called_once_with(data=mock_data)
 
+    @patch('src.gtfx_pathways_validator.QueueMessage')
+    def test_status_message_rules_version(self, mock_queue_message):
+        self.validator.status_message(True, MagicMock(), '', 'rules-1')
+        package = mock_queue_message.data_from.call_args[0][0]['data']['package']
+        self.assertEqual(package['pathways-rules'], 'rules-1')
+
+        # results no rules were applied to report the active rules
+        self.validator.status_message(False, MagicMock(), 'Unable to download the file')
+        package = mock_queue_message.data_from.call_args[0][0]['data']['package']
+        self.assertEqual(package['pathways-rules'], rules_table.registry.current.version)
+
     @patch('src.gtfx_pathways_validator.threading.Thread')
     def test_stop_listening(self, mock_thread):
         # Arrange
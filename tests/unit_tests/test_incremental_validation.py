@@ -0,0 +1,150 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.incremental_validation import AcceptedVersions, member_fingerprints, changed_members
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+STOPS = '\n'.join([
+    'stop_id,stop_name,location_type,parent_station,level_id',
+    'station,Station,1,,',
+    'entrance,Entrance,2,station,L0',
+    'node,Node,3,station,L0',
+    'platform,Platform,0,station,L1',
+])
+PATHWAYS_HEADER = 'pathway_id,from_stop_id,to_stop_id,pathway_mode,is_bidirectional'
+PATHWAYS = '\n'.join([PATHWAYS_HEADER, 'p1,entrance,node,1,1', 'p2,node,platform,1,1'])
+# a bidirectional exit gate is an ERROR of the canonical validator
+EXIT_GATE_PATHWAYS = PATHWAYS + '\np3,entrance,node,7,1'
+LEVELS = 'level_id,level_index\nL0,0\nL1,1'
+
+
+class TestAcceptedVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = AcceptedVersions(path=os.path.join(self.folder, 'accepted.sqlite3'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.folder)
+
+    def test_put_and_get(self):
+        fingerprints = {'stops.txt': 1, 'pathways.txt': 2}
+        self.store.put('project_group', fingerprints, '[]')
+
+        self.assertEqual(self.store.get('project_group', {'stops.txt': 1, 'pathways.txt': 3}), (fingerprints, '[]'))
+        self.assertIsNone(self.store.get('other_group', fingerprints))
+        self.assertIsNone(self.store.get('project_group', {'stops.txt': 4}))
+
+    @patch('src.incremental_validation.CanonicalValidator')
+    def test_other_validator_version_is_ignored(self, mock_validator):
+        mock_validator.__version__ = '0.0.1'
+        self.store.put('project_group', {'stops.txt': 1}, '')
+        mock_validator.__version__ = '0.0.2'
+
+        self.assertIsNone(self.store.get('project_group', {'stops.txt': 1}))
+
+    def test_changed_members(self):
+        previous = {'stops.txt': 1, 'pathways.txt': 2, 'shapes.txt': 3}
+        current = {'stops.txt': 1, 'pathways.txt': 5, 'levels.txt': 6}
+
+        self.assertEqual(changed_members(previous, current), {'pathways.txt', 'shapes.txt', 'levels.txt'})
+
+
+class TestIncrementalValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = AcceptedVersions(path=os.path.join(self.folder, 'accepted.sqlite3'))
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.file_relative_path = 'feed.zip'
+        self.validator.accepted_versions = self.store
+        self.validator.project_group_id = 'project_group'
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up')
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+        self.store.close()
+        shutil.rmtree(self.folder)
+
+    def build_feed(self, pathways=PATHWAYS, agency='agency_id\n1'):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('agency.txt', agency)
+            archive.writestr('stops.txt', STOPS)
+            archive.writestr('pathways.txt', pathways)
+            archive.writestr('levels.txt', LEVELS)
+        return path
+
+    def accept(self, path):
+        self.store.put('project_group', member_fingerprints(path), '[]')
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_accepted_upload_is_recorded(self, mock_canonical_validator):
+        mock_result = MagicMock(status=True, error=None)
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+        path = self.build_feed()
+
+        self.assertEqual(self.validator.validate_downloaded_file(path), (True, ''))
+
+        self.assertIsNotNone(self.store.get('project_group', member_fingerprints(path)))
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_unchanged_upload_reuses_result(self, mock_canonical_validator):
+        self.accept(self.build_feed())
+
+        self.assertEqual(self.validator.validate_downloaded_file(self.build_feed()), (True, '[]'))
+        mock_canonical_validator.assert_not_called()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_pathways_change_runs_pathways_rules(self, mock_canonical_validator):
+        self.accept(self.build_feed())
+
+        is_valid, validation_message = self.validator.validate_downloaded_file(self.build_feed(EXIT_GATE_PATHWAYS))
+
+        self.assertFalse(is_valid)
+        self.assertIn('bidirectional_exit_gate', validation_message)
+        mock_canonical_validator.assert_not_called()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_pathways_loop_runs_full_validation(self, mock_canonical_validator):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(status=True, error=None)
+        self.accept(self.build_feed())
+
+        # a loop is a warning of the canonical validator, it does not reject the re-upload
+        is_valid, _ = self.validator.validate_downloaded_file(self.build_feed(PATHWAYS + '\np3,node,node,1,1'))
+
+        self.assertTrue(is_valid)
+        mock_canonical_validator.assert_called_once()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_valid_pathways_change_runs_full_validation(self, mock_canonical_validator):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(
+            status=False, error=[{'code': 'unexpected_enum_value', 'sampleNotices': [{'filename': 'pathways.txt'}]}])
+        self.accept(self.build_feed())
+
+        is_valid, validation_message = self.validator.validate_downloaded_file(
+            self.build_feed(PATHWAYS.replace(',1,1', ',99,1') + '\np2,node,platform,99,1'))
+
+        self.assertFalse(is_valid)
+        self.assertIn('unexpected_enum_value', validation_message)
+        mock_canonical_validator.assert_called_once()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_other_change_runs_full_validation(self, mock_canonical_validator):
+        mock_result = MagicMock(status=True, error=None)
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+        self.accept(self.build_feed())
+
+        self.validator.validate_downloaded_file(self.build_feed(agency='agency_id\n2'))
+
+        mock_canonical_validator.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
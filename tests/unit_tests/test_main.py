@@ -18,6 +18,12 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.text.strip('\"'), "I'm healthy !!")
 
+    def test_metrics(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('pathways_validation_seconds', response.text)
+        self.assertIn('pathways_messages_in_flight', response.text)
+
     def test_get_settings(self):
         settings = get_settings()
         self.assertIsNotNone(settings)
@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+from prometheus_client import REGISTRY
+from src import metrics
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_record_failures_counts_each_code_once(self):
+        before = sample('pathways_validation_failures_total', {'code': 'pathway_loop'})
+
+        metrics.record_failures(['pathway_loop', 'pathway_loop', 'missing_level_id'])
+
+        self.assertEqual(sample('pathways_validation_failures_total', {'code': 'pathway_loop'}), before + 1)
+
+    def test_observe_queue_lag(self):
+        before = sample('pathways_queue_lag_seconds_count')
+        published_date = (datetime.now(timezone.utc) - timedelta(seconds=30)).isoformat().replace('+00:00', 'Z')
+
+        metrics.observe_queue_lag(published_date)
+
+        self.assertEqual(sample('pathways_queue_lag_seconds_count'), before + 1)
+        self.assertGreaterEqual(sample('pathways_queue_lag_seconds_sum'), 30)
+
+    def test_observe_queue_lag_ignores_invalid_dates(self):
+        before = sample('pathways_queue_lag_seconds_count')
+
+        metrics.observe_queue_lag(None)
+        metrics.observe_queue_lag('not a date')
+
+        self.assertEqual(sample('pathways_queue_lag_seconds_count'), before)
+
+    def test_latest_metrics(self):
+        content, content_type = metrics.latest_metrics()
+
+        self.assertIn(b'pathways_download_seconds', content)
+        self.assertTrue(content_type.startswith('text/plain'))
+
+
+if __name__ == '__main__':
+    unittest.main()
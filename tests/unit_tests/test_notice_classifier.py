@@ -0,0 +1,67 @@
+import unittest
+from src.notice_classifier import NoticeClassifier
+
+
+class TestNoticeClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = NoticeClassifier(
+            change_error_to_warning=['empty_file'],
+            fatal_error_codes=['pathway_loop'],
+            pathways_fields={'stops.txt': ['wheelchair_boarding']},
+            pathways_files=['pathways.txt', 'levels.txt']
+        )
+
+    def test_errors_are_downgraded_to_warnings(self):
+        errors = [
+            {'code': 'empty_file', 'sampleNotices': []},
+            {'code': 'foreign_key_violation', 'sampleNotices': [{'filename': 'trips.txt'}]}
+        ]
+
+        result = self.classifier.classify(errors)
+
+        self.assertEqual(result.warnings, [errors[0]])
+        self.assertEqual(result.errors, [errors[1]])
+        self.assertFalse(result.has_pathways_error)
+
+    def test_fatal_error_code(self):
+        result = self.classifier.classify([{'code': 'pathway_loop', 'sampleNotices': []}])
+
+        self.assertTrue(result.has_pathways_error)
+        self.assertEqual(len(result.errors), 1)
+
+    def test_pathways_field(self):
+        errors = [{'code': 'invalid', 'sampleNotices': [{'filename': 'stops.txt', 'fieldName': 'wheelchair_boarding'}]}]
+        self.assertTrue(self.classifier.classify(errors).has_pathways_error)
+
+        errors = [{'code': 'invalid', 'sampleNotices': [{'filename': 'stops.txt', 'fieldName': 'stop_name'}]}]
+        self.assertFalse(self.classifier.classify(errors).has_pathways_error)
+
+    def test_pathways_file(self):
+        errors = [{'code': 'invalid', 'sampleNotices': [{'filename': 'levels.txt'}]}]
+        self.assertTrue(self.classifier.classify(errors).has_pathways_error)
+
+    def test_pathways_child_file(self):
+        errors = [{'code': 'invalid', 'sampleNotices': [{'childFilename': 'pathways.txt'}]}]
+        self.assertTrue(self.classifier.classify(errors).has_pathways_error)
+
+    def test_order_is_preserved(self):
+        errors = [{'code': code, 'sampleNotices': []} for code in ['a', 'empty_file', 'b', 'empty_file', 'c']]
+
+        result = self.classifier.classify(errors)
+
+        self.assertEqual([error['code'] for error in result.errors], ['a', 'b', 'c'])
+        self.assertEqual(len(result.warnings), 2)
+        self.assertEqual(len(errors), 5)
+
+    def test_from_config(self):
+        classifier = NoticeClassifier.from_config()
+
+        self.assertIn('empty_file', classifier.warning_codes)
+        self.assertIn('pathway_loop', classifier.fatal_codes)
+        self.assertIn('pathways.txt', classifier.pathways_files)
+        self.assertIsInstance(classifier.pathways_fields['stops.txt'], frozenset)
+
+
+if __name__ == '__main__':
+    unittest.main()
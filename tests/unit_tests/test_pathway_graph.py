@@ -0,0 +1,107 @@
+import unittest
+from src.pathway_graph import PathwayGraph, STATION, ENTRANCE_EXIT, GENERIC_NODE, STOP_OR_PLATFORM, BOARDING_AREA
+from src.pathways_precheck import Location, Pathway
+
+
+def locations(*rows) -> dict:
+    return {stop_id: Location(stop_id=stop_id, stop_name='', location_type=location_type, parent_station=parent,
+                              level_id='', csv_row_number=row_number)
+            for row_number, (stop_id, location_type, parent) in enumerate(rows, start=2)}
+
+
+def pathways(*rows) -> list:
+    return [Pathway(pathway_id=f'p{row_number}', from_stop_id=source, to_stop_id=target, pathway_mode=1,
+                    is_bidirectional=bidirectional, csv_row_number=row_number)
+            for row_number, (source, target, bidirectional) in enumerate(rows, start=2)]
+
+
+STATION_LOCATIONS = locations(('station', STATION, ''),
+                              ('entrance', ENTRANCE_EXIT, 'station'),
+                              ('node', GENERIC_NODE, 'station'),
+                              ('platform', STOP_OR_PLATFORM, 'station'))
+
+
+class TestPathwayGraph(unittest.TestCase):
+
+    def test_adjacency(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True),
+                                                               ('node', 'platform', False),
+                                                               ('node', 'unknown', True)))
+        successors = {graph.stop_ids[node]: sorted(graph.stop_ids[target] for target in
+                                                   graph.successors[graph.successor_offsets[node]:
+                                                                    graph.successor_offsets[node + 1]])
+                      for node in range(len(graph))}
+        self.assertEqual(successors, {'station': [], 'entrance': ['node'], 'node': ['entrance', 'platform'],
+                                      'platform': []})
+        self.assertEqual(list(graph.stations), [0, 0, 0, 0])
+
+    def test_loops(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True), ('node', 'node', True)))
+        self.assertEqual(graph.loops, [1])
+        self.assertEqual(list(graph.loop_nodes), [2])
+
+    def test_dangling_generic_nodes(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True), ('node', 'entrance', True),
+                                                               ('entrance', 'platform', True)))
+        self.assertEqual([graph.stop_ids[node] for node in graph.dangling_generic_nodes()], ['node'])
+
+    def test_unreachable_locations(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', False),
+                                                               ('platform', 'node', False)))
+        unreachable = {graph.stop_ids[node]: (has_entrance, has_exit)
+                       for node, has_entrance, has_exit in graph.unreachable_locations()}
+        # entrances are their own entrance and exit
+        self.assertEqual(unreachable, {'node': (True, False), 'platform': (False, False)})
+
+    def test_platform_with_boarding_areas_is_not_checked(self):
+        graph = PathwayGraph.build(locations(('station', STATION, ''),
+                                             ('entrance', ENTRANCE_EXIT, 'station'),
+                                             ('platform', STOP_OR_PLATFORM, 'station'),
+                                             ('boarding', BOARDING_AREA, 'platform')),
+                                   pathways(('entrance', 'boarding', True)))
+        self.assertEqual(list(graph.stations), [0, 0, 0, 0])
+        self.assertEqual(graph.unreachable_locations(), [])
+
+    def test_strongly_connected_components(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True),
+                                                               ('node', 'platform', False)))
+        components = graph.components()
+        self.assertEqual(components[1], components[2])
+        self.assertNotEqual(components[2], components[3])
+        self.assertEqual(len(set(components)), 3)
+
+    def test_long_chain(self):
+        count = 20000
+        rows = [('station', STATION, '')] + [(f'n{index}', GENERIC_NODE, 'station') for index in range(count)]
+        graph = PathwayGraph.build(locations(*rows), pathways(*((f'n{index}', f'n{index + 1}', False)
+                                                                 for index in range(count - 1)),
+                                                               (f'n{count - 1}', 'n0', False)))
+        components = graph.components()
+        self.assertEqual(len(set(components[1:])), 1)
+
+    def test_station_diagnostics(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True),
+                                                               ('node', 'platform', False)))
+        self.assertEqual(graph.station_diagnostics(), [{
+            'stationId': 'station',
+            'locations': 3,
+            'entrances': 1,
+            'directedEdges': 3,
+            'stronglyConnectedComponents': 2,
+            'unreachableLocations': ['platform'],
+            'danglingGenericNodes': [],
+            'pathwayLoops': 0
+        }])
+
+    def test_station_diagnostics_report_loops(self):
+        graph = PathwayGraph.build(STATION_LOCATIONS, pathways(('entrance', 'node', True),
+                                                               ('node', 'platform', True),
+                                                               ('platform', 'platform', True),
+                                                               ('unknown', 'unknown', True)))
+        diagnostics = graph.station_diagnostics()
+        self.assertEqual(diagnostics[0]['pathwayLoops'], 1)
+        self.assertEqual(diagnostics[0]['unreachableLocations'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.pathways_precheck import PathwaysPrecheck
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+SAVED_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
+
+STOPS_HEADER = 'stop_id,stop_name,location_type,parent_station,level_id'
+PATHWAYS_HEADER = 'pathway_id,from_stop_id,to_stop_id,pathway_mode,is_bidirectional'
+STATION_STOPS = [
+    'station,Station,1,,',
+    'entrance,Entrance,2,station,L0',
+    'node,Node,3,station,L0',
+    'platform,Platform,0,station,L1',
+]
+STATION_PATHWAYS = [
+    'p1,entrance,node,1,1',
+    'p2,node,platform,1,1',
+]
+
+
+def codes(errors):
+    return sorted(error['code'] for error in errors)
+
+
+class TestPathwaysPrecheck(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def build_feed(self, stops, pathways, levels=True):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('stops.txt', '\n'.join([STOPS_HEADER] + stops))
+            archive.writestr('pathways.txt', '\n'.join([PATHWAYS_HEADER] + pathways))
+            if levels:
+                archive.writestr('levels.txt', 'level_id,level_index\nL0,0\nL1,1')
+            archive.writestr('shapes.txt', 'shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence')
+        return path
+
+    def test_valid_station(self):
+        errors = PathwaysPrecheck(self.build_feed(STATION_STOPS, STATION_PATHWAYS)).validate()
+        self.assertEqual(errors, [])
+
+    def test_station_diagnostics(self):
+        precheck = PathwaysPrecheck(self.build_feed(STATION_STOPS, STATION_PATHWAYS))
+        precheck.validate()
+        diagnostics = precheck.station_diagnostics()
+        self.assertEqual([station['stationId'] for station in diagnostics], ['station'])
+        self.assertEqual(diagnostics[0]['stronglyConnectedComponents'], 1)
+
+    def test_feed_without_pathways(self):
+        errors = PathwaysPrecheck(os.path.join(SAVED_FILE_PATH, 'success.zip')).validate()
+        self.assertEqual(errors, [])
+
+    def test_good_fixture(self):
+        errors = PathwaysPrecheck(os.path.join(SAVED_FILE_PATH, 'pathways-good.zip')).validate()
+        self.assertEqual(errors, [])
+
+    def test_explicit_error_fixture(self):
+        errors = PathwaysPrecheck(os.path.join(SAVED_FILE_PATH, 'pathways-explicit-error.zip')).validate()
+        self.assertEqual(codes(errors), ['bidirectional_exit_gate'])
+
+    def test_foreign_key_fixture(self):
+        errors = PathwaysPrecheck(os.path.join(SAVED_FILE_PATH, 'pathways-foreign-key.zip')).validate()
+
+        self.assertEqual(codes(errors), ['foreign_key_violation'])
+        notice = errors[0]['sampleNotices'][0]
+        self.assertEqual(notice['childFilename'], 'pathways.txt')
+        self.assertEqual(notice['csvRowNumber'], 2)
+
+    def test_pathway_loop_is_a_warning(self):
+        precheck = PathwaysPrecheck(self.build_feed(STATION_STOPS, STATION_PATHWAYS + ['p3,node,node,1,1']))
+        self.assertEqual(precheck.validate(), [])
+        self.assertEqual(codes(precheck.warnings()), ['pathway_loop'])
+        self.assertEqual(precheck.warnings()[0]['severity'], 'WARNING')
+        self.assertEqual(precheck.station_diagnostics()[0]['pathwayLoops'], 1)
+
+    def test_pathway_to_station(self):
+        errors = PathwaysPrecheck(self.build_feed(STATION_STOPS, STATION_PATHWAYS + ['p3,node,station,1,1'])).validate()
+        self.assertEqual(codes(errors), ['pathway_to_wrong_location_type'])
+
+    def test_pathway_to_platform_with_boarding_areas(self):
+        stops = STATION_STOPS + ['boarding,Boarding,4,platform,L1']
+        pathways = STATION_PATHWAYS + ['p3,node,boarding,1,1']
+
+        errors = PathwaysPrecheck(self.build_feed(stops, pathways)).validate()
+
+        self.assertEqual(codes(errors), ['pathway_to_platform_with_boarding_areas'])
+        self.assertEqual(errors[0]['sampleNotices'][0]['stopId'], 'platform')
+
+    def test_location_without_parent_station(self):
+        stops = STATION_STOPS + ['orphan,Orphan,3,,L0']
+        errors = PathwaysPrecheck(self.build_feed(stops, STATION_PATHWAYS)).validate()
+        self.assertEqual(codes(errors), ['location_without_parent_station'])
+
+    def test_missing_level_id_for_elevator(self):
+        stops = STATION_STOPS + ['lift,Lift,3,station,']
+        pathways = STATION_PATHWAYS + ['p3,node,lift,5,1', 'p4,lift,platform,5,1']
+        errors = PathwaysPrecheck(self.build_feed(stops, pathways)).validate()
+        self.assertEqual(codes(errors), ['missing_level_id'])
+        self.assertEqual(errors[0]['totalNotices'], 1)
+
+    def test_unknown_level(self):
+        stops = STATION_STOPS[:3] + ['platform,Platform,0,station,L2']
+        errors = PathwaysPrecheck(self.build_feed(stops, STATION_PATHWAYS)).validate()
+        self.assertEqual(codes(errors), ['foreign_key_violation'])
+        self.assertEqual(errors[0]['sampleNotices'], [{'childFilename': 'stops.txt', 'childFieldName': 'level_id',
+                                                       'parentFilename': 'levels.txt', 'parentFieldName': 'level_id',
+                                                       'fieldValue': 'L2', 'csvRowNumber': 5}])
+
+    def test_levels_are_not_checked_without_levels_file(self):
+        errors = PathwaysPrecheck(self.build_feed(STATION_STOPS, STATION_PATHWAYS, levels=False)).validate()
+        self.assertEqual(errors, [])
+
+    def test_dangling_generic_node_is_a_warning(self):
+        stops = STATION_STOPS + ['dead_end,Dead end,3,station,L0']
+        pathways = STATION_PATHWAYS + ['p3,node,dead_end,1,1']
+        precheck = PathwaysPrecheck(self.build_feed(stops, pathways))
+        self.assertEqual(precheck.validate(), [])
+        self.assertEqual(codes(precheck.warnings()), ['pathway_dangling_generic_node'])
+
+    def test_unreachable_location(self):
+        pathways = ['p1,entrance,node,1,1', 'p2,node,platform,1,0']
+
+        errors = PathwaysPrecheck(self.build_feed(STATION_STOPS, pathways)).validate()
+
+        self.assertEqual(codes(errors), ['pathway_unreachable_location'])
+        notice = errors[0]['sampleNotices'][0]
+        self.assertEqual(notice['stopId'], 'platform')
+        self.assertTrue(notice['hasEntrance'])
+        self.assertFalse(notice['hasExit'])
+
+
+class TestValidationWithPrecheck(unittest.TestCase):
+
+    def setUp(self):
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.file_path = 'feed.zip'
+        self.validator.file_relative_path = 'feed.zip'
+        self.validator.pathways_precheck_enabled = True
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up')
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_fatal_errors_skip_canonical_validator(self, mock_canonical_validator):
+        self.validator.download_single_file = MagicMock(
+            return_value=os.path.join(SAVED_FILE_PATH, 'pathways-explicit-error.zip'))
+
+        is_valid, validation_message = self.validator.is_gtfs_pathways_valid()
+
+        self.assertFalse(is_valid)
+        self.assertIn('bidirectional_exit_gate', validation_message)
+        mock_canonical_validator.assert_not_called()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_warnings_go_to_canonical_validator(self, mock_canonical_validator):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(status=True, error=None)
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = os.path.join(folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('stops.txt', '\n'.join([STOPS_HEADER] + STATION_STOPS))
+            archive.writestr('pathways.txt', '\n'.join([PATHWAYS_HEADER] + STATION_PATHWAYS + ['p3,node,node,1,1']))
+        self.validator.download_single_file = MagicMock(return_value=path)
+
+        is_valid, _ = self.validator.is_gtfs_pathways_valid()
+
+        self.assertTrue(is_valid)
+        mock_canonical_validator.assert_called_once()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_valid_files_go_to_canonical_validator(self, mock_canonical_validator):
+        mock_result = MagicMock()
+        mock_result.status = True
+        mock_result.error = None
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+        self.validator.download_single_file = MagicMock(
+            return_value=os.path.join(SAVED_FILE_PATH, 'pathways-good.zip'))
+
+        is_valid, _ = self.validator.is_gtfs_pathways_valid()
+
+        self.assertTrue(is_valid)
+        mock_canonical_validator.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
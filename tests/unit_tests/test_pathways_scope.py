@@ -0,0 +1,146 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.pathways_scope import build_pathways_subset, split_scope_artifacts
+from src.rules_table import RulesTable
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+STOPS = 'stop_id,stop_name,location_type,parent_station,wheelchair_boarding\nstation,Station,1,,1\n'
+TRIPS = 'route_id,service_id,trip_id,trip_headsign,shape_id,wheelchair_accessible\nr1,s1,t1,Downtown,sh1,1\n'
+STOP_TIMES = 'trip_id,arrival_time,departure_time,stop_id,stop_sequence\nt1,08:00:00,08:00:00,station,1\n'
+SHAPES = 'shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence\nsh1,47.6,-122.3,1\n'
+
+
+class TestBuildPathwaysSubset(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.feed = os.path.join(self.folder, 'feed.zip')
+        self.subset = os.path.join(self.folder, 'subset.zip')
+        with zipfile.ZipFile(self.feed, 'w') as archive:
+            archive.writestr('stops.txt', STOPS)
+            archive.writestr('trips.txt', TRIPS)
+            archive.writestr('stop_times.txt', STOP_TIMES)
+            archive.writestr('shapes.txt', SHAPES)
+            archive.writestr('__MACOSX/._stops.txt', 'ignored')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def read_subset(self):
+        with zipfile.ZipFile(self.subset) as archive:
+            return {name: archive.read(name).decode('utf-8') for name in archive.namelist()}
+
+    def test_excluded_files_are_dropped(self):
+        build_pathways_subset(self.feed, self.subset)
+
+        self.assertEqual(sorted(self.read_subset()), ['stop_times.txt', 'stops.txt', 'trips.txt'])
+
+    def test_stub_files_only_keep_the_header(self):
+        build_pathways_subset(self.feed, self.subset)
+
+        self.assertEqual(self.read_subset()['stop_times.txt'],
+                         'trip_id,arrival_time,departure_time,stop_id,stop_sequence\n')
+
+    def test_columns_are_projected(self):
+        build_pathways_subset(self.feed, self.subset)
+
+        self.assertEqual(self.read_subset()['trips.txt'],
+                         'route_id,service_id,trip_id,wheelchair_accessible\nr1,s1,t1,1\n')
+
+    def test_columns_of_the_given_rules(self):
+        build_pathways_subset(self.feed, self.subset, pathways_fields={'trips.txt': ['trip_headsign']})
+
+        self.assertEqual(self.read_subset()['trips.txt'],
+                         'route_id,service_id,trip_id,trip_headsign\nr1,s1,t1,Downtown\n')
+
+    def test_other_files_are_copied(self):
+        build_pathways_subset(self.feed, self.subset)
+
+        self.assertEqual(self.read_subset()['stops.txt'], STOPS)
+
+    def test_stats(self):
+        stats = build_pathways_subset(self.feed, self.subset)
+
+        self.assertGreater(stats.original_bytes, stats.subset_bytes)
+        self.assertGreater(stats.reduction, 0)
+
+
+class TestSplitScopeArtifacts(unittest.TestCase):
+
+    def test_errors_on_modified_files_are_artifacts(self):
+        errors = [
+            {'code': 'missing_required_file', 'sampleNotices': [{'filename': 'shapes.txt'}]},
+            {'code': 'foreign_key_violation', 'sampleNotices': [{'childFilename': 'trips.txt',
+                                                                 'parentFilename': 'stop_times.txt'}]},
+            {'code': 'pathway_loop', 'sampleNotices': [{'pathwayId': 'p1'}]},
+            {'code': 'mixed', 'sampleNotices': [{'filename': 'shapes.txt'}, {'filename': 'stops.txt'}]}
+        ]
+
+        kept, artifacts = split_scope_artifacts(errors)
+
+        self.assertEqual([error['code'] for error in kept], ['pathway_loop', 'mixed'])
+        self.assertEqual([error['code'] for error in artifacts], ['missing_required_file', 'foreign_key_violation'])
+
+
+class TestValidationWithScope(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.feed = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(self.feed, 'w') as archive:
+            archive.writestr('stops.txt', STOPS)
+            archive.writestr('shapes.txt', SHAPES)
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.pathways_scope_enabled = True
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_scope_feed_is_validated_and_artifacts_ignored(self, mock_canonical_validator):
+        mock_result = MagicMock()
+        mock_result.status = False
+        mock_result.info = None
+        mock_result.error = [{'code': 'foreign_key_violation', 'severity': 'ERROR',
+                              'sampleNotices': [{'childFilename': 'trips.txt', 'parentFilename': 'shapes.txt'}]}]
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+
+        is_valid, _, is_final = self.validator.run_canonical_validation(self.feed)
+
+        self.assertTrue(is_valid)
+        self.assertTrue(is_final)
+        mock_canonical_validator.assert_called_once_with(
+            zip_file=os.path.join(self.folder, 'pathways-scope-feed.zip'))
+
+    @patch('src.gtfs_pathways_validation.build_pathways_subset')
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_scope_feed_uses_the_rules_of_the_validation(self, mock_canonical_validator, mock_build_pathways_subset):
+        mock_canonical_validator.return_value.validate.return_value = MagicMock(status=True, error=None)
+        rules = RulesTable.from_dict({'pathways_fields': {'trips.txt': ['trip_headsign']}})
+
+        self.validator.run_canonical_validation(self.feed, rules)
+
+        self.assertEqual(mock_build_pathways_subset.call_args.kwargs['pathways_fields'],
+                         {'trips.txt': ['trip_headsign']})
+
+    @patch('src.gtfs_pathways_validation.build_pathways_subset', side_effect=zipfile.BadZipFile('bad'))
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_full_feed_is_validated_when_scope_fails(self, mock_canonical_validator, _):
+        mock_result = MagicMock()
+        mock_result.status = True
+        mock_result.error = None
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+
+        is_valid, _, _ = self.validator.run_canonical_validation(self.feed)
+
+        self.assertTrue(is_valid)
+        mock_canonical_validator.assert_called_once_with(zip_file=self.feed)
+
+
+if __name__ == '__main__':
+    unittest.main()
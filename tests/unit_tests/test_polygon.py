@@ -0,0 +1,85 @@
+import json
+import math
+import unittest
+from src.polygon import CompactPolygon
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+HOLE = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+FAR_SQUARE = [[20, 20], [30, 20], [30, 30], [20, 30], [20, 20]]
+
+
+def feature_collection(*geometries) -> dict:
+    return {
+        'type': 'FeatureCollection',
+        'features': [{'type': 'Feature', 'properties': {'name': str(index)}, 'geometry': geometry}
+                     for index, geometry in enumerate(geometries)]
+    }
+
+
+class TestCompactPolygon(unittest.TestCase):
+
+    def test_round_trip(self):
+        geojson = feature_collection({'type': 'Polygon', 'coordinates': [SQUARE, HOLE]},
+                                     {'type': 'MultiPolygon', 'coordinates': [[FAR_SQUARE]]},
+                                     {'type': 'Point', 'coordinates': [1, 2]})
+        polygon = CompactPolygon.from_geojson(geojson)
+        self.assertEqual(polygon.to_geojson(), geojson)
+        self.assertEqual(polygon.position_count, 15)
+        self.assertEqual(polygon.bbox, (0, 0, 30, 30))
+
+    def test_round_trip_keeps_values(self):
+        geojson = feature_collection({'type': 'Polygon', 'coordinates': [[[-122, 47], [-121.5, 47], [-121.5, 47.5],
+                                                                          [-122, 47]]]},
+                                     {'type': 'Polygon', 'coordinates': [[[-122.25, 47.25, 10], [-121.75, 47.25, 12],
+                                                                          [-122.0, 47.75, 11], [-122.25, 47.25, 10]]]},
+                                     {'type': 'MultiPolygon', 'coordinates': [[], [SQUARE], [[]]]})
+        polygon = CompactPolygon.from_geojson(geojson)
+
+        self.assertEqual(json.dumps(polygon.to_geojson()), json.dumps(geojson))
+        self.assertTrue(polygon.contains(5, 5))
+        self.assertTrue(polygon.contains(-122.0, 47.4))
+        self.assertEqual(polygon.bbox, (-122.25, 0, 10, 47.75))
+
+    def test_integer_coordinates_stay_integers(self):
+        polygon = CompactPolygon.from_geojson({'type': 'Polygon', 'coordinates': [SQUARE]})
+        coordinates = polygon.to_geojson()['coordinates']
+        self.assertEqual(coordinates, [SQUARE])
+        self.assertTrue(all(type(value) is int for position in coordinates[0] for value in position))
+
+    def test_without_polygon(self):
+        self.assertIsNone(CompactPolygon.from_geojson({}))
+        self.assertIsNone(CompactPolygon.from_geojson({'type': 'Point', 'coordinates': [1, 2]}))
+
+    def test_contains(self):
+        polygon = CompactPolygon.from_geojson(feature_collection(
+            {'type': 'Polygon', 'coordinates': [SQUARE, HOLE]},
+            {'type': 'MultiPolygon', 'coordinates': [[FAR_SQUARE]]}))
+        self.assertTrue(polygon.contains(1, 1))
+        self.assertTrue(polygon.contains(25, 25))
+        # inside the hole, between the polygons and outside the bounding box
+        self.assertFalse(polygon.contains(5, 5))
+        self.assertFalse(polygon.contains(15, 15))
+        self.assertFalse(polygon.contains(-1, 5))
+        self.assertTrue(polygon.in_bbox(15, 15))
+
+    def test_contains_matches_ray_casting(self):
+        # star shaped ring with many vertices, against a plain even-odd test
+        ring = [[math.cos(2 * math.pi * index / 400) * (5 if index % 2 else 10),
+                 math.sin(2 * math.pi * index / 400) * (5 if index % 2 else 10)] for index in range(400)]
+        ring.append(ring[0])
+        polygon = CompactPolygon.from_geojson({'type': 'Polygon', 'coordinates': [ring]})
+
+        def inside(x, y):
+            result = False
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    result = not result
+            return result
+
+        for x in range(-11, 12):
+            for y in range(-11, 12):
+                self.assertEqual(polygon.contains(x + 0.25, y + 0.5), inside(x + 0.25, y + 0.5), (x, y))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import unittest
+from src.prefetch import PrefetchBudget
+
+
+class TestPrefetchBudget(unittest.TestCase):
+
+    def acquire_in_background(self, budget):
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (budget.acquire(), acquired.set()), daemon=True)
+        thread.start()
+        return acquired
+
+    def test_blocks_on_file_count(self):
+        budget = PrefetchBudget(max_files=1)
+        budget.acquire()
+
+        acquired = self.acquire_in_background(budget)
+        self.assertFalse(acquired.wait(timeout=0.1))
+
+        budget.release()
+        self.assertTrue(acquired.wait(timeout=5))
+
+    def test_blocks_on_bytes(self):
+        budget = PrefetchBudget(max_files=5, max_bytes=100)
+        budget.acquire()
+        budget.add_bytes(150)
+
+        acquired = self.acquire_in_background(budget)
+        self.assertFalse(acquired.wait(timeout=0.1))
+
+        budget.release(150)
+        self.assertTrue(acquired.wait(timeout=5))
+        self.assertEqual(budget.bytes, 0)
+
+    def test_bytes_below_limit(self):
+        budget = PrefetchBudget(max_files=5, max_bytes=100)
+        budget.acquire()
+        budget.add_bytes(50)
+
+        budget.acquire()
+
+        self.assertEqual(budget.files, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.report_offload import ReportOffload, ReportWriter, report_blob_name
+from src.result_format import ResultFormatter
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+ERRORS = [{'code': 'foreign_key_violation', 'severity': 'ERROR', 'totalNotices': 2,
+           'sampleNotices': [{'csvRowNumber': 2}, {'csvRowNumber': 3}]}]
+WARNINGS = [{'code': 'missing_recommended_file', 'severity': 'ERROR', 'totalNotices': 1,
+             'sampleNotices': [{'filename': 'feed_info.txt'}]}]
+
+
+def read_report(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestReportOffload(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.uploaded = {}
+        self.container = MagicMock()
+        self.container.create_file.side_effect = self.create_file
+        self.offload = ReportOffload(container=self.container, container_name='gtfspathways')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def create_file(self, name):
+        report = MagicMock()
+
+        def upload(handle):
+            path = os.path.join(self.folder, 'uploaded.gz')
+            with open(path, 'wb') as f:
+                f.write(handle.read())
+            self.uploaded[name] = read_report(path)
+        report.upload.side_effect = upload
+        report.get_remote_url.return_value = f'https://storage/gtfspathways/{name}'
+        return report
+
+    def test_report_blob_name(self):
+        upload = 'https://account.blob.core.windows.net/gtfspathways/2024/group/feed.zip'
+        self.assertEqual(report_blob_name('gtfspathways', upload), '2024/group/feed.report.ndjson.gz')
+        self.assertEqual(report_blob_name('gtfspathways', 'https://account/other/my%20feed.zip'),
+                         'other/my feed.report.ndjson.gz')
+
+    def test_writer_writes_one_line_per_notice(self):
+        path = os.path.join(self.folder, 'report.ndjson.gz')
+        with ReportWriter(path) as writer:
+            writer.write(ERRORS)
+            writer.write(WARNINGS, severity='WARNING')
+        self.assertEqual(writer.lines, 3)
+        lines = read_report(path)
+        self.assertEqual(lines[0], {'code': 'foreign_key_violation', 'severity': 'ERROR', 'notice': {'csvRowNumber': 2}})
+        self.assertEqual(lines[2]['severity'], 'WARNING')
+
+    def test_offload_uploads_next_to_the_upload(self):
+        url = self.offload.offload(ERRORS, 'https://account/gtfspathways/group/feed.zip', self.folder, warnings=WARNINGS)
+        self.assertEqual(url, 'https://storage/gtfspathways/group/feed.report.ndjson.gz')
+        self.assertEqual(len(self.uploaded['group/feed.report.ndjson.gz']), 3)
+        # the local report is removed once uploaded
+        self.assertEqual(os.listdir(self.folder), ['uploaded.gz'])
+
+    def test_offload_failure_returns_none(self):
+        self.container.create_file.side_effect = Exception('unavailable')
+        self.assertIsNone(self.offload.offload(ERRORS, 'https://account/gtfspathways/feed.zip', self.folder))
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_should_offload(self):
+        self.assertFalse(self.offload.should_offload([]))
+        self.assertTrue(self.offload.should_offload(ERRORS))
+        self.offload.min_notices = 10
+        self.assertFalse(self.offload.should_offload(ERRORS))
+
+    def test_from_settings(self):
+        self.assertIsNone(ReportOffload.from_settings(MagicMock(report_offload_enabled=False), self.container))
+        offload = ReportOffload.from_settings(MagicMock(report_offload_enabled=True, storage_container_name='c',
+                                                        report_offload_min_notices='5'), self.container)
+        self.assertEqual((offload.container_name, offload.min_notices), ('c', 5))
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    @patch.object(GTFSPathwaysValidation, '__init__', return_value=None)
+    def test_validation_publishes_report_url(self, mock_init, mock_canonical_validator):
+        mock_result = MagicMock(status=False, error=list(ERRORS), info=None)
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+        validation = GTFSPathwaysValidation()
+        validation.file_path = 'https://account/gtfspathways/group/feed.zip'
+        validation.result_formatter = ResultFormatter()
+        validation.report_offload = self.offload
+
+        is_valid, message, is_final = validation.run_canonical_validation(os.path.join(self.folder, 'feed.zip'))
+
+        self.assertFalse(is_valid)
+        summary = json.loads(message)
+        self.assertEqual(summary['reportUrl'], 'https://storage/gtfspathways/group/feed.report.ndjson.gz')
+        self.assertEqual(summary['totalNotices'], 2)
+        self.assertIn('group/feed.report.ndjson.gz', self.uploaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src import rules_table
+from src.rules_table import RulesTable
+from src.result_cache import ResultCache, rules_fingerprint, file_sha256
+from src.incremental_validation import AcceptedVersions, member_fingerprints
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+SAVED_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
+SUCCESS_FILE = os.path.join(SAVED_FILE_PATH, 'success.zip')
+FAILURE_FILE = os.path.join(SAVED_FILE_PATH, 'fail_rules_1.zip')
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ResultCache(path=os.path.join(self.folder, 'cache', 'results.sqlite3'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.folder)
+
+    def test_put_and_get(self):
+        key = self.cache.key_for(SUCCESS_FILE)
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, True, '')
+
+        self.assertEqual(self.cache.get(key), (True, ''))
+
+    def test_key_depends_on_content(self):
+        self.assertNotEqual(self.cache.key_for(SUCCESS_FILE), self.cache.key_for(FAILURE_FILE))
+        self.assertTrue(self.cache.key_for(SUCCESS_FILE).startswith(file_sha256(SUCCESS_FILE)))
+
+    def test_key_depends_on_variant(self):
+        self.assertNotEqual(self.cache.key_for(SUCCESS_FILE), self.cache.key_for(SUCCESS_FILE, 'pathways-scope'))
+
+    def test_key_for_missing_file(self):
+        self.assertIsNone(self.cache.key_for(os.path.join(self.folder, 'missing.zip')))
+
+    def test_key_changes_with_rules(self):
+        old_key = self.cache.key_for(SUCCESS_FILE)
+        with patch.object(rules_table.registry, 'current', RulesTable.from_dict({'pathways_files': ['pathways.txt']})):
+            self.assertNotEqual(old_key, self.cache.key_for(SUCCESS_FILE))
+            self.assertNotEqual(RulesTable.builtin().fingerprint, rules_fingerprint())
+
+    @patch('src.result_cache.CanonicalValidator')
+    def test_key_changes_with_validator_version(self, mock_validator):
+        mock_validator.__version__ = '0.0.1'
+        old_key = self.cache.key_for(SUCCESS_FILE)
+        mock_validator.__version__ = '0.0.2'
+
+        self.assertNotEqual(old_key, self.cache.key_for(SUCCESS_FILE))
+
+    @patch('src.result_cache.time')
+    def test_expired_entries_are_ignored(self, mock_time):
+        self.cache.ttl_seconds = 10
+        mock_time.time.return_value = 1000
+        self.cache.put('key', False, 'error')
+        mock_time.time.return_value = 1011
+
+        self.assertIsNone(self.cache.get('key'))
+
+    @patch('src.result_cache.time')
+    def test_least_recently_used_entries_are_evicted(self, mock_time):
+        self.cache.max_size_bytes = 10
+        mock_time.time.return_value = 1000
+        self.cache.put('first', False, '12345')
+        mock_time.time.return_value = 1001
+        self.cache.put('second', False, '12345')
+        mock_time.time.return_value = 1002
+        self.cache.get('first')
+        mock_time.time.return_value = 1003
+        self.cache.put('third', False, '12345')
+
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertIsNotNone(self.cache.get('third'))
+
+    def test_from_settings(self):
+        settings = MagicMock()
+        settings.result_cache_enabled = False
+        self.assertIsNone(ResultCache.from_settings(settings))
+
+        settings.result_cache_enabled = True
+        settings.result_cache_path = self.cache.path
+        cache = ResultCache.from_settings(settings)
+        self.assertIsInstance(cache, ResultCache)
+
+
+class TestValidationWithResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ResultCache(path=os.path.join(self.folder, 'results.sqlite3'))
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path=SUCCESS_FILE, storage_client=MagicMock())
+            self.validator.file_path = SUCCESS_FILE
+            self.validator.file_relative_path = 'success.zip'
+            self.validator.result_cache = self.cache
+            self.validator.download_single_file = MagicMock(return_value=SUCCESS_FILE)
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up')
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+        self.cache.close()
+        shutil.rmtree(self.folder)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_duplicate_upload_uses_cache(self, mock_canonical_validator):
+        mock_result = MagicMock()
+        mock_result.status = True
+        mock_result.error = None
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+
+        first = self.validator.is_gtfs_pathways_valid()
+        second = self.validator.is_gtfs_pathways_valid()
+
+        self.assertEqual(first, (True, ''))
+        self.assertEqual(second, first)
+        mock_canonical_validator.assert_called_once()
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_validator_failures_are_not_cached(self, mock_canonical_validator):
+        mock_result = MagicMock()
+        mock_result.status = False
+        mock_result.error = 'Error uploading file: timeout'
+        mock_canonical_validator.return_value.validate.return_value = mock_result
+
+        self.validator.is_gtfs_pathways_valid()
+        self.validator.is_gtfs_pathways_valid()
+
+        self.assertEqual(mock_canonical_validator.call_count, 2)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_rules_reload_during_validation(self, mock_canonical_validator):
+        started_with = RulesTable.from_dict({'change_error_to_warning': ['minor_notice']})
+        reloaded = RulesTable.from_dict({'change_error_to_warning': []})
+        accepted_versions = AcceptedVersions(path=os.path.join(self.folder, 'accepted.sqlite3'))
+        self.validator.accepted_versions = accepted_versions
+        self.validator.project_group_id = 'project_group'
+
+        def validate():
+            rules_table.registry.current = reloaded
+            return MagicMock(status=False, error=[{'code': 'minor_notice', 'sampleNotices': []}], info=None)
+
+        mock_canonical_validator.return_value.validate.side_effect = validate
+        with patch.object(rules_table.registry, 'current', started_with):
+            is_valid, _ = self.validator.is_gtfs_pathways_valid()
+
+        # classified, cached and accepted with the rules the validation started with
+        self.assertTrue(is_valid)
+        self.assertIsNotNone(self.cache.get(self.cache.key_for(SUCCESS_FILE, rules=started_with)))
+        self.assertIsNone(self.cache.get(self.cache.key_for(SUCCESS_FILE, rules=reloaded)))
+        fingerprints = member_fingerprints(SUCCESS_FILE)
+        self.assertIsNotNone(accepted_versions.get('project_group', fingerprints, started_with))
+        self.assertIsNone(accepted_versions.get('project_group', fingerprints, reloaded))
+        accepted_versions.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from src.result_format import ResultFormatter, decode_report, SUMMARY_FORMAT, TEXT_FORMAT
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+
+def error(code, total, severity='ERROR'):
+    return {'code': code, 'severity': severity, 'totalNotices': total,
+            'sampleNotices': [{'csvRowNumber': row, 'fieldName': 'stop_id'} for row in range(total)]}
+
+
+class TestResultFormatter(unittest.TestCase):
+
+    def setUp(self):
+        self.errors = [error('foreign_key_violation', 3), error('duplicate_key', 40)]
+
+    def test_text_format_keeps_error_list(self):
+        formatter = ResultFormatter()
+        self.assertEqual(formatter.format(self.errors), str(self.errors))
+        self.assertEqual(formatter.variant, '')
+
+    def test_summary_counts_and_samples(self):
+        formatter = ResultFormatter(result_format=SUMMARY_FORMAT, max_samples=2)
+        summary = json.loads(formatter.format(self.errors))
+        self.assertEqual(summary['totalNotices'], 43)
+        self.assertFalse(summary['truncated'])
+        self.assertEqual([notice['code'] for notice in summary['notices']], ['duplicate_key', 'foreign_key_violation'])
+        self.assertEqual(summary['notices'][0]['totalNotices'], 40)
+        self.assertEqual(summary['notices'][0]['severity'], 'ERROR')
+        self.assertEqual(len(summary['notices'][0]['sampleNotices']), 2)
+        self.assertNotIn('report', summary)
+
+    def test_summary_of_no_errors(self):
+        formatter = ResultFormatter(result_format=SUMMARY_FORMAT)
+        self.assertEqual(json.loads(formatter.format([])), {'totalNotices': 0, 'notices': [], 'truncated': False})
+
+    def test_embedded_report_round_trips(self):
+        formatter = ResultFormatter(result_format=SUMMARY_FORMAT, embed_report=True)
+        summary = json.loads(formatter.format(self.errors))
+        self.assertEqual(summary['report']['encoding'], 'gzip+base64')
+        self.assertEqual(decode_report(summary['report']['data']), self.errors)
+
+    def test_summary_stays_under_max_bytes(self):
+        errors = [error(f'code_{index}', 50) for index in range(200)]
+        formatter = ResultFormatter(result_format=SUMMARY_FORMAT, max_bytes=2000, embed_report=True)
+        message = formatter.format(errors)
+        summary = json.loads(message)
+        self.assertLessEqual(len(message), 2000)
+        self.assertTrue(summary['truncated'])
+        self.assertNotIn('report', summary)
+        self.assertEqual(summary['totalNotices'], 200 * 50)
+        self.assertTrue(all(notice['sampleNotices'] == [] for notice in summary['notices']))
+
+    def test_from_settings(self):
+        settings = MagicMock(result_format='summary', result_max_samples='3', result_max_bytes='1000',
+                             result_embed_report=False)
+        formatter = ResultFormatter.from_settings(settings)
+        self.assertEqual(formatter.result_format, SUMMARY_FORMAT)
+        self.assertEqual(formatter.max_samples, 3)
+        self.assertEqual(formatter.max_bytes, 1000)
+        settings.result_format = 'unknown'
+        self.assertEqual(ResultFormatter.from_settings(settings).result_format, TEXT_FORMAT)
+
+    @patch.object(GTFSPathwaysValidation, '__init__', return_value=None)
+    def test_cache_variant_depends_on_format(self, mock_init):
+        validation = GTFSPathwaysValidation()
+        validation.pathways_scope_enabled = False
+        self.assertEqual(validation.cache_variant(), '')
+        validation.pathways_scope_enabled = True
+        validation.result_formatter = ResultFormatter(result_format=SUMMARY_FORMAT)
+        self.assertEqual(validation.cache_variant(), 'pathways-scope:summary-5-204800-0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from python_ms_core.core.topic.azure_topic import AzureTopic
+from src.result_publisher import ResultPublisher
+
+
+class RecordingTopic:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.published = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def publish(self, data):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError('connection lost')
+            self.published.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+class TestResultPublisher(unittest.TestCase):
+
+    def setUp(self):
+        self.topic = RecordingTopic()
+        self.topic_factory = MagicMock(return_value=self.topic)
+
+    def create_publisher(self, **kwargs):
+        publisher = ResultPublisher(topic_factory=self.topic_factory, retry_backoff_seconds=0, **kwargs)
+        self.addCleanup(publisher.close)
+        return publisher
+
+    def test_topic_client_is_reused(self):
+        publisher = self.create_publisher(linger_seconds=0)
+
+        for message in range(5):
+            publisher.publish(message).result(timeout=5)
+
+        self.assertEqual(self.topic.published, [0, 1, 2, 3, 4])
+        self.topic_factory.assert_called_once()
+
+    def test_messages_are_batched(self):
+        publisher = self.create_publisher(max_batch_size=3, linger_seconds=0.2)
+
+        with patch.object(ResultPublisher, '_send', wraps=ResultPublisher._send) as mock_send:
+            futures = [publisher.publish(message) for message in range(5)]
+            for future in futures:
+                future.result(timeout=5)
+
+        self.assertEqual([len(args[1]) for args, _ in mock_send.call_args_list], [3, 2])
+        self.assertEqual(self.topic.published, [0, 1, 2, 3, 4])
+
+    def test_failed_publish_is_retried_on_new_client(self):
+        self.topic.failures = 2
+        publisher = self.create_publisher(linger_seconds=0, max_retries=3)
+
+        publisher.publish('message').result(timeout=5)
+
+        self.assertEqual(self.topic.published, ['message'])
+        self.assertEqual(self.topic_factory.call_count, 3)
+
+    def test_failed_client_is_closed(self):
+        topics = [RecordingTopic(failures=1), RecordingTopic()]
+        self.topic_factory.side_effect = topics
+        publisher = self.create_publisher(linger_seconds=0, max_retries=1)
+
+        publisher.publish('message').result(timeout=5)
+
+        self.assertTrue(topics[0].closed)
+        self.assertFalse(topics[1].closed)
+        self.assertEqual(topics[1].published, ['message'])
+        publisher.close(timeout=5)
+        self.assertTrue(topics[1].closed)
+
+    def test_azure_topic_is_closed(self):
+        topic = MagicMock(spec=AzureTopic)
+        topic.publisher, topic.client, topic.executor, topic.lock_renewal = (MagicMock() for _ in range(4))
+
+        ResultPublisher._close_topic(topic)
+
+        topic.publisher.close.assert_called_once()
+        topic.client.close.assert_called_once()
+        topic.lock_renewal.close.assert_called_once()
+        topic.executor.shutdown.assert_called_once_with(wait=False)
+
+    def test_future_fails_after_max_retries(self):
+        self.topic.failures = 10
+        publisher = self.create_publisher(linger_seconds=0, max_retries=1)
+
+        with self.assertRaises(ConnectionError):
+            publisher.publish('message').result(timeout=5)
+        self.assertEqual(self.topic.published, [])
+
+    def test_close_flushes_pending_messages(self):
+        publisher = self.create_publisher(max_batch_size=10, linger_seconds=0.2)
+        futures = [publisher.publish(message) for message in range(3)]
+
+        publisher.close(timeout=5)
+
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(self.topic.published, [0, 1, 2])
+        with self.assertRaises(RuntimeError):
+            publisher.publish('late').result(timeout=5)
+
+    def test_from_settings(self):
+        settings = MagicMock(publish_batch_size='10', publish_linger_ms='50', publish_max_retries='2',
+                             publish_retry_backoff_seconds='0.1')
+
+        publisher = ResultPublisher.from_settings(settings, topic_factory=self.topic_factory)
+        self.addCleanup(publisher.close)
+
+        self.assertEqual(publisher.max_batch_size, 10)
+        self.assertEqual(publisher.linger_seconds, 0.05)
+        self.assertEqual(publisher.max_retries, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src import rules_table, pathways_config
+from src.rules_table import RulesTable, RulesRegistry, BUILTIN_VERSION
+from src.gtfx_pathways_validator import GTFSPathwaysValidator
+
+
+class TestRulesTable(unittest.TestCase):
+
+    def test_builtin_rules(self):
+        table = RulesTable.builtin()
+        self.assertEqual(table.version, BUILTIN_VERSION)
+        self.assertEqual(table.classifier.warning_codes, frozenset(pathways_config.CHANGE_ERROR_TO_WARNING))
+        self.assertEqual(table.classifier.pathways_files, frozenset(pathways_config.PATHWAYS_FILES))
+
+    def test_missing_rules_default_to_config(self):
+        table = RulesTable.from_dict({'version': 'v2', 'pathways_fatal_error_codes': ['pathway_loop']})
+        self.assertEqual(table.version, 'v2')
+        self.assertEqual(table.classifier.fatal_codes, frozenset(['pathway_loop']))
+        self.assertEqual(table.classifier.warning_codes, frozenset(pathways_config.CHANGE_ERROR_TO_WARNING))
+        result = table.classifier.classify([{'code': 'pathway_loop', 'sampleNotices': []}])
+        self.assertTrue(result.has_pathways_error)
+
+    def test_fingerprint_ignores_order_and_version(self):
+        first = RulesTable.from_dict({'version': 'a', 'pathways_files': ['pathways.txt', 'levels.txt']})
+        second = RulesTable.from_dict({'version': 'b', 'pathways_files': ['levels.txt', 'pathways.txt']})
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.assertNotEqual(first.fingerprint, RulesTable.from_dict({'pathways_files': []}).fingerprint)
+
+    def test_invalid_rules(self):
+        for rules in ({'pathways_files': 'pathways.txt'}, {'pathways_fields': ['stops.txt']},
+                      {'pathways_fields': {'stops.txt': [1]}}, {'unknown_rule': []}):
+            with self.assertRaises(ValueError):
+                RulesTable.from_dict(rules)
+
+
+class TestRulesRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'rules.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_rules(self, rules, mtime=None):
+        with open(self.path, 'w') as f:
+            f.write(rules if isinstance(rules, str) else json.dumps(rules))
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_without_file_uses_builtin_rules(self):
+        registry = RulesRegistry()
+        self.assertEqual(registry.current.version, BUILTIN_VERSION)
+        self.assertEqual(registry.current.fingerprint, RulesTable.builtin().fingerprint)
+
+    def test_hot_reload(self):
+        self.write_rules({'version': 'v1', 'change_error_to_warning': ['empty_file']}, mtime=1000)
+        registry = RulesRegistry(path=self.path)
+        self.assertEqual(registry.current.version, 'v1')
+        v1 = registry.current
+
+        # unchanged file is not re-read
+        self.assertFalse(registry.reload())
+        self.write_rules({'version': 'v2', 'change_error_to_warning': ['invalid_url']}, mtime=2000)
+        self.assertTrue(registry.reload())
+        self.assertEqual(registry.current.version, 'v2')
+        self.assertEqual(registry.current.classifier.warning_codes, frozenset(['invalid_url']))
+        # a validation holding the previous table is not affected
+        self.assertEqual(v1.classifier.warning_codes, frozenset(['empty_file']))
+
+    def test_invalid_file_keeps_active_rules(self):
+        self.write_rules({'version': 'v1'}, mtime=1000)
+        registry = RulesRegistry(path=self.path)
+        self.write_rules('{"version": ', mtime=2000)
+        self.assertFalse(registry.reload())
+        self.assertEqual(registry.current.version, 'v1')
+        os.remove(self.path)
+        self.assertFalse(registry.reload())
+        self.assertEqual(registry.current.version, 'v1')
+
+    def test_reload_thread(self):
+        self.write_rules({'version': 'v1'}, mtime=1000)
+        registry = RulesRegistry(path=self.path, reload_interval_seconds=0.01)
+        registry.start()
+        try:
+            self.write_rules({'version': 'v2'}, mtime=2000)
+            deadline = time.monotonic() + 5
+            while registry.current.version != 'v2' and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(registry.current.version, 'v2')
+        finally:
+            registry.stop()
+
+    def test_from_settings(self):
+        registry = RulesRegistry.from_settings(MagicMock(rules_path='', rules_reload_interval_seconds='5'))
+        self.assertIsNone(registry.path)
+        self.assertEqual(registry.reload_interval_seconds, 5)
+
+    @patch.object(GTFSPathwaysValidator, '__init__', return_value=None)
+    def test_rules_version_is_published(self, mock_init):
+        validator = GTFSPathwaysValidator()
+        with patch.object(rules_table.registry, 'current', RulesTable.from_dict({'version': 'v3'})), \
+                patch('src.gtfx_pathways_validator.QueueMessage') as mock_queue_message:
+            validator.status_message(True, MagicMock(), '')
+        data = mock_queue_message.data_from.call_args[0][0]['data']
+        self.assertEqual(data['package']['pathways-rules'], 'v3')
+
+
+if __name__ == '__main__':
+    unittest.main()
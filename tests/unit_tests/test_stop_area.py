@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.stop_area import StopAreaCheck, STOP_OUTSIDE_POLYGON
+from src.polygon import CompactPolygon
+from src.serializer.gtfs_pathways_serializer import Request
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+# bare coordinates, as in src/assets/msg-gtfs-pathways-validation.json
+POLYGON = {'coordinates': [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]]}
+STOPS_HEADER = 'stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station'
+STOPS = [
+    'station,Station,5,5,1,',
+    'entrance,Entrance,0.5,9.5,2,station',
+    'node,Node,,,3,station',
+    'far,Far entrance,5,12,2,station',
+]
+
+
+class TestStopAreaCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def build_feed(self, stops, header=STOPS_HEADER):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('stops.txt', '\n'.join([header] + stops))
+        return path
+
+    def test_bare_coordinates(self):
+        polygon = CompactPolygon.from_geojson(POLYGON)
+        self.assertEqual(polygon.bbox, (0, 0, 10, 10))
+        self.assertEqual(polygon.to_geojson(), POLYGON)
+
+    def test_stops_outside(self):
+        errors = StopAreaCheck(CompactPolygon.from_geojson(POLYGON)).validate(self.build_feed(STOPS))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]['code'], STOP_OUTSIDE_POLYGON)
+        self.assertEqual(errors[0]['totalNotices'], 1)
+        self.assertEqual(errors[0]['sampleNotices'], [{'csvRowNumber': 5, 'stopId': 'far', 'stopName': 'Far entrance',
+                                                       'locationType': 2, 'stopLat': 5.0, 'stopLon': 12.0}])
+
+    def test_stops_inside(self):
+        errors = StopAreaCheck(CompactPolygon.from_geojson(POLYGON)).validate(self.build_feed(STOPS[:3]))
+        self.assertEqual(errors, [])
+
+    def test_without_coordinates(self):
+        errors = StopAreaCheck(CompactPolygon.from_geojson(POLYGON)).validate(
+            self.build_feed(['station,Station,1'], header='stop_id,stop_name,location_type'))
+        self.assertEqual(errors, [])
+
+    def test_from_settings(self):
+        polygon_area = Request({'polygon': POLYGON}).polygon_area
+        self.assertIsNone(StopAreaCheck.from_settings(MagicMock(stop_area_check_enabled=False), polygon_area))
+        self.assertIsNone(StopAreaCheck.from_settings(MagicMock(stop_area_check_enabled=True), None))
+        self.assertIsNone(StopAreaCheck.from_settings(MagicMock(stop_area_check_enabled=True),
+                                                      Request({'polygon': {}}).polygon_area))
+        check = StopAreaCheck.from_settings(MagicMock(stop_area_check_enabled=True), polygon_area)
+        self.assertIs(check.polygon, polygon_area)
+
+    def test_large_feed(self):
+        random.seed(1)
+        stops = [f's{index},Stop {index},{random.uniform(-1, 11)},{random.uniform(-1, 11)},0,'
+                 for index in range(100000)]
+        path = self.build_feed(stops)
+        started_at = time.perf_counter()
+        errors = StopAreaCheck(CompactPolygon.from_geojson(POLYGON)).validate(path)
+        elapsed = time.perf_counter() - started_at
+        outside = sum(1 for stop in stops if not all(0 <= float(value) <= 10 for value in stop.split(',')[2:4]))
+        self.assertEqual(errors[0]['totalNotices'], outside)
+        self.assertLess(elapsed, 5)
+
+
+class TestValidationWithStopArea(unittest.TestCase):
+
+    def setUp(self):
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.file_path = 'feed.zip'
+        self.validator.file_relative_path = 'feed.zip'
+        self.validator.stop_area = StopAreaCheck(CompactPolygon.from_geojson(POLYGON))
+        self.folder = tempfile.mkdtemp()
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up')
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+        shutil.rmtree(self.folder)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_stops_outside_skip_canonical_validator(self, mock_canonical_validator):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('stops.txt', '\n'.join([STOPS_HEADER] + STOPS))
+        self.validator.download_single_file = MagicMock(return_value=path)
+
+        is_valid, validation_message = self.validator.is_gtfs_pathways_valid()
+
+        self.assertFalse(is_valid)
+        self.assertIn(STOP_OUTSIDE_POLYGON, validation_message)
+        mock_canonical_validator.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
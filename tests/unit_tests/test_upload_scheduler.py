@@ -0,0 +1,77 @@
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.upload_scheduler import UploadScheduler, FAST_LANE, LARGE_LANE
+
+MB = 1024 * 1024
+
+
+class TestUploadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = UploadScheduler(large_file_bytes=50 * MB, fast_slots=2, large_slots=1)
+
+    def run_in_background(self, size, project_group, started, release, order=None):
+        def run():
+            with self.scheduler.slot(size, project_group):
+                if order is not None:
+                    order.append(project_group)
+                started.set()
+                release.wait(timeout=5)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_lane_for(self):
+        self.assertEqual(self.scheduler.lane_for(10 * 1024), FAST_LANE)
+        self.assertEqual(self.scheduler.lane_for(400 * MB), LARGE_LANE)
+        self.assertEqual(self.scheduler.lane_for(None), FAST_LANE)
+
+    def test_small_uploads_are_not_blocked_by_large_ones(self):
+        large_started, release = threading.Event(), threading.Event()
+        self.run_in_background(400 * MB, 'agency', large_started, release)
+        self.assertTrue(large_started.wait(timeout=5))
+        second_large_started = threading.Event()
+        self.run_in_background(400 * MB, 'agency', second_large_started, release)
+
+        with self.scheduler.slot(50 * 1024, 'station') as lane:
+            self.assertEqual(lane, FAST_LANE)
+            self.assertFalse(second_large_started.is_set())
+
+        release.set()
+        self.assertTrue(second_large_started.wait(timeout=5))
+
+    def test_free_slot_goes_to_the_least_served_project_group(self):
+        scheduler = UploadScheduler(large_file_bytes=50 * MB, fast_slots=1)
+        self.scheduler = scheduler
+        order = []
+        release = threading.Event()
+        first_started = threading.Event()
+        self.run_in_background(1024, 'agency', first_started, release, order)
+        self.assertTrue(first_started.wait(timeout=5))
+        threads = []
+        for project_group in ['agency', 'agency', 'station']:
+            threads.append(self.run_in_background(1024, project_group, threading.Event(), release, order))
+            # make the arrival order deterministic
+            time.sleep(0.05)
+
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(order, ['agency', 'station', 'agency', 'agency'])
+
+    def test_from_settings(self):
+        settings = MagicMock(scheduler_enabled=True, scheduler_large_file_bytes='1024', max_concurrent_messages='4',
+                             scheduler_large_slots='2')
+
+        scheduler = UploadScheduler.from_settings(settings)
+
+        self.assertEqual(scheduler.large_file_bytes, 1024)
+        self.assertIsNone(UploadScheduler.from_settings(MagicMock(scheduler_enabled=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import time
+import unittest
+import concurrent.futures
+from unittest.mock import MagicMock
+from src.validation_executor import InlineExecutor, ThreadExecutor, ProcessExecutor, create_executor, validation_workers
+
+
+def echo(context, value):
+    return context, value
+
+
+def fail(context, message):
+    raise ValueError(message)
+
+
+def sleep(context, seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def worker_pid(context):
+    return os.getpid()
+
+
+def build_context():
+    return 'worker-context'
+
+
+class TestInlineExecutor(unittest.TestCase):
+
+    def test_run(self):
+        executor = InlineExecutor(context='context')
+        self.assertEqual(executor.run(echo, 1), ('context', 1))
+
+    def test_exceptions_are_propagated(self):
+        executor = InlineExecutor()
+        with self.assertRaises(ValueError):
+            executor.run(fail, 'invalid')
+
+
+class TestThreadExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadExecutor(context='context', workers=2, timeout=0.5)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_run(self):
+        self.assertEqual(self.executor.run(echo, 1), ('context', 1))
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            self.executor.run(sleep, 2)
+
+
+class TestProcessExecutor(unittest.TestCase):
+
+    def test_run_in_worker_process(self):
+        executor = ProcessExecutor(context_factory=build_context, workers=1)
+        try:
+            self.assertEqual(executor.run(echo, 1), ('worker-context', 1))
+            self.assertNotEqual(executor.run(worker_pid), os.getpid())
+        finally:
+            executor.shutdown()
+
+    def test_exceptions_are_propagated(self):
+        executor = ProcessExecutor(workers=1)
+        try:
+            with self.assertRaises(ValueError) as e:
+                executor.run(fail, 'invalid')
+            self.assertEqual(str(e.exception), 'invalid')
+        finally:
+            executor.shutdown()
+
+    def test_timeout_replaces_worker(self):
+        executor = ProcessExecutor(workers=1, timeout=0.5)
+        try:
+            first_pid = executor.run(worker_pid)
+            with self.assertRaises(TimeoutError):
+                executor.run(sleep, 5)
+            self.assertNotEqual(executor.run(worker_pid), first_pid)
+        finally:
+            executor.shutdown()
+
+    def test_worker_is_recycled_after_max_jobs(self):
+        executor = ProcessExecutor(workers=1, max_jobs_per_worker=2)
+        try:
+            pids = [executor.run(worker_pid) for _ in range(4)]
+            self.assertEqual(pids[0], pids[1])
+            self.assertNotEqual(pids[1], pids[2])
+            self.assertEqual(pids[2], pids[3])
+        finally:
+            executor.shutdown()
+
+    def test_worker_is_recycled_over_max_rss(self):
+        executor = ProcessExecutor(workers=1, max_rss_mb=1)
+        try:
+            self.assertNotEqual(executor.run(worker_pid), executor.run(worker_pid))
+        finally:
+            executor.shutdown()
+
+    def test_shutdown_cancels_jobs(self):
+        executor = ProcessExecutor(workers=1)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(executor.run, sleep, 5)
+            time.sleep(0.5)
+            executor.shutdown()
+            with self.assertRaises(concurrent.futures.CancelledError):
+                future.result(timeout=5)
+        with self.assertRaises(concurrent.futures.CancelledError):
+            executor.run(echo, 1)
+
+
+class TestCreateExecutor(unittest.TestCase):
+
+    def test_default_is_inline(self):
+        settings = MagicMock()
+        settings.validation_executor = 'inline'
+        self.assertIsInstance(create_executor(settings), InlineExecutor)
+
+    def test_thread_executor(self):
+        settings = MagicMock()
+        settings.validation_executor = 'thread'
+        settings.validation_workers = 0
+        settings.max_concurrent_messages = 3
+        settings.validation_timeout_seconds = 0
+        settings.scheduler_enabled = False
+        executor = create_executor(settings, context='context')
+        try:
+            self.assertIsInstance(executor, ThreadExecutor)
+            self.assertIsNone(executor.timeout)
+            self.assertEqual(executor._pool._max_workers, 3)
+        finally:
+            executor.shutdown()
+
+    def test_workers_cover_both_scheduler_lanes(self):
+        settings = MagicMock(validation_workers=0, max_concurrent_messages=3, scheduler_enabled=True,
+                             scheduler_large_slots=2)
+        self.assertEqual(validation_workers(settings), 5)
+        settings.validation_workers = 2
+        self.assertEqual(validation_workers(settings), 5)
+        settings.validation_workers = 8
+        self.assertEqual(validation_workers(settings), 8)
+        settings.scheduler_enabled = False
+        settings.validation_workers = 2
+        self.assertEqual(validation_workers(settings), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+import concurrent.futures
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import requests
+from gtfs_canonical_validator.constants import Constants
+from src.warm_validator import WarmValidator, ValidatorJob
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+
+def http_response(json_data=None, error=None):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.json.return_value = json_data
+    if error:
+        response.raise_for_status.side_effect = error
+    return response
+
+
+class FakeSession:
+    def __init__(self):
+        self.jobs = 0
+        self.uploads = []
+        self.closed = False
+        self.post_error = None
+        self.put_error = None
+        self.report = {'notices': []}
+        self.timeouts = []
+
+    def post(self, url, **kwargs):
+        self.timeouts.append(('post', kwargs.get('timeout')))
+        if self.post_error:
+            raise self.post_error
+        self.jobs += 1
+        return http_response({'jobId': f'job-{self.jobs}', 'url': f'https://upload/job-{self.jobs}'})
+
+    def put(self, url, data=None, **kwargs):
+        self.timeouts.append(('put', kwargs.get('timeout')))
+        self.uploads.append((url, data.read()))
+        return http_response(error=self.put_error)
+
+    def get(self, url, **kwargs):
+        self.timeouts.append(('get', kwargs.get('timeout')))
+        return http_response(self.report)
+
+    def close(self):
+        self.closed = True
+
+
+class TestWarmValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.zip_file = os.path.join(self.folder, 'feed.zip')
+        with open(self.zip_file, 'wb') as f:
+            f.write(b'zip content')
+        self.sessions = []
+        self.validator = WarmValidator(pool_size=2, session_factory=self.new_session)
+
+    def tearDown(self):
+        self.validator.stop()
+        shutil.rmtree(self.folder)
+
+    def new_session(self):
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+    def test_valid_feed(self):
+        self.validator.session().report = {'notices': [{'code': 'unknown_column', 'severity': 'INFO'}]}
+        response = self.validator.validate(self.zip_file)
+        self.assertTrue(response.status)
+        self.assertIsNone(response.error)
+        self.assertEqual(self.sessions[0].uploads, [('https://upload/job-1', b'zip content')])
+
+    def test_requests_have_a_timeout(self):
+        self.validator.validate(self.zip_file)
+        self.assertEqual(self.sessions[0].timeouts, [('post', Constants.timeout), ('put', Constants.timeout),
+                                                     ('get', Constants.timeout)])
+
+    def test_errors_are_reported(self):
+        notices = [{'code': 'foreign_key_violation', 'severity': 'ERROR'}, {'code': 'x', 'severity': 'WARNING'}]
+        self.validator.session().report = {'notices': notices}
+        response = self.validator.validate(self.zip_file)
+        self.assertFalse(response.status)
+        self.assertEqual(response.error, [notices[0]])
+        self.assertEqual(response.info, notices)
+
+    def test_upload_failure_is_not_a_list(self):
+        self.validator.session().put_error = requests.exceptions.HTTPError('403')
+        response = self.validator.validate(self.zip_file)
+        self.assertFalse(response.status)
+        self.assertEqual(response.error, 'Error uploading file: 403')
+
+    def test_jobs_are_created_ahead_of_time(self):
+        self.validator.start()
+        deadline = time.monotonic() + 5
+        while len(self.validator._jobs) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([job.job_id for job in self.validator._jobs], ['job-1', 'job-2'])
+        self.assertEqual(self.validator.take_job().job_id, 'job-1')
+
+    def test_expired_jobs_are_discarded(self):
+        self.validator._jobs.append(ValidatorJob('old', 'https://upload/old', time.monotonic() - 3600))
+        self.assertEqual(self.validator.take_job().job_id, 'job-1')
+
+    def test_session_is_recycled_after_failures(self):
+        session = self.validator.session()
+        session.post_error = requests.exceptions.ConnectionError('reset')
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.validator.create_job()
+        self.assertFalse(self.validator.healthy)
+        self.assertTrue(session.closed)
+        self.assertEqual(self.validator.create_job().job_id, 'job-1')
+        self.assertTrue(self.validator.healthy)
+        self.assertEqual(len(self.sessions), 2)
+
+    def test_each_thread_has_its_own_session(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.validator.session()))
+        thread.start()
+        thread.join()
+        sessions.append(self.validator.session())
+
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertIs(self.validator.session(), sessions[1])
+        self.validator.stop()
+        self.assertTrue(all(session.closed for session in sessions))
+
+    def test_other_threads_replace_their_session_after_failures(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as worker:
+            before = worker.submit(self.validator.session).result()
+            self.assertIs(worker.submit(self.validator.session).result(), before)
+            self.validator.session().post_error = requests.exceptions.ConnectionError('reset')
+            for _ in range(3):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    self.validator.create_job()
+            after = worker.submit(self.validator.session).result()
+
+        self.assertIsNot(after, before)
+        self.assertTrue(before.closed)
+        self.assertFalse(after.closed)
+
+    def test_job_failure_is_reported(self):
+        self.validator.session().post_error = requests.exceptions.ConnectionError('reset')
+        response = self.validator.validate(self.zip_file)
+        self.assertEqual(response.error, 'Error: reset')
+
+    def test_from_settings(self):
+        self.assertIsNone(WarmValidator.from_settings(MagicMock(warm_validator_enabled=False)))
+        validator = WarmValidator.from_settings(MagicMock(warm_validator_enabled=True, warm_validator_pool_size='4',
+                                                          warm_validator_job_max_age_seconds='60'))
+        self.assertEqual((validator.pool_size, validator.job_max_age_seconds), (4, 60))
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_validation_uses_warm_validator(self, mock_canonical_validator):
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            validation = GTFSPathwaysValidation()
+        validation.warm_validator = MagicMock()
+        validation.warm_validator.validate.return_value = MagicMock(status=True, error=None)
+        is_valid, message, is_final = validation.run_canonical_validation(self.zip_file)
+        self.assertTrue(is_valid)
+        self.assertTrue(is_final)
+        validation.warm_validator.validate.assert_called_once_with(self.zip_file)
+        mock_canonical_validator.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
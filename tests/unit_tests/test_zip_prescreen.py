@@ -0,0 +1,130 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.zip_prescreen import ZipPrescreen
+from src.gtfs_pathways_validation import GTFSPathwaysValidation
+
+SAVED_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
+STOPS = 'stop_id,stop_name\nstation,Station\n'
+
+
+def codes(errors):
+    return sorted(error['code'] for error in errors)
+
+
+class TestZipPrescreen(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.prescreen = ZipPrescreen()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def build_zip(self, members):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return path
+
+    def test_valid_fixture(self):
+        self.assertEqual(self.prescreen.screen(os.path.join(SAVED_FILE_PATH, 'pathways-good.zip')), [])
+
+    def test_not_a_zip(self):
+        path = os.path.join(self.folder, 'feed.zip')
+        with open(path, 'w') as f:
+            f.write('stop_id,stop_name')
+
+        errors = self.prescreen.screen(path)
+
+        self.assertEqual(codes(errors), ['invalid_zip'])
+
+    def test_truncated_zip(self):
+        with open(os.path.join(SAVED_FILE_PATH, 'pathways-good.zip'), 'rb') as f:
+            content = f.read()
+        path = os.path.join(self.folder, 'feed.zip')
+        with open(path, 'wb') as f:
+            f.write(content[:len(content) // 2])
+
+        self.assertEqual(codes(self.prescreen.screen(path)), ['invalid_zip'])
+
+    def test_missing_required_files(self):
+        path = self.build_zip({'agency.txt': 'agency_id\n1\n'})
+        self.prescreen.required_files = ('stops.txt', 'pathways.txt')
+
+        errors = self.prescreen.screen(path)
+
+        self.assertEqual(codes(errors), ['missing_required_file'])
+        self.assertEqual(errors[0]['totalNotices'], 2)
+        self.assertEqual([notice['filename'] for notice in errors[0]['sampleNotices']], ['stops.txt', 'pathways.txt'])
+
+    def test_files_in_a_folder(self):
+        self.assertEqual(self.prescreen.screen(self.build_zip({'feed/stops.txt': STOPS})), [])
+
+    def test_compression_ratio(self):
+        path = self.build_zip({'stops.txt': STOPS, 'shapes.txt': '0' * 1024 * 1024})
+
+        errors = self.prescreen.screen(path)
+
+        self.assertEqual(codes(errors), ['zip_compression_ratio_exceeded'])
+        self.assertEqual(errors[0]['sampleNotices'][0]['filename'], 'shapes.txt')
+
+    def test_uncompressed_size(self):
+        self.prescreen.max_uncompressed_bytes = 10
+
+        self.assertEqual(codes(self.prescreen.screen(self.build_zip({'stops.txt': STOPS}))),
+                         ['zip_uncompressed_size_exceeded'])
+
+    def test_too_many_members(self):
+        self.prescreen.max_members = 2
+        path = self.build_zip({'stops.txt': STOPS, 'a.txt': 'a', 'b.txt': 'b'})
+
+        self.assertEqual(codes(self.prescreen.screen(path)), ['zip_too_many_members'])
+
+    def test_from_settings(self):
+        settings = MagicMock(zip_prescreen_enabled=True, zip_prescreen_require_pathways=True,
+                             zip_prescreen_max_members='10', zip_prescreen_max_uncompressed_bytes='1024',
+                             zip_prescreen_max_compression_ratio='100')
+
+        prescreen = ZipPrescreen.from_settings(settings)
+
+        self.assertEqual(prescreen.required_files, ('stops.txt', 'pathways.txt'))
+        self.assertEqual(prescreen.max_uncompressed_bytes, 1024)
+        self.assertIsNone(ZipPrescreen.from_settings(MagicMock(zip_prescreen_enabled=False)))
+
+
+class TestValidationWithPrescreen(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        with patch.object(GTFSPathwaysValidation, '__init__', return_value=None):
+            self.validator = GTFSPathwaysValidation(file_path='feed.zip', storage_client=MagicMock())
+        self.validator.file_relative_path = 'feed.zip'
+        self.validator.zip_prescreen = ZipPrescreen()
+        self.clean_up = patch.object(GTFSPathwaysValidation, 'clean_up')
+        self.clean_up.start()
+
+    def tearDown(self):
+        self.clean_up.stop()
+        shutil.rmtree(self.folder)
+
+    @patch('src.gtfs_pathways_validation.CanonicalValidator')
+    def test_rejected_upload_skips_canonical_validator(self, mock_canonical_validator):
+        path = os.path.join(self.folder, 'feed.zip')
+        with open(path, 'w') as f:
+            f.write('{"not": "a zip"}')
+
+        is_valid, validation_message = self.validator.validate_downloaded_file(path)
+
+        self.assertFalse(is_valid)
+        self.assertIn('invalid_zip', validation_message)
+        mock_canonical_validator.assert_not_called()
+        GTFSPathwaysValidation.clean_up.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()